@@ -0,0 +1,361 @@
+"""Backfill a league's previous seasons.
+
+    ff-backfill -l 123456 -j 4
+
+Every week of every season in the league's status.previousSeasons (or
+--seasons) is pulled, a few at a time, and saved as a normal snapshot
+(FF_{season}_wk{week}_{league}.json). Saved weeks are recorded in a
+checkpoint beside the snapshots (FF_backfill_{league}.json), so an
+interrupted or partly failed backfill picks up where it stopped; a
+week whose snapshot has since been removed is pulled again. The data
+directory's gc keeps the seasons in a checkpoint whatever its retention
+policy.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import concurrent.futures
+import json
+import os
+import threading
+import time
+from typing import Callable
+
+import requests  # type: ignore
+
+from FF.main import base_url
+from FF.main import Colors
+from FF.main import connect_FF
+from FF.main import DATA_PATH
+from FF.main import FULL_VIEWS
+from FF.main import LIMITER
+from FF.main import load_cookies
+from FF.main import snapshot_path
+from FF.storage import atomic_write
+from FF.storage import locked
+from FF.storage import write_snapshot
+
+# ESPN serves seasons before this from the league history endpoint.
+HISTORY_BEFORE = 2018
+# Weeks in a season whose status doesn't say.
+DEFAULT_WEEKS = 17
+JOBS = 4
+RETRIES = 2
+# mStatus for the season's length.
+VIEWS = FULL_VIEWS + ('mStatus',)
+
+
+def checkpoint_path(path: str, LID: int) -> str:
+    return f'{path}/FF_backfill_{LID}.json'
+
+
+class Checkpoint:
+    """Each season's length and the weeks saved so far, written through
+    on every change. Thread safe.
+
+    `exists(year, week)`, when given, tells whether a saved week's
+    snapshot is still there.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        exists: Callable[[int, int], bool] | None = None,
+    ) -> None:
+        self.path = path
+        self.exists = exists
+        self.weeks: dict[int, int] = {}
+        self.done: dict[int, set[int]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        exists: Callable[[int, int], bool] | None = None,
+    ) -> Checkpoint:
+        checkpoint = cls(path, exists)
+        try:
+            with open(path) as rf:
+                state = json.load(rf)
+        except FileNotFoundError:
+            return checkpoint
+        except ValueError:
+            print(
+                f'{Colors.YELLOW}Starting the backfill over: {path} is '
+                f'unreadable{Colors.ENDC}',
+            )
+            return checkpoint
+        checkpoint.weeks = {
+            int(year): weeks for year, weeks in state['weeks'].items()
+        }
+        checkpoint.done = {
+            int(year): set(weeks) for year, weeks in state['done'].items()
+        }
+        return checkpoint
+
+    def save(self) -> None:
+        with atomic_write(self.path) as wf:
+            json.dump(
+                {
+                    'weeks': self.weeks,
+                    'done': {
+                        year: sorted(weeks)
+                        for year, weeks in self.done.items()
+                    },
+                },
+                wf,
+                sort_keys=True,
+            )
+
+    def set_weeks(self, year: int, weeks: int) -> None:
+        with self._lock:
+            self.weeks[year] = weeks
+            self.save()
+
+    def finish(self, year: int, week: int) -> None:
+        with self._lock:
+            self.done.setdefault(year, set()).add(week)
+            self.save()
+
+    def todo(self, year: int) -> list[int]:
+        """Weeks of `year` not saved yet, or saved but since removed;
+        all of them while its length is unknown.
+        """
+        weeks = self.weeks.get(year, DEFAULT_WEEKS)
+        done = self.done.get(year, set())
+        return [
+            w for w in range(1, weeks + 1)
+            if w not in done or (
+                self.exists is not None and not self.exists(year, w)
+            )
+        ]
+
+
+def season_weeks(d: dict) -> int:
+    return d.get('status', {}).get('finalScoringPeriod') or DEFAULT_WEEKS
+
+
+def fetch_week(
+    LID: int,
+    year: int,
+    week: int,
+    dev: bool,
+    url_base: str | None = None,
+) -> tuple[int, dict]:
+    """One week of a past season, as (status code, league)."""
+    c = load_cookies(dev)
+    swid = c['SWID']  # type: ignore
+    espn_s2 = c['espn_s2']  # type: ignore
+    base = base_url(url_base)
+    params = [('view', view) for view in VIEWS]
+    params.append(('scoringPeriodId', str(week)))
+    if year < HISTORY_BEFORE:
+        url = f'{base}/leagueHistory/{LID}'
+        params.append(('seasonId', str(year)))
+    else:
+        url = f'{base}/seasons/{year}/segments/0/leagues/{LID}'
+    LIMITER.acquire()
+    try:
+        r = requests.get(
+            url, params=params,
+            cookies={'SWID': swid, 'espn_s2': espn_s2},
+            timeout=10,
+        )
+        d = r.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return 0, {}
+    # The history endpoint answers with a list of seasons; an empty one
+    # means it has no such season.
+    if isinstance(d, list):
+        if not d:
+            return 404, {}
+        d = d[0]
+    return r.status_code, d
+
+
+def previous_seasons(
+    LID: int,
+    week: int,
+    dev: bool,
+    url_base: str | None = None,
+) -> list[int]:
+    status_code, d = connect_FF(LID, week, dev, url_base, ('mStatus',))
+    if status_code != 200:
+        raise SystemExit(
+            f'{Colors.RED}Could not read the league\'s previous seasons '
+            f'(status {status_code}){Colors.ENDC}',
+        )
+    return sorted(d.get('status', {}).get('previousSeasons', []))
+
+
+class Backfill:
+    """Pulls every week of `seasons` not yet in `checkpoint`, `jobs` at
+    a time.
+
+    `fetch(year, week)` returns (status code, league) and `save(d, year,
+    week)` stores it; tests pass their own.
+    """
+
+    def __init__(
+        self,
+        seasons: list[int],
+        checkpoint: Checkpoint,
+        fetch: Callable[[int, int], tuple[int, dict]],
+        save: Callable[[dict, int, int], None],
+        jobs: int = JOBS,
+        retries: int = RETRIES,
+        log: Callable[[str], None] = print,
+    ) -> None:
+        self.seasons = seasons
+        self.checkpoint = checkpoint
+        self.fetch = fetch
+        self.save = save
+        self.jobs = jobs
+        self.retries = retries
+        self.log = log
+        self.saved = 0
+        self.failed: list[tuple[int, int]] = []
+        self._lock = threading.Lock()
+
+    def pull_week(self, year: int, week: int) -> None:
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(2 ** attempt)
+            status_code, d = self.fetch(year, week)
+            # An empty league is never saved, so the week is tried again.
+            if status_code == 200 and d:
+                break
+        else:
+            with self._lock:
+                self.failed.append((year, week))
+                self.log(
+                    f'{year} week {week}: {Colors.RED}failed '
+                    f'(status {status_code}){Colors.ENDC}',
+                )
+            return
+        if year not in self.checkpoint.weeks:
+            self.checkpoint.set_weeks(year, season_weeks(d))
+        d.setdefault('FF', {})['full_pull'] = time.time()
+        self.save(d, year, week)
+        self.checkpoint.finish(year, week)
+        with self._lock:
+            self.saved += 1
+            self.log(f'{year} week {week}: saved')
+
+    def run(self) -> int:
+        """Pull what's left; returns how many weeks failed."""
+        with concurrent.futures.ThreadPoolExecutor(self.jobs) as pool:
+            # A season's length comes with its first week pulled.
+            unknown = [
+                (year, self.checkpoint.todo(year)[0])
+                for year in self.seasons
+                if year not in self.checkpoint.weeks and
+                self.checkpoint.todo(year)
+            ]
+            list(pool.map(lambda yw: self.pull_week(*yw), unknown))
+            rest = [
+                (year, week)
+                for year in self.seasons if year in self.checkpoint.weeks
+                for week in self.checkpoint.todo(year)
+                if (year, week) not in self.failed
+            ]
+            list(pool.map(lambda yw: self.pull_week(*yw), rest))
+        return len(self.failed)
+
+
+def save_week(path: str, LID: int) -> Callable[[dict, int, int], None]:
+    def save(d: dict, year: int, week: int) -> None:
+        snapshot = snapshot_path(path, year, week, LID)
+        with locked(f'{snapshot}.lock'):
+            write_snapshot(snapshot, d)
+    return save
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Pull and save every week of a league's past seasons",
+    )
+    parser.add_argument(
+        '-l', '--league-id',
+        help='League ID (default: from your cookies)',
+        type=int,
+    )
+    parser.add_argument(
+        '-s', '--seasons',
+        help="Seasons to backfill (default: the league's previous seasons)",
+        nargs='+',
+        type=int,
+        metavar='YEAR',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        help=f'Weeks pulled at a time (default {JOBS})',
+        type=int,
+        default=JOBS,
+    )
+    parser.add_argument(
+        '-d', '--dev',
+        help='Use dev cookies',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--base-url',
+        help='API base URL (env: FF_BASE_URL)',
+    )
+    parser.add_argument(
+        '--rate-limit',
+        help='Max API requests per second',
+        type=float,
+        metavar='N',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.jobs < 1:
+        raise SystemExit(f'{Colors.RED}--jobs must be at least 1{Colors.ENDC}')
+    if args.rate_limit is not None:
+        LIMITER.rate = args.rate_limit
+    LID: int = args.league_id or load_cookies(
+        args.dev, key='league_id',
+    )  # type: ignore
+    seasons = args.seasons or previous_seasons(
+        LID,
+        load_cookies(args.dev, key='week'),  # type: ignore
+        args.dev,
+        args.base_url,
+    )
+    os.makedirs(DATA_PATH, exist_ok=True)
+    backfill = Backfill(
+        seasons,
+        Checkpoint.load(
+            checkpoint_path(DATA_PATH, LID),
+            lambda year, week: os.path.exists(
+                snapshot_path(DATA_PATH, year, week, LID),
+            ),
+        ),
+        lambda year, week: fetch_week(
+            LID, year, week, args.dev, args.base_url,
+        ),
+        save_week(DATA_PATH, LID),
+        args.jobs,
+    )
+    started = time.monotonic()
+    failed = backfill.run()
+    print(
+        f'Saved {backfill.saved} weeks of {len(seasons)} seasons in '
+        f'{time.monotonic() - started:.1f}s',
+    )
+    if failed:
+        print(
+            f'{Colors.RED}{failed} weeks failed; run again to retry '
+            f'them{Colors.ENDC}',
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,143 @@
+from __future__ import annotations  # python3.7+
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any
+
+CACHE_ENV = 'FF_CACHE_DIR'
+MAX_BYTES = 4 * 1024 * 1024
+CHUNK = 1 << 20
+
+
+def cache_dir() -> str:
+    if os.environ.get(CACHE_ENV):
+        return os.environ[CACHE_ENV]
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache',
+    )
+    return os.path.join(base, 'ff')
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _code_stamp() -> str:
+    """Changes whenever the renderer's source does: any of the package's
+    modules, as output is built across main, league, ratings, sos and
+    more.
+    """
+    stamps = []
+    with os.scandir(os.path.dirname(os.path.abspath(__file__))) as it:
+        for entry in it:
+            if entry.name.endswith('.py'):
+                st = entry.stat()
+                stamps.append(f'{entry.name}:{st.st_size}-{st.st_mtime_ns}')
+    return _digest(','.join(sorted(stamps)).encode())
+
+
+class RenderCache:
+    """Rendered output on disk, keyed on the snapshot's content hash and
+    the view options, evicted least recently used past max_bytes.
+
+    A snapshot's hash is remembered against its size and mtime, so a hit
+    costs two stats and two small reads and never decodes the snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = None,
+        max_bytes: int = MAX_BYTES,
+    ) -> None:
+        self.directory = directory or cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def fingerprint(self, path: str) -> str:
+        st = os.stat(path)
+        stamp = f'{st.st_size} {st.st_mtime_ns} {st.st_ino}'
+        memo = self._path(f'fp-{_digest(os.path.abspath(path).encode())}')
+        try:
+            with open(memo) as rf:
+                memo_stamp, digest = rf.read().rsplit(' ', 1)
+            if memo_stamp == stamp:
+                return digest
+        except (OSError, ValueError):
+            pass
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as rf:
+            for chunk in iter(lambda: rf.read(CHUNK), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._write(memo, f'{stamp} {digest}')
+        return digest
+
+    def key(self, path: str, view: dict[str, Any]) -> str | None:
+        """Cache key for rendering `view` of the snapshot at `path`, or
+        None when the snapshot cannot be read.
+        """
+        try:
+            fingerprint = self.fingerprint(path)
+        except OSError:
+            return None
+        options = json.dumps(view, sort_keys=True)
+        return _digest(f'{fingerprint}|{_code_stamp()}|{options}'.encode())
+
+    def get(self, key: str) -> str | None:
+        path = self._path(f'{key}.out')
+        try:
+            with open(path, encoding='utf-8') as rf:
+                output = rf.read()
+            # Bump the mtime: eviction drops the least recently used.
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return output
+
+    def put(self, key: str, output: str) -> None:
+        try:
+            self._write(self._path(f'{key}.out'), output)
+            self.evict()
+        except OSError:
+            pass
+
+    def _write(self, path: str, text: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as wf:
+                wf.write(text)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def evict(self) -> None:
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith('.tmp'):
+                    continue
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
@@ -0,0 +1,71 @@
+"""Thin FF client: forwards its arguments to a running FF daemon and prints
+the reply, falling back to running FF in-process when no daemon is up or
+the daemon does not serve the request (e.g. --pull).
+
+Kept free of FF.main imports so a query costs one socket round trip on
+top of interpreter start.
+"""
+from __future__ import annotations  # python3.7+
+
+import json
+import os
+import socket
+import sys
+import tempfile
+from typing import Any
+
+SOCKET_ENV = 'FF_SOCKET'
+TIMEOUT = 30.0
+
+
+def socket_path() -> str:
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    run_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return os.path.join(run_dir, f'ff-{uid}.sock')
+
+
+def request(
+    payload: dict[str, Any],
+    path: str | None = None,
+    timeout: float = TIMEOUT,
+) -> dict[str, Any]:
+    """Send one request to the daemon and return its reply.
+
+    Raises OSError when no daemon is listening.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError('Unix sockets are not supported on this platform')
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path or socket_path())
+        s.sendall(json.dumps(payload).encode() + b'\n')
+        with s.makefile('rb') as rf:
+            line = rf.readline()
+    if not line:
+        raise ConnectionError('FF daemon closed the connection')
+    reply: dict[str, Any] = json.loads(line)
+    return reply
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        reply = request({'argv': argv})
+    except OSError:
+        reply = {'fallback': True}
+    if reply.get('fallback'):
+        from FF.main import main as ff_main
+        sys.argv = ['ff'] + argv
+        return ff_main()
+    if reply.get('error'):
+        print(reply['error'], file=sys.stderr)
+    else:
+        print(reply['output'])
+    status: int = reply['status']
+    return status
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
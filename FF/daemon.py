@@ -0,0 +1,304 @@
+"""Resident FF daemon.
+
+Keeps parsed leagues and their built Rosters in memory and answers
+roster, matchup and standings queries from FF.client over a Unix socket:
+
+    ff-daemon --refresh 300 &
+    ffc -m
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Any
+
+from FF.client import request
+from FF.client import socket_path
+from FF.league import League
+from FF.main import build_parser
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.main import format_matchup
+from FF.main import format_scoreboard
+from FF.main import format_standings
+from FF.main import load_data
+from FF.main import pull_and_save
+from FF.main import resolve_args
+from FF.main import snapshot_path
+from FF.profiling import Profiler
+from FF.ratings import read_pro_schedule
+from FF.sos import league_sos
+
+REFRESH = 300.0
+# Requests that change state, talk to the API or run long jobs are left
+# to the client to run in-process.
+LOCAL_ONLY = (
+    'pull', 'cookies', 'SWID', 'espn_s2', 'simulate', 'trade',
+    'suggest_trades', 'profile', 'profile_memory', 'profile_cprofile',
+    'profile_json', 'gc', 'plan', 'diff', 'scoring', 'local_proj',
+    'efficiency', 'player',
+)
+
+
+class ParserError(Exception):
+    pass
+
+
+class _Parser(argparse.ArgumentParser):
+    def error(self, message: str) -> Any:
+        raise ParserError(
+            f'{self.format_usage()}{self.prog}: error: {message}',
+        )
+
+
+class CachedLeague(League):
+    """A loaded snapshot, the Rosters built from it so far, and the file
+    it came from.
+    """
+
+    def __init__(
+        self,
+        d: dict,
+        path: str,
+        year: int,
+        week: int,
+        schedule: dict | None = None,
+    ) -> None:
+        super().__init__(d, year, week, schedule=schedule)
+        self.path = path
+        self.mtime = os.stat(path).st_mtime
+
+    def render(self, args: argparse.Namespace) -> str:
+        if args.scoreboard:
+            return format_scoreboard(
+                self.scoreboard(), args.team_id,
+                args.scoreboard == 'extended',
+            )
+        if args.sos:
+            return league_sos(self.d, args.team_id)
+        if args.standings:
+            return format_standings(self.standings(), args.team_id)
+        if args.matchup:
+            return format_matchup(*self.matchup(self.week, args.team_id))
+        return self.team(args.team_id).format_roster()
+
+
+class Daemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        data_path: str = DATA_PATH,
+        refresh: float = REFRESH,
+        pull: bool = False,
+    ) -> None:
+        self.path = path
+        self.data_path = data_path
+        self.refresh_interval = refresh
+        self.pull = pull
+        self.leagues: dict[tuple[int, int, int], CachedLeague] = {}
+        # (dev, base url) of every league to pull on refresh
+        self.sources: dict[tuple[int, int, int], tuple[bool, str | None]] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.served = 0
+        _claim(path)
+        super().__init__(path, Handler)
+        os.chmod(path, 0o600)
+
+    def league(self, args: argparse.Namespace) -> CachedLeague:
+        key = (args.season, args.week, args.league_id)
+        with self.lock:
+            league = self.leagues.get(key)
+            if league is None:
+                league = self.load(args)
+                self.leagues[key] = league
+                self.sources[key] = (args.dev, args.base_url)
+            return league
+
+    def load(self, args: argparse.Namespace) -> CachedLeague:
+        d = load_data(self.data_path, args)
+        path = snapshot_path(
+            self.data_path, args.season, args.week, args.league_id,
+        )
+        return CachedLeague(
+            d, path, args.season, args.week,
+            read_pro_schedule(self.data_path, args.season),
+        )
+
+    def refresh(self) -> int:
+        """Pull (with --pull) and reload every league whose snapshot
+        changed; returns the number reloaded.
+        """
+        with self.lock:
+            keys = list(self.leagues)
+        reloaded = 0
+        for key in keys:
+            year, week, LID = key
+            args = argparse.Namespace(season=year, week=week, league_id=LID)
+            if self.pull:
+                args.dev, args.base_url = self.sources[key]
+                args.scores = args.matchup_only = False
+                try:
+                    # Not redirected: stdout is shared with the handler
+                    # threads, so the pull's progress goes to the log.
+                    pull_and_save(args, Profiler(), self.data_path)
+                except SystemExit as e:
+                    # The saved snapshot stands; the others still refresh.
+                    print(f'Pulling league {LID} failed: {e}')
+            with self.lock:
+                league = self.leagues[key]
+                try:
+                    if os.stat(league.path).st_mtime == league.mtime:
+                        continue
+                    self.leagues[key] = self.load(args)
+                except OSError:
+                    continue
+            reloaded += 1
+        return reloaded
+
+    def refresh_loop(self) -> None:
+        while not self.stopped.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except (SystemExit, Exception) as e:
+                print(f'Refresh failed: {e}')
+
+    def dispatch(self, req: dict[str, Any]) -> dict[str, Any]:
+        cmd = req.get('cmd', 'query')
+        if cmd == 'ping':
+            return {'status': 0, 'output': 'pong'}
+        if cmd == 'stats':
+            with self.lock:
+                leagues = [list(key) for key in self.leagues]
+            return {
+                'status': 0,
+                'output': json.dumps({
+                    'served': self.served, 'leagues': leagues,
+                }),
+            }
+        if cmd == 'refresh':
+            return {'status': 0, 'output': f'Reloaded {self.refresh()}'}
+        if cmd == 'stop':
+            self.stopped.set()
+            threading.Thread(target=self.shutdown).start()
+            return {'status': 0, 'output': 'Stopping'}
+        return self.query(req.get('argv', []))
+
+    def query(self, argv: list[str]) -> dict[str, Any]:
+        if '-h' in argv or '--help' in argv:
+            return {'fallback': True}
+        try:
+            args = build_parser(_Parser).parse_args(argv)
+        except ParserError as e:
+            return {'status': 2, 'error': str(e)}
+        if any(getattr(args, name) for name in LOCAL_ONLY):
+            return {'fallback': True}
+        try:
+            # Queries only read; the cookies are left as they are.
+            resolve_args(args, persist=False)
+            output = self.league(args).render(args)
+        except SystemExit as e:
+            return {'status': 1, 'error': str(e.code or '')}
+        except (KeyError, ValueError, OSError) as e:
+            return {'status': 1, 'error': str(e)}
+        with self.lock:
+            self.served += 1
+        return {'status': 0, 'output': output}
+
+    def server_close(self) -> None:
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.path)
+
+
+class Handler(socketserver.StreamRequestHandler):
+    server: Daemon
+
+    def handle(self) -> None:
+        # One JSON request per line; connections may send several.
+        for line in self.rfile:
+            try:
+                req = json.loads(line)
+            except ValueError:
+                reply = {'status': 2, 'error': 'Bad request'}
+            else:
+                reply = self.server.dispatch(req)
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+            self.wfile.flush()
+
+
+def _claim(path: str) -> None:
+    """Remove a stale socket file, or exit if a daemon is using it."""
+    if not os.path.exists(path):
+        return
+    try:
+        request({'cmd': 'ping'}, path, timeout=1)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise SystemExit(
+            f'{Colors.RED}FF daemon already running on {path}{Colors.ENDC}',
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='FF daemon')
+    parser.add_argument(
+        '--socket',
+        help='Unix socket path (env: FF_SOCKET)',
+    )
+    parser.add_argument(
+        '--refresh',
+        help=f'Seconds between snapshot reloads (default: {REFRESH:.0f})',
+        type=float,
+        default=REFRESH,
+    )
+    parser.add_argument(
+        '-p', '--pull',
+        help='Pull every loaded league from the API on each refresh',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--stop',
+        help='Stop the running daemon',
+        action='store_true',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    path = args.socket or socket_path()
+    if not hasattr(socket, 'AF_UNIX'):
+        raise SystemExit(
+            f'{Colors.RED}The FF daemon needs Unix sockets{Colors.ENDC}',
+        )
+    if args.stop:
+        try:
+            print(request({'cmd': 'stop'}, path)['output'])
+        except OSError as e:
+            raise SystemExit(
+                f'{Colors.RED}{type(e).__name__}: {e}{Colors.ENDC}',
+            )
+        return 0
+    with Daemon(path, refresh=args.refresh, pull=args.pull) as server:
+        threading.Thread(target=server.refresh_loop, daemon=True).start()
+        print(f'FF daemon listening on {path}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stopped.set()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
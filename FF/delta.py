@@ -0,0 +1,129 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import time
+
+from FF.main import connect_FF
+from FF.main import load_data
+
+# Matchup totals plus each side's roster for the scoring period only.
+SCORE_VIEWS = ('mMatchupScore', 'mScoreboard')
+# Standings, projections and rosters outside the live period are taken
+# from a full pull no older than this.
+FULL_MAX_AGE = 6 * 60 * 60
+
+
+def _period_roster(side: dict) -> list[dict]:
+    roster = side.get('rosterForCurrentScoringPeriod') or {}
+    entries: list[dict] = roster.get('entries', [])
+    return entries
+
+
+def merge_scores(d: dict, delta: dict, week: int) -> bool:
+    """Merge the week's matchup totals and player stats from a scores-only
+    pull into the snapshot `d`.
+
+    Returns False, leaving `d` untouched, when the delta does not line up
+    with the snapshot (unknown matchups or changed rosters) and a full
+    pull is needed instead.
+    """
+    schedule = {m['id']: m for m in d.get('schedule', [])}
+    teams = {t['id']: t for t in d.get('teams', [])}
+    # A --matchup-only snapshot has rosters for its own teams only.
+    partial = d.get('FF', {}).get('teams') is not None
+    matchups = [
+        m for m in delta.get('schedule', [])
+        if m.get('matchupPeriodId') == week
+    ]
+    if not matchups:
+        return False
+    for m in matchups:
+        old = schedule.get(m['id'])
+        if old is None:
+            return False
+        for side in ('home', 'away'):
+            if side not in m:
+                continue
+            if old.get(side, {}).get('teamId') != m[side]['teamId']:
+                return False
+            entries = _period_roster(m[side])
+            if not entries:
+                continue
+            team = teams.get(m[side]['teamId'])
+            if team is None:
+                if partial:
+                    continue
+                return False
+            roster = {e['playerId'] for e in team['roster']['entries']}
+            if roster != {e['playerId'] for e in entries}:
+                return False
+
+    for m in matchups:
+        old = schedule[m['id']]
+        old['winner'] = m.get('winner', old['winner'])
+        for side in ('home', 'away'):
+            if side not in m:
+                continue
+            new_side = m[side]
+            old_side = old[side]
+            old_side['totalPoints'] = new_side.get(
+                'totalPoints', old_side.get('totalPoints'),
+            )
+            if 'totalPointsLive' in new_side:
+                old_side['totalPointsLive'] = new_side['totalPointsLive']
+            else:
+                old_side.pop('totalPointsLive', None)
+            entries = _period_roster(new_side)
+            if entries and new_side['teamId'] in teams:
+                _merge_roster(teams[new_side['teamId']], entries)
+    return True
+
+
+def _merge_roster(team: dict, entries: list[dict]) -> None:
+    players = {e['playerId']: e for e in team['roster']['entries']}
+    for entry in entries:
+        player = players[entry['playerId']]
+        if 'lineupSlotId' in entry:
+            player['lineupSlotId'] = entry['lineupSlotId']
+        pool = player['playerPoolEntry']
+        new_pool = entry.get('playerPoolEntry', {})
+        for key in ('appliedStatTotal', 'lineupLocked', 'rosterLocked'):
+            if key in new_pool:
+                pool[key] = new_pool[key]
+        stats = pool['player']['stats']
+        index = {s['id']: i for i, s in enumerate(stats)}
+        for stat in new_pool.get('player', {}).get('stats', []):
+            i = index.get(stat['id'])
+            if i is None:
+                stats.append(stat)
+            else:
+                stats[i] = stat
+
+
+def is_stale(d: dict, now: float | None = None) -> bool:
+    pulled = d.get('FF', {}).get('full_pull')
+    if pulled is None:
+        return True
+    return (now if now is not None else time.time()) - pulled > FULL_MAX_AGE
+
+
+def pull_scores(path: str, args: argparse.Namespace) -> dict | None:
+    """Saved snapshot with fresh live scores merged in, or None when the
+    snapshot is missing or stale and a full pull is needed.
+    """
+    try:
+        d = load_data(path, args)
+    except (FileNotFoundError, ValueError, SystemExit):
+        # Missing, unreadable, or filtered to fewer teams than needed.
+        return None
+    if is_stale(d):
+        return None
+    status_code, delta = connect_FF(
+        args.league_id, args.week, args.dev, args.base_url, SCORE_VIEWS,
+        {'schedule': {'filterMatchupPeriodIds': {'value': [args.week]}}},
+        args.season,
+    )
+    if status_code != 200 or not merge_scores(d, delta, args.week):
+        return None
+    d['FF']['scores_pull'] = time.time()
+    return d
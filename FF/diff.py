@@ -0,0 +1,244 @@
+"""Week-over-week snapshot diff.
+
+Reports each team's roster adds and drops, lineup slot moves, injury
+status changes and projection moves. Entries are compared by digest
+first (see FF.storage.entry_digests), so only the players that changed
+are looked at and two unchanged snapshots are never fully read.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+from typing import NamedTuple
+
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.main import positionID
+from FF.main import pull_and_save
+from FF.main import slotID
+from FF.main import snapshot_path
+from FF.profiling import Profiler
+from FF.storage import entry_digests
+from FF.storage import read_snapshot
+
+# Projections closer than this have not moved.
+PROJ_EPSILON = .05
+
+
+class Change(NamedTuple):
+    TID: int
+    # 'add', 'drop', 'slot', 'status' or 'proj'
+    kind: str
+    name: str
+    before: str | float | None
+    after: str | float | None
+
+
+class Snapshot:
+    """A saved week's entry digests, and the snapshot itself once read."""
+
+    def __init__(self, path: str, year: int, week: int) -> None:
+        self.path = path
+        self.year = year
+        self.week = week
+        try:
+            self.digests = entry_digests(path, year, week)
+        except FileNotFoundError:
+            raise SystemExit(
+                f'{Colors.RED}No saved snapshot for week {week}. Data must '
+                f'be pulled first. [ff --pull]{Colors.ENDC}',
+            )
+        self._d: dict | None = None
+
+    def load(self) -> dict:
+        if self._d is None:
+            self._d = read_snapshot(self.path)
+        return self._d
+
+
+def changed_entries(
+    old: dict[int, dict[int, str]],
+    new: dict[int, dict[int, str]],
+) -> dict[int, set[int]]:
+    """Team ids to the playerIds whose entries differ between the
+    digests `old` and `new`, including adds and drops.
+    """
+    changed = {}
+    for TID in old.keys() | new.keys():
+        before = old.get(TID, {})
+        after = new.get(TID, {})
+        players = {
+            playerId for playerId in before.keys() | after.keys()
+            if before.get(playerId) != after.get(playerId)
+        }
+        if players:
+            changed[TID] = players
+    return changed
+
+
+def projection(entry: dict, year: int, week: int) -> float | None:
+    for stat in entry['playerPoolEntry']['player'].get('stats', []):
+        if (
+            stat['seasonId'] == year and
+            stat['scoringPeriodId'] == week and
+            stat['statSourceId'] == 1 and
+            stat['statSplitTypeId'] == 1
+        ):
+            return round(stat['appliedTotal'], 1)
+    return None
+
+
+def _entries(d: dict, TIDs: set[int]) -> dict[int, dict[int, dict]]:
+    return {
+        team['id']: {
+            e['playerId']: e
+            for e in team.get('roster', {}).get('entries', [])
+        }
+        for team in d.get('teams', []) if team['id'] in TIDs
+    }
+
+
+def diff_entries(
+    old: Snapshot,
+    new: Snapshot,
+    changed: dict[int, set[int]],
+) -> list[Change]:
+    """The changes to each of the `changed` entries, team by team in the
+    new roster's order with drops last.
+    """
+    TIDs = set(changed)
+    before = _entries(old.load(), TIDs)
+    after = _entries(new.load(), TIDs)
+    changes = []
+    for TID in sorted(changed):
+        old_entries = before.get(TID, {})
+        new_entries = after.get(TID, {})
+        players = changed[TID]
+        for playerId, b in new_entries.items():
+            if playerId not in players:
+                continue
+            player = b['playerPoolEntry']['player']
+            name = player['fullName']
+            a = old_entries.get(playerId)
+            if a is None:
+                pos = positionID.get(player['defaultPositionId'], '')
+                changes.append(Change(TID, 'add', name, None, pos))
+                continue
+            if a['lineupSlotId'] != b['lineupSlotId']:
+                changes.append(Change(
+                    TID, 'slot', name,
+                    slotID.get(a['lineupSlotId'], str(a['lineupSlotId'])),
+                    slotID.get(b['lineupSlotId'], str(b['lineupSlotId'])),
+                ))
+            status = (
+                a['playerPoolEntry']['player'].get('injuryStatus', 'ACTIVE'),
+                player.get('injuryStatus', 'ACTIVE'),
+            )
+            if status[0] != status[1]:
+                changes.append(Change(TID, 'status', name, *status))
+            proj = (
+                projection(a, old.year, old.week),
+                projection(b, new.year, new.week),
+            )
+            if proj[0] is None or proj[1] is None:
+                moved = proj[0] != proj[1]
+            else:
+                moved = abs(proj[1] - proj[0]) > PROJ_EPSILON
+            if moved:
+                changes.append(Change(TID, 'proj', name, *proj))
+        for playerId in players - new_entries.keys():
+            a = old_entries[playerId]
+            player = a['playerPoolEntry']['player']
+            pos = positionID.get(player['defaultPositionId'], '')
+            changes.append(
+                Change(TID, 'drop', player['fullName'], pos, None),
+            )
+    return changes
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> list[Change]:
+    changed = changed_entries(old.digests, new.digests)
+    if not changed:
+        return []
+    return diff_entries(old, new, changed)
+
+
+def _format_change(c: Change) -> str:
+    if c.kind == 'add':
+        return f'{Colors.GREEN}+ {c.name:<24}{c.after}{Colors.ENDC}'
+    if c.kind == 'drop':
+        return f'{Colors.RED}- {c.name:<24}{c.before}{Colors.ENDC}'
+    line = '  {:<24}{:<8}{} -> {}'.format(
+        c.name, c.kind, _or_dash(c.before), _or_dash(c.after),
+    )
+    if c.kind == 'proj':
+        if isinstance(c.before, float) and isinstance(c.after, float):
+            move = round(c.after - c.before, 1)
+            color = Colors.GREEN if move > 0 else Colors.RED
+            line += f' ({color}{move:+}{Colors.ENDC})'
+        return line
+    if c.kind == 'status' and c.after != 'ACTIVE':
+        return f'{Colors.YELLOW}{line}{Colors.ENDC}'
+    return line
+
+
+def _or_dash(value: str | float | None) -> str:
+    return '-' if value is None else str(value)
+
+
+def format_diff(
+    changes: list[Change],
+    abbrevs: dict[int, str],
+    title: str,
+) -> str:
+    if not changes:
+        return f'{title}: no roster changes'
+    lines = [title]
+    TID = None
+    for c in changes:
+        if c.TID != TID:
+            TID = c.TID
+            abbrev = abbrevs.get(TID, str(TID))
+            lines.append(f'{Colors.CYAN}{abbrev}{Colors.ENDC}')
+        lines.append(_format_change(c))
+    return '\n'.join(lines)
+
+
+def run_diff(args: argparse.Namespace, profiler: Profiler) -> int:
+    """--diff WEEK [WEEK]: the first week's saved snapshot against the
+    second's, or against -w's. With -p, the second week is pulled first,
+    so --diff on -w itself compares the saved snapshot with a fresh one.
+    """
+    if len(args.diff) > 2:
+        raise SystemExit(
+            f'{Colors.RED}--diff takes one or two weeks{Colors.ENDC}',
+        )
+    old_week = args.diff[0]
+    new_week = args.diff[-1] if len(args.diff) == 2 else args.week
+
+    def path(week: int) -> str:
+        return snapshot_path(DATA_PATH, args.season, week, args.league_id)
+
+    with profiler.phase('diff'):
+        old = Snapshot(path(old_week), args.season, old_week)
+    title = f'Week {old_week} -> week {new_week}'
+    if args.pull:
+        if old_week == new_week:
+            # The pull replaces it.
+            old.load()
+            title = f'Week {new_week}: saved -> pulled'
+        pull_and_save(argparse.Namespace(**{
+            **vars(args), 'week': new_week,
+        }), profiler)
+    with profiler.phase('diff'):
+        new = Snapshot(path(new_week), args.season, new_week)
+        changes = diff_snapshots(old, new)
+    abbrevs = {}
+    if changes:
+        # Teams in either week, by their latest abbreviation.
+        for snapshot in (old, new):
+            for team in snapshot.load()['teams']:
+                abbrevs[team['id']] = team.get('abbrev', str(team['id']))
+    with profiler.phase('render'):
+        output = format_diff(changes, abbrevs, title)
+    print(output)
+    return 0
@@ -0,0 +1,245 @@
+"""Season-long manager efficiency: the lineups each team started against
+the best ones it could have started in hindsight.
+
+Each completed week's lineups come from that week's snapshot and its
+scores from the same snapshot or, when it was saved before the games,
+the next week's. Snapshots are read once each, in parallel, and every
+week's result is cached on the contents of the snapshots it came from.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import concurrent.futures
+import json
+import os
+from typing import NamedTuple
+
+from FF.cache import RenderCache
+from FF.main import Box
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.main import positionID
+from FF.main import snapshot_path
+from FF.storage import read_snapshot
+from FF.trade import lineup_value
+
+BENCH_SLOTS = (20, 21)
+IR_SLOT = 21
+# Bumped when week_result changes, invalidating cached weeks.
+CACHE_VERSION = 1
+
+
+class WeekData(NamedTuple):
+    week: int
+    # Team id to its roster as (playerId, position, started, on IR)
+    teams: dict[int, list[tuple[int, str, bool, bool]]]
+    # playerId to actual score by week, for this week and the one before
+    scores: dict[int, dict[int, float]]
+
+
+class Efficiency(NamedTuple):
+    TID: int
+    actual: float
+    optimal: float
+    weeks: int
+
+    @property
+    def bench(self) -> float:
+        """Points left on the bench."""
+        return self.optimal - self.actual
+
+    @property
+    def percent(self) -> float:
+        return 100 * self.actual / self.optimal if self.optimal else 100.0
+
+
+def completed_weeks(d: dict) -> list[int]:
+    """Matchup periods every game of which is decided."""
+    decided: dict[int, bool] = {}
+    for m in d.get('schedule', []):
+        week = m['matchupPeriodId']
+        done = m.get('winner', 'UNDECIDED') != 'UNDECIDED'
+        decided[week] = decided.get(week, True) and done
+    return sorted(week for week, done in decided.items() if done)
+
+
+def read_week(path: str, year: int, week: int) -> WeekData:
+    """The lineups and the actual scores of `week` (and the week before)
+    from the snapshot at `path`. Runs in a worker process.
+    """
+    d = read_snapshot(path)
+    teams = {}
+    scores: dict[int, dict[int, float]] = {}
+    for team in d.get('teams', []):
+        roster = []
+        for e in team['roster']['entries']:
+            player = e['playerPoolEntry']['player']
+            roster.append((
+                e['playerId'],
+                positionID.get(player['defaultPositionId'], ''),
+                e['lineupSlotId'] not in BENCH_SLOTS,
+                e['lineupSlotId'] == IR_SLOT,
+            ))
+            for stat in player.get('stats', []):
+                if (
+                    stat['scoringPeriodId'] in (week - 1, week) and
+                    stat['statSourceId'] == 0 and
+                    stat['seasonId'] == year and
+                    stat['statSplitTypeId'] == 1
+                ):
+                    scores.setdefault(e['playerId'], {})[
+                        stat['scoringPeriodId']
+                    ] = stat['appliedTotal']
+        teams[team['id']] = roster
+    return WeekData(week, teams, scores)
+
+
+def week_result(
+    data: WeekData,
+    after: WeekData | None,
+) -> dict[int, tuple[float, float]]:
+    """Each team's (actual, optimal) starters' score for `data`'s week,
+    the optimal lineup picked as Roster.decide_lineup would.
+    """
+    week = data.week
+
+    def score(playerId: int) -> float:
+        for source in (data, after):
+            if source is not None:
+                points = source.scores.get(playerId, {}).get(week)
+                if points is not None:
+                    return points
+        return 0.0
+
+    results = {}
+    for TID, roster in data.teams.items():
+        actual = sum(score(p) for p, _, started, _ in roster if started)
+        optimal = lineup_value(
+            (pos, score(p)) for p, pos, _, on_ir in roster if not on_ir
+        )
+        results[TID] = (round(actual, 2), round(max(optimal, actual), 2))
+    return results
+
+
+def read_weeks(
+    paths: dict[int, str],
+    year: int,
+    jobs: int | None = None,
+) -> dict[int, WeekData]:
+    """The snapshots `paths` (week to path) read in parallel, by `jobs`
+    processes (default: one per CPU).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if len(paths) < 2 or jobs < 2:
+        return {w: read_week(p, year, w) for w, p in paths.items()}
+    with concurrent.futures.ProcessPoolExecutor(jobs) as pool:
+        futures = {
+            w: pool.submit(read_week, p, year, w) for w, p in paths.items()
+        }
+        return {w: f.result() for w, f in futures.items()}
+
+
+def season_efficiency(
+    directory: str,
+    year: int,
+    LID: int,
+    weeks: list[int],
+    cache: RenderCache | None = None,
+    jobs: int | None = None,
+) -> tuple[dict[int, dict[int, tuple[float, float]]], list[int]]:
+    """Every team's (actual, optimal) score in each of `weeks` that has
+    a snapshot, by week; and the weeks without one.
+    """
+    def path(week: int) -> str:
+        return snapshot_path(directory, year, week, LID)
+
+    present = [w for w in weeks if os.path.exists(path(w))]
+    missing = [w for w in weeks if w not in present]
+    results: dict[int, dict[int, tuple[float, float]]] = {}
+    keys = {}
+    for week in present:
+        if cache is None:
+            continue
+        view: dict[str, int | str] = {
+            'efficiency': week, 'version': CACHE_VERSION,
+        }
+        if os.path.exists(path(week + 1)):
+            view['after'] = cache.fingerprint(path(week + 1))
+        key = cache.key(path(week), view)
+        cached = cache.get(key) if key else None
+        if cached is not None:
+            results[week] = {
+                int(TID): (actual, optimal)
+                for TID, (actual, optimal) in json.loads(cached).items()
+            }
+        elif key:
+            keys[week] = key
+    todo = [w for w in present if w not in results]
+    needed = set(todo) | {
+        w + 1 for w in todo if os.path.exists(path(w + 1))
+    }
+    data = read_weeks({w: path(w) for w in sorted(needed)}, year, jobs)
+    for week in todo:
+        results[week] = week_result(data[week], data.get(week + 1))
+        if cache is not None and week in keys:
+            cache.put(keys[week], json.dumps(results[week]))
+    return results, missing
+
+
+def totals(
+    results: dict[int, dict[int, tuple[float, float]]],
+) -> list[Efficiency]:
+    """Each team's season, most efficient first."""
+    sums: dict[int, list[float]] = {}
+    for week in results.values():
+        for TID, (actual, optimal) in week.items():
+            s = sums.setdefault(TID, [0.0, 0.0, 0])
+            s[0] += actual
+            s[1] += optimal
+            s[2] += 1
+    teams = [
+        Efficiency(TID, round(a, 1), round(o, 1), int(n))
+        for TID, (a, o, n) in sums.items()
+    ]
+    teams.sort(key=lambda t: (-t.percent, t.TID))
+    return teams
+
+
+def format_efficiency(
+    teams: list[Efficiency],
+    abbrevs: dict[int, str],
+    TID: int,
+) -> str:
+    header = ('{:<7}{:>6}{:>9}{:>9}{:>8}{:>7}').format(
+        'Team', 'Weeks', 'Actual', 'Optimal', 'Bench', 'Eff%',
+    )
+    lines = [header, Box.DOUBLE_LINE*len(header)]
+    for t in teams:
+        color = Colors.CYAN if t.TID == TID else ''
+        end = Colors.ENDC if color else ''
+        row = ('{:<7}{:>6}{:>9}{:>9}{:>8}{:>7}').format(
+            abbrevs.get(t.TID, str(t.TID)), t.weeks, t.actual, t.optimal,
+            round(t.bench, 1), round(t.percent, 1),
+        )
+        lines.append(color + row + end)
+    return '\n'.join(lines)
+
+
+def run_efficiency(d: dict, args: argparse.Namespace) -> int:
+    weeks = completed_weeks(d)
+    if not weeks:
+        print('No completed weeks yet.')
+        return 0
+    results, missing = season_efficiency(
+        DATA_PATH, args.season, args.league_id, weeks,
+        None if args.no_cache else RenderCache(),
+    )
+    if missing:
+        print(
+            f'{Colors.YELLOW}No snapshot for week '
+            f'{", ".join(map(str, missing))}; pull it with -p -w WEEK'
+            f'{Colors.ENDC}',
+        )
+    abbrevs = {t['id']: t.get('abbrev', str(t['id'])) for t in d['teams']}
+    print(format_efficiency(totals(results), abbrevs, args.team_id))
+    return 0
@@ -0,0 +1,149 @@
+"""Importable view of a saved league snapshot.
+
+    from FF.league import League
+    league = League.load(DATA_PATH, 2021, 4, 123456)
+    me, op = league.matchup(4, 2)
+    for team in league.standings():
+        print(team.abbrev, team.wins, team.losses)
+
+Rosters are built on first use and kept, so querying many teams costs
+one decode of the snapshot and one build per team.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import threading
+
+from FF.main import build_standings
+from FF.main import build_team
+from FF.main import build_teams
+from FF.main import Colors
+from FF.main import load_data
+from FF.main import Roster
+from FF.profiling import Profiler
+from FF.ratings import league_ratings
+from FF.ratings import Ratings
+from FF.ratings import read_pro_schedule
+
+
+class League:
+    """A loaded snapshot for one season and week.
+
+    Thread safe; Roster building prints progress, which is skipped
+    unless `quiet` is False. With local `projections` (see
+    FF.projections) the week's lineups are picked by them; with the pro
+    game `schedule`, players carry their opponent's rank (see FF.ratings).
+    """
+
+    def __init__(
+        self,
+        d: dict,
+        year: int,
+        week: int,
+        profiler: Profiler | None = None,
+        quiet: bool = True,
+        projections: dict[int, float] | None = None,
+        schedule: dict | None = None,
+    ) -> None:
+        self.d = d
+        self.year = year
+        self.week = week
+        self.profiler = profiler or Profiler()
+        self.quiet = quiet
+        # Local projections for `week`, to pick lineups by
+        self.projections = projections
+        self.schedule = schedule
+        self._ratings: dict[int, Ratings] = {}
+        self._teams: dict[tuple[int, int], Roster] = {}
+        self._standings: list[Roster] | None = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, path: str, year: int, week: int, LID: int) -> League:
+        args = argparse.Namespace(season=year, week=week, league_id=LID)
+        return cls(
+            load_data(path, args), year, week,
+            schedule=read_pro_schedule(path, year),
+        )
+
+    @property
+    def team_ids(self) -> list[int]:
+        return [team['id'] for team in self.d['teams']]
+
+    def team(self, TID: int, week: int | None = None) -> Roster:
+        """Team `TID` with its record, `week` score and best lineup."""
+        week = self.week if week is None else week
+        with self._lock:
+            team = self._teams.get((TID, week))
+            if team is None:
+                args = argparse.Namespace(season=self.year, week=week)
+                team = build_team(
+                    self.d, TID, args, self.profiler,
+                    self._projections(week), self.ratings(week), self.quiet,
+                )
+                self._teams[(TID, week)] = team
+            return team
+
+    def teams(self, week: int | None = None) -> dict[int, Roster]:
+        """Every team by id, built together in one pass over the snapshot.
+
+        Teams already built by team() are kept as they are.
+        """
+        week = self.week if week is None else week
+        with self._lock:
+            if any((TID, week) not in self._teams for TID in self.team_ids):
+                built = build_teams(
+                    self.d, self.year, week, self.profiler,
+                    self._projections(week), self.ratings(week), self.quiet,
+                )
+                for TID, team in built.items():
+                    self._teams.setdefault((TID, week), team)
+            return {TID: self._teams[(TID, week)] for TID in self.team_ids}
+
+    def ratings(self, week: int | None = None) -> Ratings:
+        """Positional ranks for `week`, computed once."""
+        week = self.week if week is None else week
+        with self._lock:
+            ratings = self._ratings.get(week)
+            if ratings is None:
+                with self.profiler.phase('ratings'):
+                    ratings = self._ratings[week] = league_ratings(
+                        self.d, self.year, week, self.schedule,
+                    )
+            return ratings
+
+    def _projections(self, week: int) -> dict[int, float] | None:
+        return self.projections if week == self.week else None
+
+    def scoreboard(
+        self,
+        week: int | None = None,
+    ) -> list[tuple[Roster, Roster]]:
+        """Each of the week's matchups as (away, home)."""
+        week = self.week if week is None else week
+        teams = self.teams(week)
+        return [
+            (teams[m['away']['teamId']], teams[m['home']['teamId']])
+            for m in self.d['schedule']
+            if m['matchupPeriodId'] == week and 'away' in m and 'home' in m
+        ]
+
+    def matchup(self, week: int, TID: int) -> tuple[Roster, Roster]:
+        """Team `TID` and its opponent in `week`."""
+        myTeam = self.team(TID, week)
+        op_TID = getattr(myTeam, 'op_TID', None)
+        if op_TID is None:
+            raise SystemExit(
+                f'{Colors.RED}Team id: {TID} has no matchup in week {week}'
+                f'{Colors.ENDC}',
+            )
+        return myTeam, self.team(op_TID, week)
+
+    def standings(self) -> list[Roster]:
+        with self._lock:
+            if self._standings is None:
+                with self.profiler.phase('generate_record'):
+                    self._standings = build_standings(
+                        self.d, self.year, self.week,
+                    )
+            return self._standings
@@ -1,14 +1,35 @@
 from __future__ import annotations  # python3.7+
 
 import argparse
+import contextlib
 import json
 import operator
 import os
+import time
 from itertools import zip_longest
+from typing import Callable
 
 import pkg_resources  # type: ignore
 import requests  # type: ignore
 
+from FF.cache import RenderCache
+from FF.profiling import Profiler
+from FF.ratelimit import SingleFlight
+from FF.ratelimit import TokenBucket
+from FF.ratings import league_ratings
+from FF.ratings import pro_schedule_path
+from FF.ratings import pro_schedule_stamp
+from FF.ratings import Ratings
+from FF.ratings import read_pro_schedule
+from FF.storage import atomic_write
+from FF.storage import data_dir
+from FF.storage import gc
+from FF.storage import locked
+from FF.storage import read_snapshot
+from FF.storage import Retention
+from FF.storage import touch
+from FF.storage import write_snapshot
+
 COOKIES_PATH = pkg_resources.resource_filename(
     __name__,
     'data/cookies.json',
@@ -19,10 +40,26 @@ COOKIES_DEV_PATH = pkg_resources.resource_filename(
     'data/cookies-dev.json',
 )
 
-DATA_PATH = pkg_resources.resource_filename(
-    __name__,
-    'data',
+DATA_PATH = data_dir()
+
+BASE_URL = 'https://fantasy.espn.com/apis/v3/games/ffl'
+
+# Shared by every pull: at most PULL_RATE requests/s after a burst of
+# PULL_BURST, and concurrent pulls of the same URL share one request.
+PULL_RATE = 1.0
+PULL_BURST = 5
+LIMITER = TokenBucket(PULL_RATE, PULL_BURST)
+INFLIGHT = SingleFlight()
+
+# Options that need every team in the snapshot.
+LEAGUE_WIDE = (
+    'standings', 'scoreboard', 'simulate', 'trade', 'suggest_trades',
+    'efficiency', 'sos', 'player',
 )
+FULL_VIEWS = ('mStandings', 'mMatchup', 'mMatchupScore', 'mPositionalRatings')
+PRO_SCHEDULE_VIEW = 'proTeamSchedules_wl'
+# A full pull reads the pro game schedule again once it is this old.
+PRO_SCHEDULE_MAX_AGE = 7 * 24 * 60 * 60
 
 slotID = {
     0: 'QB', 2: 'RB', 4: 'WR',
@@ -35,6 +72,14 @@ positionID = {
     4: 'TE', 5: 'K', 16: 'DST',
 }
 
+POSITION_SPOTS = {
+    'QB': 1, 'RB': 2, 'WR': 2,
+    'TE': 1, 'DST': 1, 'K': 1,
+    'FLEX': 1,
+}
+
+FLEX_OK = ['RB', 'WR', 'TE']
+
 TEAM_HEADER = ('\u2502{:<7}{:<9}{:<12}{:<6}\u2502').format(
     'Team', 'Record', 'Rank', 'PO%',
 )
@@ -45,10 +90,10 @@ HEADER = ('{:<6}{:<4}{:<15}{:<6}{:<5}').format(
 )
 
 HEADER_EXT = (
-    '{:<6}{:<4}{:<15}{:<6}{:<7}{:<5}{:>7}{:>7}{:>5}{:>9}{:>8}'
+    '{:<6}{:<4}{:<15}{:<6}{:<7}{:<5}{:>7}{:>7}{:>5}{:>9}{:>8}{:>5}{:>6}'
 ).format(
     'Slot', 'Pos', 'Player', 'Proj', 'Score',
-    'TAR/gm', 'Yds', 'Cmp%', 'TD', 'AVG', 'TOT',
+    'TAR/gm', 'Yds', 'Cmp%', 'TD', 'AVG', 'TOT', 'PRK', 'OPRK',
 )
 
 
@@ -76,9 +121,11 @@ class Colors:
 
 
 class Roster:
-    def __init__(self, TID: int) -> None:
+    def __init__(self, TID: int, quiet: bool = False) -> None:
         self.roster: list[Player] = []
         self.TID = TID
+        # Skip the progress lines while building.
+        self.quiet = quiet
         self.wins = 0
         self.losses = 0
         self.ties = 0
@@ -88,17 +135,12 @@ class Roster:
         self.yet_to_play = 0
 
     def generate_roster(self, d: dict, year: int, week: int) -> None:
-        print('\nAdding players to roster...')
+        self.progress('\nAdding players to roster...')
+        check_snapshot(d, [self.TID], week)
         try:
             for team in d['teams']:
                 if team['id'] == self.TID:
-                    result = team['currentSimulationResults']
-                    self.rank = result['rank']
-                    self.playoffPct = round(result['playoffPct'] * 100, 2)
-                    self.abbrev = team['abbrev']
-                    for p in team['roster']['entries']:
-                        player = Player(p, year, week)
-                        self.roster.append(player)
+                    self.load_team(team, year, week)
             if len(self.roster) == 0:
                 raise SystemExit(
                     f'{Colors.RED}Team id: {self.TID} does not exist'
@@ -110,47 +152,58 @@ class Roster:
                 f'Please try pulling (-p) again.{Colors.ENDC}',
             )
 
+    def load_team(self, team: dict, year: int, week: int) -> None:
+        result = team['currentSimulationResults']
+        self.rank = result['rank']
+        self.playoffPct = round(result['playoffPct'] * 100, 2)
+        self.abbrev = team['abbrev']
+        for p in team['roster']['entries']:
+            player = Player(p, year, week)
+            self.roster.append(player)
+
     def generate_record(self, d: dict) -> None:
         for matchup in d['schedule']:
-            if matchup['winner'] != 'UNDECIDED':
-                if (
-                    (
-                        matchup['away']['teamId'] == self.TID and
-                        matchup['winner'] == 'AWAY'
-                    ) or
-                    (
-                        matchup['home']['teamId'] == self.TID and
-                        matchup['winner'] == 'HOME'
-                    )
-                ):
-                    self.wins += 1
-                elif (
-                    (
-                        matchup['away']['teamId'] == self.TID and
-                        matchup['winner'] == 'HOME'
-                    ) or
-                    (
-                        matchup['home']['teamId'] == self.TID and
-                        matchup['winner'] == 'AWAY'
-                    )
-                ):
-                    self.losses += 1
+            self.add_result(matchup)
+
+    def add_result(self, matchup: dict) -> None:
+        if matchup['winner'] != 'UNDECIDED':
+            if (
+                (
+                    matchup['away']['teamId'] == self.TID and
+                    matchup['winner'] == 'AWAY'
+                ) or
+                (
+                    matchup['home']['teamId'] == self.TID and
+                    matchup['winner'] == 'HOME'
+                )
+            ):
+                self.wins += 1
+            elif (
+                (
+                    matchup['away']['teamId'] == self.TID and
+                    matchup['winner'] == 'HOME'
+                ) or
+                (
+                    matchup['home']['teamId'] == self.TID and
+                    matchup['winner'] == 'AWAY'
+                )
+            ):
+                self.losses += 1
 
     def sort_roster_by_pos(self) -> None:
         self.roster.sort(key=operator.attrgetter('slot_id'))
 
-    def decide_flex(self) -> None:
-        print('Deciding flex position...')
-        flex_ok = ['RB', 'WR', 'TE']
+    def decide_flex(self, key: str = 'proj') -> None:
+        self.progress('Deciding flex position...')
         flex_spot: list = list(
             filter(
-                lambda x: x.pos in flex_ok and not x.shouldStart,
+                lambda x: x.pos in FLEX_OK and not x.shouldStart,
                 self.roster,
             ),
         )
-        flex_spot.sort(key=operator.attrgetter('proj'), reverse=True)
-        max_proj = flex_spot[0].proj
-        tiebreak1 = [p for p in flex_spot if p.proj == max_proj]
+        flex_spot.sort(key=operator.attrgetter(key), reverse=True)
+        max_proj = getattr(flex_spot[0], key)
+        tiebreak1 = [p for p in flex_spot if getattr(p, key) == max_proj]
 
         if len(tiebreak1) >= 2:
             tiebreak1.sort(key=operator.attrgetter('fpts_avg'), reverse=True)
@@ -169,15 +222,12 @@ class Roster:
             flex = flex_spot[0]
         flex.shouldStart = True
 
-    def decide_lineup(self) -> None:
-        print('Deciding best lineup...')
-        position_spots = {
-            'QB': 1, 'RB': 2, 'WR': 2,
-            'TE': 1, 'DST': 1, 'K': 1,
-            'FLEX': 1,
-        }
-
-        for pos, num in position_spots.items():
+    def decide_lineup(self, key: str = 'proj') -> None:
+        """Start the players ranked highest by `key`: ESPN's 'proj', or
+        'local_proj' once set by apply_projections.
+        """
+        self.progress('Deciding best lineup...')
+        for pos, num in POSITION_SPOTS.items():
             position_players: list = list(
                 filter(
                     lambda x: x.pos == pos,
@@ -185,7 +235,7 @@ class Roster:
                 ),
             )
             position_players.sort(
-                key=operator.attrgetter('proj'), reverse=True,
+                key=operator.attrgetter(key), reverse=True,
             )
 
             for i in range(num):
@@ -193,52 +243,69 @@ class Roster:
                     p = position_players[i]
                     p.shouldStart = True
                 except IndexError:
-                    print(f'Skipping {pos}')
+                    self.progress(f'Skipping {pos}')
             if pos == 'FLEX':
-                self.decide_flex()
+                self.decide_flex(key)
+
+    def progress(self, message: str) -> None:
+        if not self.quiet:
+            print(message)
+
+    def apply_ratings(self, ratings: Ratings) -> None:
+        """Set each player's rank at their position and their opponent's
+        rank against it (see FF.ratings).
+        """
+        for p in self.roster:
+            p.pos_rank = ratings.players.get(p.playerId)
+            p.opp_rank = ratings.opponents.get(p.playerId)
+
+    def apply_projections(self, projections: dict[int, float]) -> None:
+        """Set each player's local_proj, falling back on ESPN's."""
+        for p in self.roster:
+            p.local_proj = round(projections.get(p.playerId, p.proj), 1)
 
     def get_matchup_score(self, d: dict, wk: int) -> None:
         for matchup in d['schedule']:
             if matchup['matchupPeriodId'] == wk:
-                if matchup['away']['teamId'] == self.TID:
-                    self.op_TID = matchup['home']['teamId']
-                    self.winner = None
-                    if matchup['winner'] == 'AWAY':
-                        self.winner = True
-                    elif matchup['winner'] == 'HOME':
-                        self.winner = False
-
-                    if 'totalPointsLive' in matchup['away']:
-                        self.total_score = matchup['away']['totalPointsLive']
-                    else:
-                        self.total_score = matchup['away']['totalPoints']
-
-                elif matchup['home']['teamId'] == self.TID:
-                    self.op_TID = matchup['away']['teamId']
-                    self.winner = None
-                    if matchup['winner'] == 'HOME':
-                        self.winner = True
-                    elif matchup['winner'] == 'AWAY':
-                        self.winner = False
-
-                    if 'totalPointsLive' in matchup['away']:
-                        self.total_score = matchup['home']['totalPointsLive']
-                    else:
-                        self.total_score = matchup['home']['totalPoints']
+                self.set_matchup(matchup)
+
+    def set_matchup(self, matchup: dict) -> None:
+        if matchup['away']['teamId'] == self.TID:
+            self.op_TID = matchup['home']['teamId']
+            self.winner = None
+            if matchup['winner'] == 'AWAY':
+                self.winner = True
+            elif matchup['winner'] == 'HOME':
+                self.winner = False
+
+            if 'totalPointsLive' in matchup['away']:
+                self.total_score = matchup['away']['totalPointsLive']
+            else:
+                self.total_score = matchup['away']['totalPoints']
+
+        elif matchup['home']['teamId'] == self.TID:
+            self.op_TID = matchup['away']['teamId']
+            self.winner = None
+            if matchup['winner'] == 'HOME':
+                self.winner = True
+            elif matchup['winner'] == 'AWAY':
+                self.winner = False
+
+            if 'totalPointsLive' in matchup['away']:
+                self.total_score = matchup['home']['totalPointsLive']
+            else:
+                self.total_score = matchup['home']['totalPoints']
 
     def ytp_projected(self) -> None:
         self.total_projected = 0.0
         self.yet_to_play = 0
         for p in self.roster:
             if p.starting:
-                self.total_projected += p.proj
+                self.total_projected += p.local_proj
             if p.starting and not p.rosterLocked:
                 self.yet_to_play += 1
 
-    def print_roster(self) -> None:
-        print(Box.TOP_BOX)
-        print(f'{TEAM_HEADER:<34}')
-        print(Box.MID_BOX)
+    def format_roster(self) -> str:
         team_details = ('\u2502{:<7}{}-{}-{}    {:<12}{:<6}\u2502').format(
             self.abbrev,
             self.wins,
@@ -247,17 +314,26 @@ class Roster:
             self.rank,
             self.playoffPct,
         )
-        print(team_details)
-        print(Box.BTM_BOX)
-        print(HEADER_EXT)
-        print(Box.DOUBLE_LINE*80)
+        lines = [
+            Box.TOP_BOX,
+            f'{TEAM_HEADER:<34}',
+            Box.MID_BOX,
+            team_details,
+            Box.BTM_BOX,
+            HEADER_EXT,
+            Box.DOUBLE_LINE*91,
+        ]
         for p in self.roster:
-            print(p.print_player(ext=True))
+            lines.append(p.print_player(ext=True))
         yet_to_play = f'Yet to Play: {self.yet_to_play}'
         projected1 = f'{round(self.total_projected, 1):>15}'
         total = f'{round(self.total_score, 1):>7}'
-        print(Box.DOUBLE_LINE*80)
-        print(f'{yet_to_play}{projected1}{total}')
+        lines.append(Box.DOUBLE_LINE*91)
+        lines.append(f'{yet_to_play}{projected1}{total}')
+        return '\n'.join(lines)
+
+    def print_roster(self) -> None:
+        print(self.format_roster())
 
 
 class Player(Roster):
@@ -271,9 +347,16 @@ class Player(Roster):
         self.performance = 'NAN'
         self.generate_player_info(p)
         self.generate_player_stats(p)
+        # The projection shown and ranked by: the local projection
+        # model's once applied (--local-proj), else ESPN's.
+        self.local_proj: float = self.proj
+        # Rank at the position and the week's opponent's rank against it
+        self.pos_rank: int | None = None
+        self.opp_rank: int | None = None
         self.performance_check()
 
     def generate_player_info(self, p: dict) -> None:
+        self.playerId = p['playerId']
         self.rosterLocked = p['playerPoolEntry']['rosterLocked']
         self.first = p['playerPoolEntry']['player']['firstName']
         self.last = p['playerPoolEntry']['player']['lastName']
@@ -427,7 +510,7 @@ class Player(Roster):
                    f'{self.last:<8}' \
                    f'{Colors.ENDC}\t' \
                    f'{self.color_shouldStart}' \
-                   f'{self.proj:>5}' \
+                   f'{self.local_proj:>5}' \
                    f'{Colors.ENDC}\t' \
                    f'{self.color_performance}' \
                    f'{self.score:>6}' \
@@ -440,7 +523,9 @@ class Player(Roster):
                    f'{self.completion_percentage:>7}' \
                    f'{self.tds:>5}' \
                    f'{self.fpts_avg:>9}' \
-                   f'{self.fpts_total:>8}'.expandtabs(3)
+                   f'{self.fpts_total:>8}' \
+                   f'{self.pos_rank or "-":>5}' \
+                   f'{self.opp_rank or "-":>6}'.expandtabs(3)
         else:
             return f'{self.color_starting}' \
                    f'{self.slot}:' \
@@ -451,7 +536,7 @@ class Player(Roster):
                    f'{self.last:<8}' \
                    f'{Colors.ENDC}\t' \
                    f'{self.color_shouldStart}' \
-                   f'{self.proj:>5}' \
+                   f'{self.local_proj:>5}' \
                    f'{Colors.ENDC}\t' \
                    f'{self.color_performance}' \
                    f'{self.score:>6}' \
@@ -537,35 +622,74 @@ def print_cookies() -> None:
         raise SystemExit(e)
 
 
+def snapshot_path(path: str, year: int, week: int, LID: int) -> str:
+    return f'{path}/FF_{year}_wk{week}_{LID}.json'
+
+
 def save_data(path: str, d: dict, year: int, week: int, LID: int) -> None:
     try:
-        with open(
-            f'{path}/FF_{year}_wk{week}_{LID}.json',
-            'w',
-        ) as wf:
-            json.dump(d, wf)
+        os.makedirs(path, exist_ok=True)
+        write_snapshot(snapshot_path(path, year, week, LID), d)
         print('Saving data...')
     except OSError as e:
         raise type(e)(f'{Colors.RED}{type(e).__name__}: {e}{Colors.ENDC}')
+    try:
+        gc(path, Retention.from_env())
+    except OSError:
+        pass
 
 
 def load_data(path: str, args: argparse.Namespace) -> dict:
+    snapshot = snapshot_path(path, args.season, args.week, args.league_id)
     try:
-        with open(
-            f'''{path}/FF_{args.season}_wk{args.week}_'''
-            f'''{args.league_id}.json''',
-        ) as rf:
-            d = json.load(rf)
-        return d
+        d = read_snapshot(snapshot)
     except FileNotFoundError as e:
         raise type(e)(
             f'{Colors.RED}{type(e).__name__}: '
             f'{e}. Data must be pulled first. [ff --pull]'
             f'{Colors.ENDC}',
         )
+    # Snapshots are evicted least recently loaded first.
+    touch(snapshot)
+    if any(getattr(args, name, False) for name in LEAGUE_WIDE):
+        check_snapshot(d, None, args.week)
+    elif getattr(args, 'team_id', None) is not None:
+        check_snapshot(d, [args.team_id], args.week)
+    return d
+
+
+def check_snapshot(d: dict, TIDs: list[int] | None, week: int) -> None:
+    """Exit unless the snapshot holds the teams `TIDs` (None for the whole
+    league) and the stats for `week`.
+
+    Snapshots from a --matchup-only pull record the teams and scoring
+    periods they were filtered to under d['FF']; full pulls hold both.
+    """
+    meta = d.get('FF', {})
+    pulled = meta.get('teams')
+    if pulled is not None:
+        if TIDs is None:
+            raise SystemExit(
+                f'{Colors.RED}Saved snapshot only holds teams '
+                f'{", ".join(map(str, pulled))}. Pull the whole league '
+                f'(-p) for this view.{Colors.ENDC}',
+            )
+        missing = sorted(set(TIDs) - set(pulled))
+        if missing:
+            raise SystemExit(
+                f'{Colors.RED}Team id: {", ".join(map(str, missing))} '
+                f'not in the saved snapshot. Please try pulling (-p) '
+                f'again.{Colors.ENDC}',
+            )
+    periods = meta.get('periods')
+    if periods is not None and week not in periods:
+        raise SystemExit(
+            f'{Colors.RED}Week {week} stats not in the saved snapshot. '
+            f'Please try pulling (-p) again.{Colors.ENDC}',
+        )
 
 
-def print_matchup(myTeam: Roster, opTeam: Roster) -> None:
+def format_matchup(myTeam: Roster, opTeam: Roster) -> str:
     if myTeam.winner is True:
         sp = f'  {Colors.BGREEN} {Colors.ENDC}{Colors.BRED} {Colors.ENDC}  '
         t1 = f'{Colors.GREEN}{round(myTeam.total_score, 1):>7}{Colors.ENDC}'
@@ -595,14 +719,15 @@ def print_matchup(myTeam: Roster, opTeam: Roster) -> None:
         opTeam.playoffPct,
     )
 
-    print((Box.TOP_BOX) + sp + (Box.TOP_BOX))
-    print(f'{TEAM_HEADER:<34}' + sp + f'{TEAM_HEADER:<34}')
-    print(Box.MID_BOX + sp + Box.MID_BOX)
-    print(myTeam_details + sp + opTeam_details)
-    print(Box.BTM_BOX + sp + Box.BTM_BOX)
-
-    print(HEADER + sp + HEADER)
-    print(('\u2550'*36) + sp + ('\u2550'*36))
+    lines = [
+        (Box.TOP_BOX) + sp + (Box.TOP_BOX),
+        f'{TEAM_HEADER:<34}' + sp + f'{TEAM_HEADER:<34}',
+        Box.MID_BOX + sp + Box.MID_BOX,
+        myTeam_details + sp + opTeam_details,
+        Box.BTM_BOX + sp + Box.BTM_BOX,
+        HEADER + sp + HEADER,
+        ('\u2550'*36) + sp + ('\u2550'*36),
+    ]
 
     empty = f'{Colors.BLACK}B:{(" "*34)}{Colors.ENDC}'
     for i, (myPlayer, opPlayer) in enumerate(
@@ -612,41 +737,189 @@ def print_matchup(myTeam: Roster, opTeam: Roster) -> None:
         ),
     ):
         if not myPlayer:
-            print(empty + sp + opPlayer.print_player())
+            lines.append(empty + sp + opPlayer.print_player())
         elif not opPlayer:
-            print(myPlayer.print_player() + sp + empty)
+            lines.append(myPlayer.print_player() + sp + empty)
         else:
-            print(myPlayer.print_player() + sp + opPlayer.print_player())
-    print(('\u2550'*36) + sp + ('\u2550'*36))
+            lines.append(
+                myPlayer.print_player() + sp + opPlayer.print_player(),
+            )
+    lines.append(('\u2550'*36) + sp + ('\u2550'*36))
 
     yet_to_play1 = f'Yet to Play: {myTeam.yet_to_play}'
     yet_to_play2 = f'Yet to Play: {opTeam.yet_to_play}'
     projected1 = f'{round(myTeam.total_projected, 1):>15}'
     projected2 = f'{round(opTeam.total_projected, 1):>15}'
-    print(
+    lines.append(
         yet_to_play1 + projected1 + t1 +
         sp +
         yet_to_play2 + projected2 + t2,
     )
+    oprk1, oprk2 = starters_oprk(myTeam), starters_oprk(opTeam)
+    if oprk1 is not None or oprk2 is not None:
+        lines.append(
+            f'{"Starters avg OPRK:":<29}{oprk1 or "-":>7}' +
+            sp +
+            f'{"Starters avg OPRK:":<29}{oprk2 or "-":>7}',
+        )
+    return '\n'.join(lines)
+
 
+def starters_oprk(team: Roster) -> float | None:
+    """Mean rank of the starters' opponents against their positions,
+    higher the easier; None without the pro game schedule.
+    """
+    oprk = [
+        p.opp_rank for p in team.roster
+        if p.starting and p.opp_rank is not None
+    ]
+    return round(sum(oprk) / len(oprk), 1) if oprk else None
 
-def connect_FF(LID: int, wk: int, dev: bool) -> tuple[int, dict]:
+
+def print_matchup(myTeam: Roster, opTeam: Roster) -> None:
+    print(format_matchup(myTeam, opTeam))
+
+
+def build_standings(d: dict, year: int, week: int) -> list[Roster]:
+    teams = []
+    try:
+        for team in d['teams']:
+            roster = Roster(team['id'])
+            roster.load_team(team, year, week)
+            roster.generate_record(d)
+            teams.append(roster)
+    except KeyError as e:
+        raise SystemExit(
+            f'{Colors.RED}{type(e).__name__}: Error parsing data. '
+            f'Please try pulling (-p) again.{Colors.ENDC}',
+        )
+    teams.sort(key=operator.attrgetter('rank'))
+    return teams
+
+
+def format_standings(teams: list[Roster], TID: int) -> str:
+    header = ('{:<6}{:<7}{:<9}{:>7}').format('Rank', 'Team', 'Record', 'PO%')
+    lines = [header, Box.DOUBLE_LINE*len(header)]
+    for t in teams:
+        color = Colors.CYAN if t.TID == TID else ''
+        end = Colors.ENDC if color else ''
+        record = f'{t.wins}-{t.losses}-{t.ties}'
+        row = ('{:<6}{:<7}{:<9}{:>7}').format(
+            t.rank, t.abbrev, record, t.playoffPct,
+        )
+        lines.append(color + row + end)
+    return '\n'.join(lines)
+
+
+def format_scoreboard(
+    matchups: list[tuple[Roster, Roster]],
+    TID: int,
+    extended: bool = False,
+) -> str:
+    """Every (away, home) matchup of the week: one line each, or with
+    `extended` each side's lineup as -m shows it.
+    """
+    if extended:
+        return '\n\n'.join(
+            format_matchup(away, home) for away, home in matchups
+        )
+    side = '{:<7}{:<9}{:>4}{:>8}{:>8}'
+    header = (
+        side.format('Away', 'Record', 'YTP', 'Proj', 'Score') + '   ' +
+        side.format('Home', 'Record', 'YTP', 'Proj', 'Score')
+    )
+    lines = [header, Box.DOUBLE_LINE*len(header)]
+    for away, home in matchups:
+        cells = []
+        for team, op in ((away, home), (home, away)):
+            color = Colors.CYAN if team.TID == TID else ''
+            end = Colors.ENDC if color else ''
+            score = f'{round(team.total_score, 1):>8}'
+            if team.winner is True:
+                score = f'{Colors.GREEN}{score}{Colors.ENDC}'
+            elif op.winner is True:
+                score = f'{Colors.RED}{score}{Colors.ENDC}'
+            cells.append(
+                color + '{:<7}{:<9}{:>4}{:>8}'.format(
+                    team.abbrev, f'{team.wins}-{team.losses}-{team.ties}',
+                    team.yet_to_play, round(team.total_projected, 1),
+                ) + end + score,
+            )
+        lines.append('   '.join(cells))
+    return '\n'.join(lines)
+
+
+def print_standings(teams: list[Roster], TID: int) -> None:
+    print(format_standings(teams, TID))
+
+
+def base_url(url: str | None = None) -> str:
+    return (url or os.environ.get('FF_BASE_URL') or BASE_URL).rstrip('/')
+
+
+def league_filter(TIDs: list[int], year: int) -> dict:
+    """x-fantasy-filter narrowing a pull to the teams `TIDs`, with player
+    stats cut down to the season `year` totals and the score and
+    projection of the week pulled (the request's scoringPeriodId).
+    """
+    return {
+        'teams': {'filterIds': {'value': sorted(TIDs)}},
+        'players': {
+            'filterStatsForTopScoringPeriodIds': {
+                'value': 1,
+                'additionalValue': [f'00{year}'],
+            },
+        },
+    }
+
+
+def connect_FF(
+    LID: int,
+    wk: int,
+    dev: bool,
+    url_base: str | None = None,
+    views: tuple[str, ...] = FULL_VIEWS,
+    fantasy_filter: dict | None = None,
+    year: int | None = None,
+) -> tuple[int, dict]:
+    """The league for `year` (by default the cookies' season) as (status
+    code, league).
+    """
     c = load_cookies(dev)
-    year = c['season']  # type: ignore
+    year = year or c['season']  # type: ignore
     swid = c['SWID']  # type: ignore
     espn_s2 = c['espn_s2']  # type: ignore
 
     url = (
-        f'https://fantasy.espn.com/apis/v3/games/ffl/seasons/{year}/'
-        f'segments/0/leagues/{LID}?view=mStandings&view=mMatchup'
-        '&view=mMatchupScore&view=mPositionalRatings'
+        f'{base_url(url_base)}/seasons/{year}/'
+        f'segments/0/leagues/{LID}?'
+        + '&'.join(f'view={view}' for view in views)
     )
+    headers = {}
+    if fantasy_filter is not None:
+        headers['x-fantasy-filter'] = json.dumps(
+            fantasy_filter, sort_keys=True,
+        )
+    return INFLIGHT.do(
+        (url, wk, swid, headers.get('x-fantasy-filter')),
+        lambda: get_league(url, wk, swid, espn_s2, headers),
+    )
+
 
+def get_league(
+    url: str,
+    wk: int,
+    swid: str,
+    espn_s2: str,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, dict]:
+    LIMITER.acquire()
     try:
         print('Connecting to API...')
         r = requests.get(
             url, params={'scoringPeriodId': str(wk)},
             cookies={'SWID': swid, 'espn_s2': espn_s2},
+            headers=headers,
             timeout=5,
         )
         code_color = Colors.GREEN if r.status_code == 200 else Colors.RED
@@ -657,8 +930,61 @@ def connect_FF(LID: int, wk: int, dev: bool) -> tuple[int, dict]:
         raise SystemExit(f'{Colors.RED}{type(e).__name__}: {e}{Colors.ENDC}')
 
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description='FF CLI')
+def pull_pro_schedule(
+    year: int,
+    dev: bool,
+    url_base: str | None = None,
+    path: str | None = None,
+) -> tuple[int, dict]:
+    """The pro teams' game schedule, also saved under `path` (for the
+    opponent ranks of FF.ratings) when given.
+    """
+    c = load_cookies(dev)
+    swid = c['SWID']  # type: ignore
+    espn_s2 = c['espn_s2']  # type: ignore
+    LIMITER.acquire()
+    try:
+        r = requests.get(
+            f'{base_url(url_base)}/seasons/{year}',
+            params={'view': PRO_SCHEDULE_VIEW},
+            cookies={'SWID': swid, 'espn_s2': espn_s2},
+            timeout=5,
+        )
+        d = r.json()
+    except (requests.exceptions.RequestException, ValueError):
+        return 0, {}
+    if r.status_code == 200 and path is not None:
+        with contextlib.suppress(OSError):
+            os.makedirs(path, exist_ok=True)
+            with atomic_write(pro_schedule_path(path, year)) as wf:
+                json.dump(d, wf)
+    return r.status_code, d
+
+
+def refresh_pro_schedule(args: argparse.Namespace, path: str) -> None:
+    """Pull the season's pro game schedule into `path` unless the saved
+    one is under PRO_SCHEDULE_MAX_AGE old. A failure only leaves the
+    opponent ranks out.
+    """
+    stamp = pro_schedule_stamp(path, args.season)
+    if stamp is not None and time.time() - stamp / 1e9 < PRO_SCHEDULE_MAX_AGE:
+        return
+    pull_pro_schedule(args.season, args.dev, args.base_url, path)
+
+
+def pull_stats() -> dict[str, float]:
+    return {
+        'requests_issued': INFLIGHT.issued,
+        'requests_coalesced': INFLIGHT.coalesced,
+        'requests_throttled': LIMITER.throttled,
+        'throttle_wait_s': round(LIMITER.waited, 3),
+    }
+
+
+def build_parser(
+    parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser,
+) -> argparse.ArgumentParser:
+    parser = parser_class(description='FF CLI')
     parser.add_argument(
         '-p', '--pull',
         help='Update data (pull from API)',
@@ -704,12 +1030,159 @@ def parse_args() -> argparse.Namespace:
         help='Show your matchup',
         action='store_true',
     )
+    parser.add_argument(
+        '--standings',
+        help='Show the league standings',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--player',
+        help='Find players by name, with their team, slot and points',
+        metavar='NAME',
+    )
+    parser.add_argument(
+        '--sos',
+        help="Show every team's points against, all-play record and past "
+        'and remaining strength of schedule',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--plan',
+        help="Plan the rest of the season around your team's byes: "
+        'unfillable slots and projected points lost each week',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--efficiency',
+        help="Compare every team's started lineups with the best in "
+        'hindsight over the completed weeks',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--diff',
+        help='Show roster, slot, injury and projection changes from WEEK '
+        'to the second WEEK (default: -w; with -p, a fresh pull of -w)',
+        nargs='+',
+        type=int,
+        metavar='WEEK',
+    )
+    parser.add_argument(
+        '--scoring',
+        help="Rescore your team's season under RULES, a JSON file of stat "
+        'ids to points changed from the league\'s scoring',
+        metavar='RULES',
+    )
+    parser.add_argument(
+        '--scoreboard',
+        help="Show every matchup of the week, one line each or (extended) "
+        'with both lineups',
+        nargs='?',
+        const='compact',
+        choices=('compact', 'extended'),
+    )
     parser.add_argument(
         '-d', '--dev',
         help='Use dev cookies',
         action='store_true',
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        '--simulate',
+        help='Simulate the rest of the season (default 100000 times)',
+        nargs='?',
+        const=100000,
+        type=int,
+    )
+    parser.add_argument(
+        '--playoff-teams',
+        help='Number of playoff teams for --simulate',
+        type=int,
+    )
+    parser.add_argument(
+        '--trade',
+        help='Evaluate a trade with this team ID (see --give/--get)',
+        type=int,
+    )
+    parser.add_argument(
+        '--give',
+        help='Player to give in --trade (repeatable)',
+        action='append',
+    )
+    parser.add_argument(
+        '--get',
+        help='Player to get in --trade (repeatable)',
+        action='append',
+    )
+    parser.add_argument(
+        '--local-proj',
+        help='Pick lineups by the local projection model: ESPN\'s '
+        'projection blended with recent form',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--suggest-trades',
+        help='Search 1-for-1 and 2-for-2 trades across the league',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--trade-key',
+        help='Player value used for trades (default: proj)',
+        choices=['proj', 'fpts_avg'],
+        default='proj',
+    )
+    parser.add_argument(
+        '--profile',
+        help='Time each phase of the run',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--profile-memory',
+        help='Also trace peak memory per phase (implies --profile)',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--profile-cprofile',
+        help='Dump cProfile stats to this file (implies --profile)',
+        metavar='PATH',
+    )
+    parser.add_argument(
+        '--profile-json',
+        help="Write the phase breakdown as JSON to this file ('-' for stdout)",
+        metavar='PATH',
+    )
+    parser.add_argument(
+        '--base-url',
+        help='API base URL, e.g. a local FF.stub server (env: FF_BASE_URL)',
+    )
+    parser.add_argument(
+        '--scores',
+        help='With -p, only pull live scores into the saved snapshot',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--matchup-only',
+        help="With -p, only pull your team and this week's opponent",
+        action='store_true',
+    )
+    parser.add_argument(
+        '--no-cache',
+        help='Always rebuild the output instead of reusing a cached render',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--gc',
+        help='Remove snapshots past the retention policy and exit',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--rate-limit',
+        help=f'Max API requests per second (default: {PULL_RATE}, 0: off)',
+        type=float,
+    )
+    return parser
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    args = build_parser().parse_args(argv)
     return args
 
 
@@ -718,11 +1191,33 @@ def main() -> int:
     if args.cookies:
         print_cookies()
         raise SystemExit()
+    if args.gc:
+        stats = gc(DATA_PATH, Retention.from_env())
+        print(
+            f'Removed {stats["removed"]} snapshots '
+            f'({stats["removed_bytes"] / 1024:.0f} KiB), kept '
+            f'{stats["kept"]} ({stats["kept_bytes"] / 1024:.0f} KiB) '
+            f'in {DATA_PATH}',
+        )
+        return 0
+    profiler = Profiler(
+        enabled=args.profile or bool(args.profile_json),
+        memory=args.profile_memory,
+        cprofile=args.profile_cprofile,
+    )
+    with profiler:
+        ret = run(args, profiler)
+    profiler.report(args.profile_json)
+    return ret
+
+
+def resolve_args(args: argparse.Namespace, persist: bool = True) -> None:
+    """Save any cookie args given (unless not `persist`) and fill the rest
+    in from the cookies.
+    """
     check_cookies_exists(COOKIES_PATH)
-    if args.dev:
-        update_cookies(COOKIES_DEV_PATH, args)
-    else:
-        update_cookies(COOKIES_PATH, args)
+    if persist:
+        update_cookies(COOKIES_DEV_PATH if args.dev else COOKIES_PATH, args)
     if not args.season:
         args.season = int(load_cookies(args.dev, key='season'))  # type: ignore
     if not args.week:
@@ -733,37 +1228,339 @@ def main() -> int:
         )  # type: ignore
     if not args.team_id:
         args.team_id = load_cookies(args.dev, key='team_id')  # type: ignore
+
+
+def render_view(args: argparse.Namespace) -> dict:
+    """Every option the rendered output depends on besides the snapshot."""
+    return {
+        'season': args.season,
+        'week': args.week,
+        'league_id': args.league_id,
+        'team_id': args.team_id,
+        'matchup': args.matchup,
+        'standings': args.standings,
+        'sos': args.sos,
+        'scoreboard': args.scoreboard,
+        'pro_schedule': pro_schedule_stamp(DATA_PATH, args.season),
+    }
+
+
+def run(args: argparse.Namespace, profiler: Profiler) -> int:
+    with profiler.phase('config'):
+        resolve_args(args)
+    if args.diff:
+        from FF.diff import run_diff
+        return run_diff(args, profiler)
+    if args.player and not args.pull:
+        from FF.search import run_search
+        with profiler.phase('search'):
+            return run_search(args)
+    cache = key = None
+    if not (
+        args.pull or args.no_cache or args.simulate or
+        args.trade or args.suggest_trades or args.plan or args.scoring or
+        args.local_proj or args.efficiency
+    ):
+        snapshot = snapshot_path(
+            DATA_PATH, args.season, args.week, args.league_id,
+        )
+        with profiler.phase('render_cache'):
+            cache = RenderCache()
+            key = cache.key(snapshot, render_view(args))
+            output = cache.get(key) if key else None
+        if output is not None:
+            # Used as much as a load: gc evicts the least recently used.
+            touch(snapshot)
+            print(output)
+            return 0
     if not args.pull:
-        d = load_data(DATA_PATH, args)
+        with profiler.phase('load_data'):
+            d = load_data(DATA_PATH, args)
     else:
-        status_code, d = connect_FF(
-            args.league_id, args.week, args.dev,
-        )  # pragma: no cover
-        save_data(  # pragma: no cover
-            DATA_PATH, d, args.season, args.week, args.league_id,
-        )
-
-    myTeam = Roster(args.team_id)
-    myTeam.generate_roster(d, args.season, args.week)
-    myTeam.generate_record(d)
-    myTeam.get_matchup_score(d, args.week)
-    myTeam.ytp_projected()
-    myTeam.decide_lineup()
-    myTeam.sort_roster_by_pos()
-    if args.matchup:
-        opTeam = Roster(myTeam.op_TID)
-        opTeam.generate_roster(d, args.season, args.week)
-        opTeam.generate_record(d)
-        opTeam.get_matchup_score(d, args.week)
-        opTeam.ytp_projected()
-        opTeam.decide_lineup()
-        opTeam.sort_roster_by_pos()
-        print_matchup(myTeam, opTeam)
+        if args.rate_limit is not None:
+            LIMITER.rate = args.rate_limit
+        d = pull_and_save(args, profiler)
+        profiler.counters.update(pull_stats())
+
+    if args.player:
+        from FF.search import run_search
+        with profiler.phase('search'):
+            return run_search(args, d)
+    if args.simulate:
+        from FF.simulate import run_simulation
+        with profiler.phase('simulate'):
+            return run_simulation(d, args)
+    if args.plan:
+        from FF.planner import run_plan
+        with profiler.phase('plan'):
+            return run_plan(d, args, DATA_PATH)
+    if args.efficiency:
+        from FF.efficiency import run_efficiency
+        with profiler.phase('efficiency'):
+            return run_efficiency(d, args)
+    if args.scoring:
+        from FF.scoring import run_scoring
+        with profiler.phase('scoring'):
+            return run_scoring(d, args, DATA_PATH)
+    if args.trade or args.suggest_trades:
+        from FF.trade import run_trade
+        with profiler.phase('trade'):
+            return run_trade(d, args)
+    projections = None
+    if args.local_proj:
+        from FF.projections import local_projections
+        with profiler.phase('projections'):
+            projections = local_projections(d, args)
+    from FF.league import League
+    # Progress lines from building every roster would bury a scoreboard.
+    league = League(
+        d, args.season, args.week, profiler, quiet=bool(args.scoreboard),
+        projections=projections,
+        schedule=read_pro_schedule(DATA_PATH, args.season),
+    )
+    if args.scoreboard:
+        matchups = league.scoreboard()
+        with profiler.phase('render'):
+            output = format_scoreboard(
+                matchups, args.team_id, args.scoreboard == 'extended',
+            )
+    elif args.sos:
+        from FF.sos import league_sos
+        with profiler.phase('render'):
+            output = league_sos(d, args.team_id)
+    elif args.standings:
+        teams = league.standings()
+        with profiler.phase('render'):
+            output = format_standings(teams, args.team_id)
+    elif args.matchup:
+        myTeam, opTeam = league.matchup(args.week, args.team_id)
+        with profiler.phase('render'):
+            output = format_matchup(myTeam, opTeam)
     else:
-        myTeam.print_roster()
+        myTeam = league.team(args.team_id)
+        with profiler.phase('render'):
+            output = myTeam.format_roster()
+    print(output)
+    if cache is not None and key is not None:
+        cache.put(key, output)
 
     return 0
 
 
+def pull_and_save(
+    args: argparse.Namespace,
+    profiler: Profiler,
+    data_path: str | None = None,
+) -> dict:
+    """Pull and save the league in `data_path` (default DATA_PATH) while
+    holding its snapshot's lock, so concurrent FF processes pulling the
+    same league take turns.
+
+    A process that had to wait reuses the snapshot the lock holder just
+    saved instead of pulling it again.
+    """
+    data_path = data_path or DATA_PATH
+    path = snapshot_path(data_path, args.season, args.week, args.league_id)
+    requested = time.time()
+    with locked(f'{path}.lock') as waited:
+        try:
+            fresh = waited and os.stat(path).st_mtime >= requested
+        except OSError:
+            fresh = False
+        if fresh:
+            try:
+                with profiler.phase('load_data'):
+                    return load_data(data_path, args)
+            except (ValueError, SystemExit):
+                pass
+        with profiler.phase('connect_FF'):
+            d = pull(args, data_path)
+        with profiler.phase('save_data'):
+            save_data(
+                data_path, d, args.season, args.week, args.league_id,
+            )
+    if d.get('FF', {}).get('full_pull', 0) >= requested:
+        with profiler.phase('pro_schedule'):
+            refresh_pro_schedule(args, data_path)
+    return d
+
+
+def save_merged(
+    data_path: str,
+    args: argparse.Namespace,
+    d: dict,
+    merge: Callable[[dict], None],
+) -> None:
+    """Apply `merge` to `d` and to the league's saved snapshot, and save
+    that while holding its lock. The snapshot is read again under the
+    lock, so a pull saved in the meantime is kept, not overwritten.
+    """
+    merge(d)
+    path = snapshot_path(data_path, args.season, args.week, args.league_id)
+    with locked(f'{path}.lock'):
+        try:
+            saved = read_snapshot(path)
+        except (OSError, ValueError):
+            saved = d
+        else:
+            merge(saved)
+        save_data(data_path, saved, args.season, args.week, args.league_id)
+
+
+def pull(args: argparse.Namespace, data_path: str | None = None) -> dict:
+    """Pull the league, merging just the live scores into the snapshot
+    saved in `data_path` (default DATA_PATH) with --scores unless that
+    snapshot is stale.
+    """
+    data_path = data_path or DATA_PATH
+    if args.scores:
+        from FF.delta import pull_scores
+        d = pull_scores(data_path, args)
+        if d is not None:
+            return d
+        print('Saved snapshot is stale, pulling everything...')
+    fantasy_filter: dict | None = None
+    TIDs: list[int] | None = None
+    if args.matchup_only:
+        TIDs = matchup_teams(args, data_path)
+        fantasy_filter = league_filter(TIDs, args.season)
+    status_code, d = connect_FF(
+        args.league_id, args.week, args.dev, args.base_url,
+        fantasy_filter=fantasy_filter, year=args.season,
+    )
+    if status_code != 200:
+        # Never saved: the last good snapshot stays.
+        raise SystemExit(
+            f'{Colors.RED}Could not pull the league '
+            f'(status {status_code}){Colors.ENDC}',
+        )
+    meta = d.setdefault('FF', {})
+    meta['full_pull'] = time.time()
+    if TIDs is not None:
+        meta['teams'] = TIDs
+        meta['periods'] = [args.week]
+    return d
+
+
+def matchup_teams(args: argparse.Namespace, data_path: str) -> list[int]:
+    """Your team and this week's opponent, read from the schedule of the
+    snapshot saved in `data_path` or else from a schedule-only pull of
+    the week.
+    """
+    try:
+        schedule = read_snapshot(
+            snapshot_path(data_path, args.season, args.week, args.league_id),
+        ).get('schedule')
+    except (OSError, ValueError):
+        schedule = None
+    if not schedule:
+        _, d = connect_FF(
+            args.league_id, args.week, args.dev, args.base_url,
+            ('mMatchupScore',),
+            {'schedule': {'filterMatchupPeriodIds': {'value': [args.week]}}},
+            args.season,
+        )
+        schedule = d.get('schedule', [])
+    TIDs = [args.team_id]
+    for matchup in schedule:
+        if matchup.get('matchupPeriodId') != args.week:
+            continue
+        sides = [
+            matchup[side]['teamId'] for side in ('home', 'away')
+            if side in matchup
+        ]
+        if args.team_id in sides:
+            TIDs.extend(TID for TID in sides if TID != args.team_id)
+            break
+    return sorted(TIDs)
+
+
+def build_team(
+    d: dict,
+    TID: int,
+    args: argparse.Namespace,
+    profiler: Profiler,
+    projections: dict[int, float] | None = None,
+    ratings: Ratings | None = None,
+    quiet: bool = False,
+) -> Roster:
+    """Team `TID` with its record, matchup score and best lineup, picked
+    by the local `projections` when given (see FF.projections), and its
+    players' positional `ratings` (by default the snapshot's own, without
+    opponent ranks). `quiet` skips the progress lines.
+    """
+    team = Roster(TID, quiet)
+    with profiler.phase('generate_roster'):
+        team.generate_roster(d, args.season, args.week)
+    with profiler.phase('generate_record'):
+        team.generate_record(d)
+        team.get_matchup_score(d, args.week)
+    with profiler.phase('decide_lineup'):
+        if projections is not None:
+            team.apply_projections(projections)
+        team.ytp_projected()
+        if projections is not None:
+            team.decide_lineup('local_proj')
+        else:
+            team.decide_lineup()
+        team.sort_roster_by_pos()
+    if ratings is None:
+        with profiler.phase('ratings'):
+            ratings = league_ratings(d, args.season, args.week)
+    team.apply_ratings(ratings)
+    return team
+
+
+def build_teams(
+    d: dict,
+    year: int,
+    week: int,
+    profiler: Profiler,
+    projections: dict[int, float] | None = None,
+    ratings: Ratings | None = None,
+    quiet: bool = False,
+) -> dict[int, Roster]:
+    """Every team's Roster as build_team makes it, in one pass over the
+    teams and one over the schedule instead of a scan of each per team.
+    """
+    check_snapshot(d, None, week)
+    teams = {}
+    try:
+        with profiler.phase('generate_roster'):
+            for team in d['teams']:
+                roster = teams[team['id']] = Roster(team['id'], quiet)
+                roster.load_team(team, year, week)
+        with profiler.phase('generate_record'):
+            for matchup in d['schedule']:
+                for side in ('away', 'home'):
+                    TID = matchup[side]['teamId']
+                    if TID not in teams:
+                        continue
+                    teams[TID].add_result(matchup)
+                    if matchup['matchupPeriodId'] == week:
+                        teams[TID].set_matchup(matchup)
+    except KeyError as e:
+        raise SystemExit(
+            f'{Colors.RED}{type(e).__name__}: Error parsing data. '
+            f'Please try pulling (-p) again.{Colors.ENDC}',
+        )
+    with profiler.phase('decide_lineup'):
+        for roster in teams.values():
+            if projections is not None:
+                roster.apply_projections(projections)
+            roster.ytp_projected()
+            if projections is not None:
+                roster.decide_lineup('local_proj')
+            else:
+                roster.decide_lineup()
+            roster.sort_roster_by_pos()
+    if ratings is None:
+        with profiler.phase('ratings'):
+            ratings = league_ratings(d, year, week)
+    for roster in teams.values():
+        roster.apply_ratings(ratings)
+    return teams
+
+
 if __name__ == '__main__':  # pragma: no cover
     raise SystemExit(main())
@@ -0,0 +1,266 @@
+"""Rest-of-season bye and availability planner.
+
+Pulls every remaining week's projections once, then works out for each
+week which lineup slots the team cannot fill and what that costs.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+from FF.main import connect_FF
+from FF.main import DATA_PATH
+from FF.main import FLEX_OK
+from FF.main import POSITION_SPOTS
+from FF.main import positionID
+from FF.main import save_merged
+
+# Weekly (split 1) projections (source 1) for the whole season.
+PROJECTIONS_FILTER = {
+    'players': {
+        'filterStatsForSourceIds': {'value': [1]},
+        'filterStatsForSplitTypeIds': {'value': [1]},
+    },
+}
+
+
+class WeekPlan(NamedTuple):
+    week: int
+    # Full strength starters who are out that week.
+    out: list[str]
+    # Lineup slots no available player can fill.
+    unfilled: list[str]
+    loss: float
+
+
+class Projections(NamedTuple):
+    """Players × weeks projection matrix for one team."""
+    weeks: list[int]
+    names: list[str]
+    positions: list[str]
+    # rows[i][j]: player i's projection for weeks[j], None if missing
+    rows: list[list[float | None]]
+
+
+def plan_weeks(d: dict, week: int) -> list[int]:
+    """The regular season's weeks after `week`."""
+    try:
+        last = d['settings']['scheduleSettings']['matchupPeriodCount']
+    except KeyError:
+        last = max(
+            (m['matchupPeriodId'] for m in d.get('schedule', [])),
+            default=week,
+        )
+    return list(range(week + 1, last + 1))
+
+
+def projections(team: dict, year: int, weeks: list[int]) -> Projections:
+    """One pass over the team's stats into a players × weeks matrix."""
+    column = {w: j for j, w in enumerate(weeks)}
+    names = []
+    positions = []
+    rows = []
+    for e in team['roster']['entries']:
+        player = e['playerPoolEntry']['player']
+        row: list[float | None] = [None] * len(weeks)
+        for stat in player['stats']:
+            j = column.get(stat['scoringPeriodId'])
+            if (
+                j is not None and
+                stat['seasonId'] == year and
+                stat['statSourceId'] == 1 and
+                stat['statSplitTypeId'] == 1
+            ):
+                row[j] = stat['appliedTotal']
+        names.append(player['fullName'])
+        positions.append(positionID.get(player['defaultPositionId'], ''))
+        rows.append(row)
+    return Projections(weeks, names, positions, rows)
+
+
+def has_projections(d: dict, year: int, weeks: list[int], TID: int) -> bool:
+    """Whether team `TID`'s players have projections for `weeks`."""
+    pulled = d.get('FF', {}).get('projections')
+    # Projections are pulled one team at a time.
+    if isinstance(pulled, dict) and TID in pulled['teams']:
+        return set(weeks) <= set(pulled['weeks'])
+    # A snapshot from elsewhere may carry them already.
+    wanted = set(weeks)
+    for team in d.get('teams', []):
+        if team['id'] != TID:
+            continue
+        for e in team['roster']['entries']:
+            for stat in e['playerPoolEntry']['player']['stats']:
+                if (
+                    stat['seasonId'] == year and
+                    stat['statSourceId'] == 1 and
+                    stat['statSplitTypeId'] == 1
+                ):
+                    wanted.discard(stat['scoringPeriodId'])
+            if not wanted:
+                return True
+    return not wanted
+
+
+def merge_projections(d: dict, delta: dict) -> None:
+    """Add the players' stats from `delta` to the snapshot `d`,
+    replacing any with the same id.
+    """
+    players = {
+        e['playerId']: e['playerPoolEntry']['player']
+        for team in d['teams'] for e in team['roster']['entries']
+    }
+    for team in delta.get('teams', []):
+        for e in team.get('roster', {}).get('entries', []):
+            player = players.get(e['playerId'])
+            if player is None:
+                continue
+            stats = player['stats']
+            index = {s['id']: i for i, s in enumerate(stats)}
+            for stat in e['playerPoolEntry']['player']['stats']:
+                i = index.get(stat['id'])
+                if i is None:
+                    stats.append(stat)
+                else:
+                    stats[i] = stat
+
+
+def pull_projections(
+    d: dict,
+    args: argparse.Namespace,
+    weeks: list[int],
+    data_path: str,
+) -> None:
+    """Pull the rest of the season's projections into `d` and the saved
+    snapshot in `data_path`.
+    """
+    status_code, delta = connect_FF(
+        args.league_id, args.week, args.dev, args.base_url, ('mRoster',),
+        {
+            **PROJECTIONS_FILTER,
+            'teams': {'filterIds': {'value': [args.team_id]}},
+        },
+        args.season,
+    )
+    if status_code != 200:
+        raise SystemExit(
+            f'{Colors.RED}Could not pull projections '
+            f'(status {status_code}){Colors.ENDC}',
+        )
+
+    def merge(d: dict) -> None:
+        merge_projections(d, delta)
+        meta = d.setdefault('FF', {})
+        pulled = meta.get('projections')
+        teams = [args.team_id]
+        if isinstance(pulled, dict) and pulled['weeks'] == weeks:
+            teams = sorted(set(pulled['teams']) | {args.team_id})
+        meta['projections'] = {'weeks': weeks, 'teams': teams}
+
+    save_merged(data_path, args, d, merge)
+
+
+def plan(proj: Projections) -> list[WeekPlan]:
+    """Each week's lineup holes, in one pass over the matrix.
+
+    Every player is valued at their typical (mean non-zero) projection so
+    the loss reflects who is unavailable, not week-to-week projection
+    swings; a zero or missing projection means unavailable (bye or out).
+    """
+    n_weeks = len(proj.weeks)
+    typical = []
+    for row in proj.rows:
+        values = [v for v in row if v]
+        typical.append(sum(values) / len(values) if values else 0.0)
+    order = sorted(
+        range(len(proj.rows)), key=lambda i: typical[i], reverse=True,
+    )
+
+    # Lineup filled per week, best players first: starters taken per
+    # position, and the best leftover RB/WR/TE for the flex.
+    filled = {pos: [0] * n_weeks for pos in POSITION_SPOTS if pos != 'FLEX'}
+    flex = [0.0] * n_weeks
+    flex_found = [False] * n_weeks
+    points = [0.0] * n_weeks
+    starting: list[list[int]] = [[] for _ in range(n_weeks)]
+    full: list[int] = []
+    full_count = {pos: 0 for pos in filled}
+    full_flex: int | None = None
+    for i in order:
+        pos = proj.positions[i]
+        if pos not in filled:
+            continue
+        spots = POSITION_SPOTS[pos]
+        if full_count[pos] < spots:
+            full_count[pos] += 1
+            full.append(i)
+        elif pos in FLEX_OK and full_flex is None:
+            full_flex = i
+        counts = filled[pos]
+        for j, value in enumerate(proj.rows[i]):
+            if not value:
+                continue
+            if counts[j] < spots:
+                counts[j] += 1
+                points[j] += typical[i]
+                starting[j].append(i)
+            elif pos in FLEX_OK and not flex_found[j]:
+                flex_found[j] = True
+                flex[j] = typical[i]
+    if full_flex is not None:
+        full.append(full_flex)
+    best = sum(typical[i] for i in full)
+
+    plans = []
+    for j, week in enumerate(proj.weeks):
+        unfilled = [
+            pos for pos, counts in filled.items()
+            for _ in range(POSITION_SPOTS[pos] - counts[j])
+        ]
+        if not flex_found[j]:
+            unfilled.append('FLEX')
+        out = [proj.names[i] for i in full if not proj.rows[i][j]]
+        loss = best - points[j] - flex[j]
+        plans.append(WeekPlan(week, out, unfilled, round(max(loss, 0.0), 1)))
+    return plans
+
+
+def format_plan(plans: list[WeekPlan]) -> str:
+    header = ('{:<6}{:>7}  {:<20}{}').format('Week', 'Loss', 'Unfilled', 'Out')
+    lines = [header, Box.DOUBLE_LINE*60]
+    for p in plans:
+        color = Colors.RED if p.unfilled else (
+            Colors.YELLOW if p.out else ''
+        )
+        end = Colors.ENDC if color else ''
+        lines.append(
+            color + ('{:<6}{:>7}  {:<20}{}').format(
+                p.week, p.loss, ' '.join(p.unfilled) or '-',
+                ', '.join(p.out) or '-',
+            ) + end,
+        )
+    return '\n'.join(lines)
+
+
+def run_plan(
+    d: dict,
+    args: argparse.Namespace,
+    data_path: str | None = None,
+) -> int:
+    weeks = plan_weeks(d, args.week)
+    if not weeks:
+        print('No regular season weeks left to plan.')
+        return 0
+    if not has_projections(d, args.season, weeks, args.team_id):
+        print('Pulling projections...')
+        pull_projections(d, args, weeks, data_path or DATA_PATH)
+    team = next((t for t in d['teams'] if t['id'] == args.team_id), None)
+    if team is None:
+        raise SystemExit(
+            f'{Colors.RED}Team id: {args.team_id} does not exist'
+            f'{Colors.ENDC}',
+        )
+    print(format_plan(plan(projections(team, args.season, weeks))))
+    return 0
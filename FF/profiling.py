@@ -0,0 +1,163 @@
+from __future__ import annotations  # python3.7+
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any
+from typing import ContextManager
+from typing import Iterator
+from typing import TextIO
+
+# Shared no-op context handed out while profiling is off.
+_NULL: ContextManager[None] = contextlib.nullcontext()
+
+
+class Phase:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.peak: int | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'calls': self.calls,
+            'seconds': round(self.seconds, 6),
+            'peak_bytes': self.peak,
+        }
+
+
+class Profiler:
+    """Wall time and, with memory=True, peak traced memory per phase.
+
+    Phases with the same name accumulate. A phase's peak is the most
+    memory allocated above what was live when it started, nested phases
+    included. When the profiler is disabled phase() returns a shared no-op
+    context manager, so instrumented code pays for one attribute lookup
+    and a call.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        memory: bool = False,
+        cprofile: str | None = None,
+    ) -> None:
+        self.enabled = enabled or memory or bool(cprofile)
+        self.memory = self.enabled and memory
+        self.cprofile = cprofile if self.enabled else None
+        self.phases: dict[str, Phase] = {}
+        # Extra figures reported alongside the phases.
+        self.counters: dict[str, float] = {}
+        self.total = 0.0
+        # [live bytes at start, highest peak seen so far] per open phase
+        self._stack: list[list[int]] = []
+        self._profile: Any = None
+        self._start = 0.0
+
+    def __enter__(self) -> Profiler:
+        if not self.enabled:
+            return self
+        if self.memory:
+            tracemalloc.start()
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if not self.enabled:
+            return
+        self.total += time.perf_counter() - self._start
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile)
+            self._profile = None
+        if self.memory:
+            tracemalloc.stop()
+
+    def phase(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return _NULL
+        return self._phase(name)
+
+    @contextlib.contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(name)
+        tracing = self.memory and tracemalloc.is_tracing()
+        if tracing:
+            self._push()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            phase.seconds += time.perf_counter() - start
+            phase.calls += 1
+            if tracing:
+                peak = self._pop()
+                phase.peak = max(phase.peak or 0, peak)
+
+    def _push(self) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        # reset_peak() is 3.9+; older versions report the peak since the
+        # profiler started, which over-counts later phases.
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def _pop(self) -> int:
+        start, highest = self._stack.pop()
+        highest = max(highest, tracemalloc.get_traced_memory()[1])
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], highest)
+        return highest - start
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            'total_seconds': round(self.total, 6),
+            'memory': self.memory,
+            'phases': [phase.as_dict() for phase in self.phases.values()],
+            'counters': self.counters,
+        }
+
+    def print_report(self, file: TextIO | None = None) -> None:
+        file = file or sys.stderr
+        header = f'{"Phase":<18}{"Calls":>6}{"Time ms":>11}{"%":>7}'
+        if self.memory:
+            header += f'{"Peak KiB":>11}'
+        print(header, file=file)
+        for phase in self.phases.values():
+            pct = phase.seconds / self.total * 100 if self.total else 0.0
+            line = (
+                f'{phase.name:<18}{phase.calls:>6}'
+                f'{phase.seconds * 1000:>11.2f}{pct:>7.1f}'
+            )
+            if self.memory:
+                line += f'{(phase.peak or 0) / 1024:>11.1f}'
+            print(line, file=file)
+        print(f'{"total":<18}{"":>6}{self.total * 1000:>11.2f}', file=file)
+        for name, value in self.counters.items():
+            print(f'{name}: {value}', file=file)
+        if self.cprofile:
+            print(f'cProfile stats saved to {self.cprofile}', file=file)
+
+    def report(self, json_path: str | None = None) -> None:
+        if not self.enabled:
+            return
+        if json_path == '-':
+            json.dump(self.as_dict(), sys.stdout, indent=2)
+            print()
+        elif json_path:
+            with open(json_path, 'w') as wf:
+                json.dump(self.as_dict(), wf, indent=2)
+        else:
+            self.print_report()
@@ -0,0 +1,183 @@
+"""Local projection model.
+
+Blends ESPN's weekly projection with each player's recent form: a
+smoothed level and trend (Holt's method) over the weekly scores seen in
+the league's snapshots this season. The model's state is kept beside the
+snapshots (FF_{season}_model_{league}.json), so a new week folds in just
+that week's scores rather than replaying the season.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import json
+import os
+
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.storage import atomic_write
+
+# Smoothing of the level (recent scores) and of the trend.
+ALPHA = .35
+BETA = .1
+# ESPN's projection counts for this many weeks of history.
+PRIOR_WEEKS = 4
+# History never outweighs ESPN's projection more than this.
+MAX_HISTORY_WEIGHT = .5
+
+
+def model_path(path: str, year: int, LID: int) -> str:
+    return f'{path}/FF_{year}_model_{LID}.json'
+
+
+class Model:
+    """Per-player level, trend, games seen and last week folded in,
+    as parallel columns indexed through `rows`.
+    """
+
+    def __init__(self, year: int) -> None:
+        self.year = year
+        self.rows: dict[int, int] = {}
+        self.level: list[float] = []
+        self.trend: list[float] = []
+        self.games: list[int] = []
+        self.last: list[int] = []
+
+    @classmethod
+    def load(cls, path: str, year: int) -> Model:
+        model = cls(year)
+        try:
+            with open(path) as rf:
+                state = json.load(rf)
+        except FileNotFoundError:
+            return model
+        except ValueError:
+            print(
+                f'{Colors.YELLOW}Rebuilding the projection model: {path} '
+                f'is unreadable{Colors.ENDC}',
+            )
+            return model
+        if state.get('year') != year:
+            return model
+        for i, playerId in enumerate(state['players']):
+            model.rows[playerId] = i
+        model.level = state['level']
+        model.trend = state['trend']
+        model.games = state['games']
+        model.last = state['last']
+        return model
+
+    def save(self, path: str) -> None:
+        with atomic_write(path) as wf:
+            json.dump(
+                {
+                    'year': self.year,
+                    'players': list(self.rows),
+                    'level': self.level,
+                    'trend': self.trend,
+                    'games': self.games,
+                    'last': self.last,
+                },
+                wf,
+                separators=(',', ':'),
+            )
+
+    def _row(self, playerId: int) -> int:
+        i = self.rows.get(playerId)
+        if i is None:
+            i = self.rows[playerId] = len(self.level)
+            self.level.append(0.0)
+            self.trend.append(0.0)
+            self.games.append(0)
+            self.last.append(0)
+        return i
+
+    def update(self, d: dict, week: int) -> int:
+        """Fold in every rostered player's scores from weeks before
+        `week` that the model has not seen; returns how many.
+        """
+        by_week: dict[int, tuple[list[int], list[float]]] = {}
+        for team in d.get('teams', []):
+            for e in team.get('roster', {}).get('entries', []):
+                i = self._row(e['playerId'])
+                last = self.last[i]
+                for stat in e['playerPoolEntry']['player'].get('stats', []):
+                    w = stat['scoringPeriodId']
+                    if (
+                        last < w < week and
+                        stat['seasonId'] == self.year and
+                        stat['statSourceId'] == 0 and
+                        stat['statSplitTypeId'] == 1
+                    ):
+                        rows, scores = by_week.setdefault(w, ([], []))
+                        rows.append(i)
+                        scores.append(stat['appliedTotal'])
+        folded = 0
+        level, trend, games = self.level, self.trend, self.games
+        for w in sorted(by_week):
+            rows, scores = by_week[w]
+            for i, x in zip(rows, scores):
+                if games[i] == 0:
+                    level[i] = x
+                else:
+                    previous = level[i]
+                    level[i] = ALPHA * x + (1 - ALPHA) * (previous + trend[i])
+                    trend[i] = (
+                        BETA * (level[i] - previous) + (1 - BETA) * trend[i]
+                    )
+                games[i] += 1
+                self.last[i] = w
+            folded += len(rows)
+        return folded
+
+    def forecast(self, playerId: int) -> float | None:
+        i = self.rows.get(playerId)
+        if i is None or not self.games[i]:
+            return None
+        return max(self.level[i] + self.trend[i], 0.0)
+
+    def blend(self, playerId: int, proj: float) -> float:
+        """ESPN's projection `proj` moved toward the player's form, by
+        more the more games the model has seen. A zero projection (bye
+        or out) stays zero.
+        """
+        forecast = self.forecast(playerId)
+        if forecast is None or proj == 0:
+            return proj
+        games = self.games[self.rows[playerId]]
+        weight = MAX_HISTORY_WEIGHT * games / (games + PRIOR_WEEKS)
+        return round((1 - weight) * proj + weight * forecast, 1)
+
+
+def espn_projections(d: dict, year: int, week: int) -> dict[int, float]:
+    projections = {}
+    for team in d.get('teams', []):
+        for e in team.get('roster', {}).get('entries', []):
+            for stat in e['playerPoolEntry']['player'].get('stats', []):
+                if (
+                    stat['scoringPeriodId'] == week and
+                    stat['seasonId'] == year and
+                    stat['statSourceId'] == 1
+                ):
+                    projections[e['playerId']] = stat['appliedTotal']
+    return projections
+
+
+def local_projections(
+    d: dict,
+    args: argparse.Namespace,
+    path: str = DATA_PATH,
+) -> dict[int, float]:
+    """Every rostered player's local projection for -w, with the model
+    brought up to date from the snapshot `d` and saved.
+    """
+    state = model_path(path, args.season, args.league_id)
+    model = Model.load(state, args.season)
+    if model.update(d, args.week):
+        os.makedirs(path, exist_ok=True)
+        model.save(state)
+    return {
+        playerId: model.blend(playerId, proj)
+        for playerId, proj in espn_projections(
+            d, args.season, args.week,
+        ).items()
+    }
@@ -0,0 +1,109 @@
+from __future__ import annotations  # python3.7+
+
+import threading
+import time
+from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import TypeVar
+
+T = TypeVar('T')
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second on average,
+    bursts of up to `burst`. A rate of 0 disables limiting.
+
+    A caller that finds the bucket empty reserves the next token and sleeps
+    outside the lock, so concurrent callers queue up in arrival order.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(burst)
+        self.last = clock()
+        self.acquired = 0
+        self.throttled = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            self.acquired += 1
+            if self.rate <= 0:
+                return 0.0
+            now = self.clock()
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.last) * self.rate,
+            )
+            self.last = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            wait = -self.tokens / self.rate
+            self.throttled += 1
+            self.waited += wait
+            return wait
+
+    def acquire(self) -> float:
+        wait = self.reserve()
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one.
+
+    The first caller for a key runs fn; callers arriving while it is in
+    flight wait and get the same result (the same object) or exception.
+    Nothing is cached once the call returns.
+    """
+
+    def __init__(self) -> None:
+        self.issued = 0
+        self.coalesced = 0
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.issued += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
@@ -0,0 +1,122 @@
+"""Positional ranks from a snapshot's mPositionalRatings view.
+
+Two lookups, built once per loaded snapshot:
+
+- each rostered player's rank at their position, by season average;
+- each pro defense's rank against each position, 1 allowing the fewest
+  points (the view's positionAgainstOpponent), which with the pro game
+  schedule (proTeamSchedules_{season}.json beside the snapshots, saved
+  by ff-scheduler) gives every player's opponent rank for the week.
+
+Every position's ranks come from one sort of its values.
+"""
+from __future__ import annotations  # python3.7+
+
+import bisect
+import json
+import os
+from typing import NamedTuple
+
+
+class Ratings(NamedTuple):
+    # playerId to rank at their position
+    players: dict[int, int]
+    # playerId to the rank of the week's opponent against their position
+    opponents: dict[int, int]
+
+
+def pro_schedule_path(path: str, year: int) -> str:
+    return f'{path}/proTeamSchedules_{year}.json'
+
+
+def read_pro_schedule(path: str, year: int) -> dict | None:
+    try:
+        with open(pro_schedule_path(path, year)) as rf:
+            return json.load(rf)
+    except (OSError, ValueError):
+        return None
+
+
+def pro_schedule_stamp(path: str, year: int) -> int | None:
+    """Changes whenever the saved pro game schedule does."""
+    try:
+        return os.stat(pro_schedule_path(path, year)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def ranks(
+    values: dict[int, float],
+    descending: bool = False,
+) -> dict[int, int]:
+    """1-based ranks of `values`, ties sharing the better rank."""
+    order = sorted(-v if descending else v for v in values.values())
+    return {
+        key: bisect.bisect_left(order, -v if descending else v) + 1
+        for key, v in values.items()
+    }
+
+
+def defense_ranks(d: dict) -> dict[int, dict[int, int]]:
+    """positionId to each pro team's rank against it, 1 the toughest."""
+    ratings = d.get('positionAgainstOpponent', {}).get(
+        'positionalRatings', {},
+    )
+    return {
+        int(pos): ranks({
+            int(proTeam): rating['average']
+            for proTeam, rating in by_pos.get('ratingsByOpponent', {}).items()
+        })
+        for pos, by_pos in ratings.items()
+    }
+
+
+def opponents(schedule: dict, week: int) -> dict[int, int]:
+    """Each pro team's opponent in `week` (none on bye)."""
+    found = {}
+    for team in schedule.get('settings', {}).get('proTeams', []):
+        for game in team.get('proGamesByScoringPeriod', {}).get(
+            str(week), [],
+        ):
+            home, away = game['homeProTeamId'], game['awayProTeamId']
+            found[home], found[away] = away, home
+    return found
+
+
+def league_ratings(
+    d: dict,
+    year: int,
+    week: int,
+    schedule: dict | None = None,
+) -> Ratings:
+    by_pos: dict[int, dict[int, float]] = {}
+    teams: dict[int, tuple[int, int]] = {}
+    for team in d.get('teams', []):
+        for e in team.get('roster', {}).get('entries', []):
+            player = e['playerPoolEntry']['player']
+            pos = player['defaultPositionId']
+            average = next(
+                (
+                    s.get('appliedAverage', 0.0)
+                    for s in player.get('stats', [])
+                    if s.get('id') == f'00{year}'
+                ),
+                None,
+            )
+            if average is not None:
+                by_pos.setdefault(pos, {})[e['playerId']] = average
+            teams[e['playerId']] = (pos, player.get('proTeamId', 0))
+    players = {}
+    # A matchup-only pull (see league_filter) has too few rosters to rank.
+    if 'teams' not in d.get('FF', {}):
+        for values in by_pos.values():
+            players.update(ranks(values, descending=True))
+    against = {}
+    if schedule is not None:
+        defenses = defense_ranks(d)
+        games = opponents(schedule, week)
+        for playerId, (pos, proTeam) in teams.items():
+            rank = defenses.get(pos, {}).get(games.get(proTeam, 0))
+            if rank is not None:
+                against[playerId] = rank
+    return Ratings(players, against)
@@ -0,0 +1,317 @@
+"""Prefetch league snapshots around the NFL game schedule.
+
+Reads the pro teams' game schedule once a week and pulls each league
+through the usual pull path: every few minutes while games are on (live
+scores only, see --scores) and every few hours otherwise, so snapshots
+are warm whenever FF runs interactively:
+
+    ff-scheduler -l 123456 -l 654321 &
+    ff-scheduler --plan 20
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import datetime
+import io
+import time
+from typing import Callable
+from typing import NamedTuple
+
+from FF.main import build_parser
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.main import load_cookies
+from FF.main import pull_and_save
+from FF.main import pull_pro_schedule
+from FF.main import resolve_args
+from FF.profiling import Profiler
+
+# Kickoff to final whistle, with room for overtime.
+GAME_LENGTH = 3.5 * 60 * 60
+LIVE_EVERY = 5 * 60
+IDLE_EVERY = 6 * 60 * 60
+# The game schedule is read again when the week changes, or at least
+# this often.
+SCHEDULE_EVERY = 7 * 24 * 60 * 60
+
+
+class Clock:
+    """Wall clock; tests pass a fake one."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class Window(NamedTuple):
+    """Overlapping games merged into one stretch of live play."""
+    start: float
+    end: float
+    week: int
+
+
+class Run(NamedTuple):
+    at: float
+    week: int
+    # Live games: pull scores only.
+    live: bool
+
+
+def game_windows(d: dict) -> list[Window]:
+    """The proTeamSchedules_wl response's games as live windows, in
+    order. Each game is listed under both its teams; it's counted once.
+    """
+    games = {}
+    for team in d.get('settings', {}).get('proTeams', []):
+        by_period = team.get('proGamesByScoringPeriod', {})
+        for period, period_games in by_period.items():
+            for game in period_games:
+                start = game['date'] / 1000
+                games[game['id']] = (start, int(period))
+    windows: list[Window] = []
+    for start, week in sorted(games.values()):
+        end = start + GAME_LENGTH
+        if windows and start <= windows[-1].end:
+            last = windows[-1]
+            windows[-1] = last._replace(end=max(last.end, end))
+        else:
+            windows.append(Window(start, end, week))
+    return windows
+
+
+def next_run(windows: list[Window], now: float, last: Run | None) -> Run:
+    """When to pull after `last` (or first, with None), given it is `now`.
+
+    Live windows are pulled every LIVE_EVERY seconds and once more as
+    they end, in full for the final scores; otherwise every IDLE_EVERY
+    seconds or as the next window starts, whichever is sooner. Pulls are
+    for the week of the window live at the time, or else the next one.
+    """
+    at = now if last is None else max(now, last.at)
+    if last is not None:
+        current = _window(windows, last.at)
+        if current is not None:
+            at = max(now, min(last.at + LIVE_EVERY, current.end))
+            if at >= current.end:
+                # Windows end exclusive: the final pull is the window's
+                # own week, and only the next run moves on.
+                return Run(at, current.week, False)
+        else:
+            upcoming = _upcoming(windows, last.at)
+            at = last.at + IDLE_EVERY
+            if upcoming is not None:
+                at = min(at, upcoming.start)
+            at = max(now, at)
+    live = _window(windows, at)
+    if live is not None:
+        return Run(at, live.week, True)
+    upcoming = _upcoming(windows, at)
+    if upcoming is not None:
+        return Run(at, upcoming.week, False)
+    # Season over: keep the final week warm.
+    return Run(at, windows[-1].week if windows else 0, False)
+
+
+def _window(windows: list[Window], t: float) -> Window | None:
+    for w in windows:
+        if w.start <= t < w.end:
+            return w
+    return None
+
+
+def _upcoming(windows: list[Window], t: float) -> Window | None:
+    # The first window still to start, or None.
+    for w in windows:
+        if w.start > t:
+            return w
+    return None
+
+
+def plan(windows: list[Window], now: float, n: int) -> list[Run]:
+    """The next `n` runs from `now`."""
+    runs: list[Run] = []
+    last = None
+    for _ in range(n):
+        last = next_run(windows, now, last)
+        now = last.at
+        runs.append(last)
+    return runs
+
+
+def format_plan(runs: list[Run]) -> str:
+    lines = []
+    for r in runs:
+        at = datetime.datetime.fromtimestamp(r.at).strftime('%a %m-%d %H:%M')
+        kind = f'{Colors.GREEN}live{Colors.ENDC}' if r.live else 'idle'
+        lines.append(f'{at}  week {r.week:<3}{kind}')
+    return '\n'.join(lines)
+
+
+class Scheduler:
+    """Pulls `leagues` (FF args, one Namespace per league) on the game
+    schedule's timetable.
+
+    `fetch` returns the pro schedule as (status code, response) and
+    `pull` pulls and saves one league; both default to the real API.
+    """
+
+    def __init__(
+        self,
+        leagues: list[argparse.Namespace],
+        clock: Clock | None = None,
+        fetch: Callable[[], tuple[int, dict]] | None = None,
+        pull: Callable[[argparse.Namespace], object] | None = None,
+        log: Callable[[str], None] = print,
+    ) -> None:
+        self.leagues = leagues
+        self.clock = clock or Clock()
+        first = leagues[0]
+        self.fetch = fetch or (
+            lambda: pull_pro_schedule(
+                first.season, first.dev, first.base_url, DATA_PATH,
+            )
+        )
+        self.pull = pull or (lambda args: pull_and_save(args, Profiler()))
+        self.log = log
+        self.windows: list[Window] = []
+        self.fetched_at: float | None = None
+        self.fetched_week: int | None = None
+        self.last: Run | None = None
+        self.pulls = 0
+        self.failures = 0
+
+    def schedule(self) -> list[Window]:
+        """The game windows, read again once the week has moved on."""
+        now = self.clock.time()
+        if self.fetched_at is not None:
+            stale = (
+                now - self.fetched_at >= SCHEDULE_EVERY or
+                next_run(self.windows, now, None).week != self.fetched_week
+            )
+            if not stale:
+                return self.windows
+        status_code, d = self.fetch()
+        if status_code == 200:
+            self.windows = game_windows(d)
+            self.fetched_at = now
+            self.fetched_week = next_run(self.windows, now, None).week
+            self.log(
+                f'Read the game schedule: {len(self.windows)} windows',
+            )
+        else:
+            # Tried again next run; until then the old windows stand.
+            self.log(
+                f'{Colors.RED}Could not read the game schedule '
+                f'(status {status_code}){Colors.ENDC}',
+            )
+        return self.windows
+
+    def plan(self, n: int) -> list[Run]:
+        return plan(self.schedule(), self.clock.time(), n)
+
+    def run_once(self) -> Run:
+        """Sleep until the next run is due, then pull every league."""
+        windows = self.schedule()
+        run = next_run(windows, self.clock.time(), self.last)
+        wait = run.at - self.clock.time()
+        if wait > 0:
+            self.clock.sleep(wait)
+        for args in self.leagues:
+            args.week = run.week or args.week
+            args.scores = run.live
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.pull(args)
+                self.pulls += 1
+                result = 'ok'
+            except (SystemExit, Exception) as e:
+                self.failures += 1
+                result = f'{Colors.RED}failed: {e}{Colors.ENDC}'
+            self.log(
+                f'{format_plan([run])}  league {args.league_id}: {result}',
+            )
+        self.last = run
+        return run
+
+    def run_forever(self) -> None:
+        while True:
+            self.run_once()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Prefetch FF snapshots around the game schedule',
+    )
+    parser.add_argument(
+        '-l', '--league-id',
+        help='League ID (repeatable; default: from your cookies)',
+        type=int,
+        action='append',
+    )
+    parser.add_argument(
+        '-s', '--season',
+        help='Year of season',
+        type=int,
+    )
+    parser.add_argument(
+        '-d', '--dev',
+        help='Use dev cookies',
+        action='store_true',
+    )
+    parser.add_argument(
+        '--base-url',
+        help='API base URL (env: FF_BASE_URL)',
+    )
+    parser.add_argument(
+        '--plan',
+        help='Print the next N runs and exit',
+        type=int,
+        metavar='N',
+    )
+    return parser.parse_args(argv)
+
+
+def league_args(args: argparse.Namespace) -> list[argparse.Namespace]:
+    """FF's own args for pulling each league, filled in from cookies
+    without saving any to them.
+    """
+    leagues = []
+    for LID in args.league_id or [None]:
+        argv = ['-p']
+        if LID is not None:
+            argv += ['-l', str(LID)]
+        if args.season:
+            argv += ['-s', str(args.season)]
+        if args.dev:
+            argv.append('-d')
+        if args.base_url:
+            argv += ['--base-url', args.base_url]
+        ff_args = build_parser().parse_args(argv)
+        resolve_args(ff_args, persist=False)
+        if LID is not None and LID != load_cookies(
+            args.dev, key='league_id',
+        ):
+            # The cookies' team is in their league only.
+            ff_args.team_id = None
+        leagues.append(ff_args)
+    return leagues
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    scheduler = Scheduler(league_args(args))
+    if args.plan:
+        print(format_plan(scheduler.plan(args.plan)))
+        return 0
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
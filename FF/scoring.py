@@ -0,0 +1,289 @@
+"""League scoring engine.
+
+Recomputes fantasy points from the players' raw stat maps under the
+league's scoring settings (settings.scoringSettings from the mSettings
+view), or under rules changed from a file. Every stat line is laid out
+once as sparse columns, one per stat id, so scoring a whole season
+under new rules is one multiply-add per stat recorded.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import json
+import os
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+from FF.main import connect_FF
+from FF.main import DATA_PATH
+from FF.main import positionID
+from FF.main import save_merged
+from FF.main import slotID
+
+# Scores this close to appliedTotal agree: ESPN rounds each stat's
+# points to two places.
+TOLERANCE = .015
+# Each position's own lineup slot, which pointsOverrides are keyed on.
+POSITION_SLOT = {
+    position: next(s for s, name in slotID.items() if name == pos)
+    for position, pos in positionID.items()
+}
+
+
+class Rules(NamedTuple):
+    # Stat id to points per unit
+    points: dict[str, float]
+    # Stat id to points by lineup slot id, where they differ
+    overrides: dict[str, dict[int, float]]
+
+
+class StatLine(NamedTuple):
+    playerId: int
+    seasonId: int
+    scoringPeriodId: int
+    # 0: actual, 1: projected
+    statSourceId: int
+    # 0: season total, 1: one week
+    statSplitTypeId: int
+
+
+def league_rules(d: dict) -> Rules | None:
+    """The league's rules from its scoring settings, if pulled."""
+    settings = d.get('settings', {}).get('scoringSettings')
+    if settings is None:
+        return None
+    return items_rules(settings.get('scoringItems', []))
+
+
+def items_rules(items: list[dict]) -> Rules:
+    points = {}
+    overrides = {}
+    for item in items:
+        statId = str(item['statId'])
+        points[statId] = float(item['points'])
+        if item.get('pointsOverrides'):
+            overrides[statId] = {
+                int(slot): float(value)
+                for slot, value in item['pointsOverrides'].items()
+            }
+    return Rules(points, overrides)
+
+
+def load_rules(path: str, base: Rules | None = None) -> Rules:
+    """Rules from the JSON file at `path`: either scoringSettings as the
+    API returns them, or stat ids to points changed from `base`, e.g.
+    {"53": 1} for a point per reception (null drops a stat).
+    """
+    try:
+        with open(path) as rf:
+            raw = json.load(rf)
+    except (OSError, ValueError) as e:
+        raise SystemExit(
+            f'{Colors.RED}Could not read rules file {path}: {e}{Colors.ENDC}',
+        )
+    if isinstance(raw, dict) and 'scoringItems' in raw:
+        return items_rules(raw['scoringItems'])
+    if not isinstance(raw, dict) or not all(
+        v is None or isinstance(v, (int, float)) for v in raw.values()
+    ):
+        raise SystemExit(
+            f'{Colors.RED}{path}: rules map stat ids to points'
+            f'{Colors.ENDC}',
+        )
+    points = dict(base.points) if base else {}
+    overrides = dict(base.overrides) if base else {}
+    for statId, value in raw.items():
+        overrides.pop(statId, None)
+        if value is None:
+            points.pop(statId, None)
+        else:
+            points[statId] = float(value)
+    return Rules(points, overrides)
+
+
+class StatTable:
+    """Every rostered player's stat lines as rows, with a sparse column
+    (row numbers and values) per stat id.
+    """
+
+    def __init__(self) -> None:
+        self.lines: list[StatLine] = []
+        # The player's own lineup slot, per row
+        self.slots: list[int] = []
+        # ESPN's points, per row
+        self.applied: list[float | None] = []
+        self.columns: dict[str, tuple[list[int], list[float]]] = {}
+
+    @classmethod
+    def from_league(cls, d: dict) -> StatTable:
+        table = cls()
+        seen = set()
+        for team in d.get('teams', []):
+            for e in team.get('roster', {}).get('entries', []):
+                if e['playerId'] in seen:
+                    continue
+                seen.add(e['playerId'])
+                player = e['playerPoolEntry']['player']
+                slot = POSITION_SLOT.get(player['defaultPositionId'], -1)
+                for stat in player.get('stats', []):
+                    table.add(e['playerId'], slot, stat)
+        return table
+
+    def add(self, playerId: int, slot: int, stat: dict) -> None:
+        row = len(self.lines)
+        self.lines.append(StatLine(
+            playerId, stat['seasonId'], stat['scoringPeriodId'],
+            stat['statSourceId'], stat['statSplitTypeId'],
+        ))
+        self.slots.append(slot)
+        self.applied.append(stat.get('appliedTotal'))
+        for statId, value in (stat.get('stats') or {}).items():
+            if not value:
+                continue
+            column = self.columns.get(statId)
+            if column is None:
+                column = self.columns[statId] = ([], [])
+            column[0].append(row)
+            column[1].append(value)
+
+    def score(self, rules: Rules) -> list[float]:
+        """Every row's points under `rules`."""
+        totals = [0.0] * len(self.lines)
+        for statId, points in rules.points.items():
+            column = self.columns.get(statId)
+            if column is None:
+                continue
+            rows, values = column
+            by_slot = rules.overrides.get(statId)
+            if by_slot:
+                slots = self.slots
+                for i, value in zip(rows, values):
+                    totals[i] += value * by_slot.get(slots[i], points)
+            else:
+                for i, value in zip(rows, values):
+                    totals[i] += value * points
+        return totals
+
+    def mismatches(self, scores: list[float]) -> list[int]:
+        """Rows whose `scores` disagree with ESPN's appliedTotal."""
+        return [
+            i for i, (score, applied) in enumerate(zip(scores, self.applied))
+            if applied is not None and abs(score - applied) > TOLERANCE
+        ]
+
+    def season_totals(
+        self,
+        scores: list[float],
+        year: int,
+        source: int = 0,
+    ) -> dict[int, float]:
+        """Each player's weekly `scores` summed over the season `year`."""
+        totals: dict[int, float] = {}
+        for line, score in zip(self.lines, scores):
+            if (
+                line.seasonId == year and
+                line.statSourceId == source and
+                line.statSplitTypeId == 1
+            ):
+                totals[line.playerId] = totals.get(line.playerId, 0.0) + score
+        return totals
+
+
+def pull_rules(
+    d: dict,
+    args: argparse.Namespace,
+    data_path: str,
+) -> Rules:
+    """Pull the league's scoring settings into `d` and the saved snapshot
+    in `data_path`.
+    """
+    status_code, delta = connect_FF(
+        args.league_id, args.week, args.dev, args.base_url, ('mSettings',),
+        year=args.season,
+    )
+    settings = delta.get('settings', {}).get('scoringSettings')
+    if status_code != 200 or settings is None:
+        raise SystemExit(
+            f'{Colors.RED}Could not pull scoring settings '
+            f'(status {status_code}){Colors.ENDC}',
+        )
+
+    def merge(d: dict) -> None:
+        d.setdefault('settings', {})['scoringSettings'] = settings
+
+    save_merged(data_path, args, d, merge)
+    return items_rules(settings.get('scoringItems', []))
+
+
+def format_scoring(
+    team: dict,
+    table: StatTable,
+    league: list[float],
+    rescored: list[float],
+    year: int,
+    title: str,
+) -> str:
+    before = table.season_totals(league, year)
+    after = table.season_totals(rescored, year)
+    players = []
+    for e in team['roster']['entries']:
+        player = e['playerPoolEntry']['player']
+        players.append((
+            after.get(e['playerId'], 0.0),
+            before.get(e['playerId'], 0.0),
+            player['fullName'],
+            positionID.get(player['defaultPositionId'], ''),
+        ))
+    players.sort(key=lambda p: p[0], reverse=True)
+    header = ('{:<24}{:<5}{:>8}{:>8}{:>8}').format(
+        'Player', 'Pos', 'League', 'Rules', '+/-',
+    )
+    lines = [title, header, Box.DOUBLE_LINE*53]
+    for after_points, before_points, name, pos in players:
+        move = round(after_points - before_points, 1)
+        color = Colors.GREEN if move > 0 else Colors.RED if move < 0 else ''
+        end = Colors.ENDC if color else ''
+        lines.append(
+            ('{:<24}{:<5}{:>8}{:>8}').format(
+                name, pos, round(before_points, 1), round(after_points, 1),
+            ) + color + f'{move:>+8}' + end,
+        )
+    return '\n'.join(lines)
+
+
+def run_scoring(
+    d: dict,
+    args: argparse.Namespace,
+    data_path: str | None = None,
+) -> int:
+    """--scoring RULES: the team's actual points this season under the
+    league's scoring and under RULES.
+    """
+    base = league_rules(d)
+    if base is None:
+        print('Pulling scoring settings...')
+        base = pull_rules(d, args, data_path or DATA_PATH)
+    rules = load_rules(args.scoring, base)
+    team = next((t for t in d['teams'] if t['id'] == args.team_id), None)
+    if team is None:
+        raise SystemExit(
+            f'{Colors.RED}Team id: {args.team_id} does not exist'
+            f'{Colors.ENDC}',
+        )
+    table = StatTable.from_league(d)
+    league = table.score(base)
+    off = table.mismatches(league)
+    if off:
+        print(
+            f'{Colors.YELLOW}League scoring does not reproduce {len(off)} '
+            f'of {len(table.lines)} stat lines{Colors.ENDC}',
+        )
+    title = (
+        f'{args.season} points: league scoring -> '
+        f'{os.path.basename(args.scoring)}'
+    )
+    print(format_scoring(
+        team, table, league, table.score(rules), args.season, title,
+    ))
+    return 0
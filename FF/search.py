@@ -0,0 +1,299 @@
+"""Player search by name across a league's snapshot.
+
+    ff --player kamara
+
+Names are indexed by trigrams (each word padded with a leading and a
+trailing space, so a query's first letters match word prefixes). The
+index and each player's row (owner, slot, week and season points) are
+kept beside the snapshots (FF_{season}_players_{league}.json) and
+checked against the snapshot's size and mtime, so a search on an
+unchanged snapshot reads just the index. After a pull the rows are
+rebuilt and only new or renamed players are re-indexed.
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import json
+import os
+import unicodedata
+from typing import Iterable
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+from FF.main import DATA_PATH
+from FF.main import load_data
+from FF.main import positionID
+from FF.main import slotID
+from FF.main import snapshot_path
+from FF.storage import atomic_write
+
+GRAM = 3
+# Share of the query's trigrams a name must have to match.
+MIN_SCORE = .5
+LIMIT = 10
+# Bumped when the index format changes, discarding saved indexes.
+INDEX_VERSION = 1
+
+
+def index_path(path: str, year: int, LID: int) -> str:
+    return f'{path}/FF_{year}_players_{LID}.json'
+
+
+def snapshot_stamp(path: str) -> str:
+    st = os.stat(path)
+    return f'{st.st_size} {st.st_mtime_ns} {st.st_ino}'
+
+
+def normalize(text: str) -> str:
+    """Lowercase letters and digits, accents and punctuation dropped."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(
+        c if c.isalnum() else ' ' for c in text
+        if not unicodedata.combining(c) and c not in ".'"
+    )
+
+
+def grams(text: str, prefix: bool = False) -> set[str]:
+    """The padded trigrams of `text`'s words; with `prefix` the last word
+    is left open, as a query still being typed.
+    """
+    words = normalize(text).split()
+    found = set()
+    for i, word in enumerate(words):
+        padded = f' {word}' if prefix and i == len(words) - 1 else (
+            f' {word} '
+        )
+        for j in range(max(len(padded) - GRAM + 1, 1)):
+            found.add(padded[j:j + GRAM])
+    return found
+
+
+class Row(NamedTuple):
+    name: str
+    pos: str
+    # Owner's abbreviation, FA for free agents
+    owner: str
+    TID: int
+    slot: str
+    status: str
+    proj: float
+    score: float
+    avg: float
+    total: float
+
+
+def player_row(
+    player: dict,
+    owner: str,
+    TID: int,
+    slot: str,
+    year: int,
+    week: int,
+) -> Row:
+    proj = score = avg = total = 0.0
+    for stat in player.get('stats', []):
+        if stat.get('id') == f'00{year}':
+            avg = round(stat.get('appliedAverage', 0.0), 1)
+            total = round(stat.get('appliedTotal', 0.0), 1)
+        elif stat['scoringPeriodId'] == week and stat['seasonId'] == year:
+            if stat['statSourceId'] == 0:
+                score = round(stat['appliedTotal'], 1)
+            elif stat['statSourceId'] == 1:
+                proj = round(stat['appliedTotal'], 1)
+    return Row(
+        f"{player['firstName']} {player['lastName']}",
+        positionID.get(player['defaultPositionId'], '-'),
+        owner,
+        TID,
+        slot,
+        player.get('injuryStatus', 'ACTIVE'),
+        proj,
+        score,
+        avg,
+        total,
+    )
+
+
+def player_rows(d: dict, year: int, week: int) -> dict[int, Row]:
+    """Every rostered player's row and, when the snapshot has the player
+    pool (`players`), every free agent's.
+    """
+    rows = {}
+    for team in d.get('teams', []):
+        abbrev = team.get('abbrev', str(team['id']))
+        for e in team.get('roster', {}).get('entries', []):
+            rows[e['playerId']] = player_row(
+                e['playerPoolEntry']['player'], abbrev, team['id'],
+                slotID.get(e['lineupSlotId'], '-'), year, week,
+            )
+    for entry in d.get('players', []):
+        if entry['id'] not in rows and not entry.get('onTeamId'):
+            rows[entry['id']] = player_row(
+                entry['player'], 'FA', 0, '-', year, week,
+            )
+    return rows
+
+
+class PlayerIndex:
+    """Trigram postings over player names, and the rows of the snapshot
+    (`week`, `stamp`) they were last brought up to date with.
+    """
+
+    def __init__(self) -> None:
+        self.week: int | None = None
+        self.stamp: str | None = None
+        self.names: dict[int, str] = {}
+        self.rows: dict[int, Row] = {}
+        self.postings: dict[str, set[int]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> PlayerIndex:
+        index = cls()
+        try:
+            with open(path) as rf:
+                state = json.load(rf)
+        except (OSError, ValueError):
+            return index
+        if state.get('version') != INDEX_VERSION:
+            return index
+        index.week = state['week']
+        index.stamp = state['stamp']
+        index.names = {int(p): name for p, name in state['names'].items()}
+        index.rows = {int(p): Row(*row) for p, row in state['rows'].items()}
+        index.postings = {
+            gram: set(players) for gram, players in state['postings'].items()
+        }
+        return index
+
+    def save(self, path: str) -> None:
+        with atomic_write(path) as wf:
+            json.dump(
+                {
+                    'version': INDEX_VERSION,
+                    'week': self.week,
+                    'stamp': self.stamp,
+                    'names': self.names,
+                    'rows': self.rows,
+                    'postings': {
+                        gram: sorted(players)
+                        for gram, players in self.postings.items()
+                    },
+                },
+                wf,
+                separators=(',', ':'),
+            )
+
+    def fresh(self, week: int, stamp: str) -> bool:
+        return (self.week, self.stamp) == (week, stamp)
+
+    def update(self, rows: dict[int, Row], week: int, stamp: str) -> int:
+        """Take `rows` as the players; returns how many names were
+        (re-)indexed.
+        """
+        for playerId, name in list(self.names.items()):
+            row = rows.get(playerId)
+            if row is None or row.name != name:
+                for gram in grams(name):
+                    players = self.postings.get(gram)
+                    if players is not None:
+                        players.discard(playerId)
+                        if not players:
+                            del self.postings[gram]
+                del self.names[playerId]
+        indexed = 0
+        for playerId, row in rows.items():
+            if playerId in self.names:
+                continue
+            self.names[playerId] = row.name
+            for gram in grams(row.name):
+                self.postings.setdefault(gram, set()).add(playerId)
+            indexed += 1
+        self.rows = rows
+        self.week = week
+        self.stamp = stamp
+        return indexed
+
+    def search(
+        self,
+        query: str,
+        limit: int = LIMIT,
+    ) -> list[tuple[int, float]]:
+        """The best matches for `query` as (playerId, score), a score of
+        1 having every trigram of the query; names whose words start
+        with the query's words first.
+        """
+        wanted = grams(query, prefix=True)
+        if not wanted:
+            return []
+        hits: dict[int, int] = {}
+        for gram in wanted:
+            for playerId in self.postings.get(gram, ()):
+                hits[playerId] = hits.get(playerId, 0) + 1
+        words = normalize(query).split()
+        matches = []
+        for playerId, n in hits.items():
+            score = n / len(wanted)
+            if score < MIN_SCORE:
+                continue
+            name = normalize(self.names[playerId]).split()
+            prefixed = all(
+                any(part.startswith(word) for part in name) for word in words
+            )
+            matches.append((not prefixed, -score, playerId))
+        matches.sort(key=lambda m: (m[0], m[1], self.names[m[2]]))
+        return [(playerId, -score) for _, score, playerId in matches[:limit]]
+
+
+def format_matches(rows: Iterable[Row], TID: int) -> str:
+    line = '{:<22}{:<5}{:<7}{:<5}{:<16}{:>6}{:>7}{:>7}{:>8}'
+    header = line.format(
+        'Player', 'Pos', 'Team', 'Slot', 'Status', 'Proj', 'Score', 'Avg',
+        'Total',
+    )
+    lines = [header, Box.DOUBLE_LINE*len(header)]
+    for row in rows:
+        color = Colors.CYAN if row.TID == TID else ''
+        end = Colors.ENDC if color else ''
+        lines.append(color + line.format(
+            row.name[:21], row.pos, row.owner, row.slot, row.status[:15],
+            row.proj, row.score, row.avg, row.total,
+        ) + end)
+    return '\n'.join(lines)
+
+
+def league_index(
+    args: argparse.Namespace,
+    d: dict | None = None,
+    path: str = DATA_PATH,
+) -> PlayerIndex:
+    """The league's player index for -w, brought up to date with its
+    snapshot (`d` if already loaded) and saved when it changed.
+    """
+    snapshot = snapshot_path(path, args.season, args.week, args.league_id)
+    state = index_path(path, args.season, args.league_id)
+    index = PlayerIndex.load(state)
+    try:
+        stamp = snapshot_stamp(snapshot)
+    except FileNotFoundError:
+        # load_data explains.
+        stamp = ''
+    if stamp and index.fresh(args.week, stamp):
+        return index
+    if d is None:
+        d = load_data(path, args)
+    index.update(player_rows(d, args.season, args.week), args.week, stamp)
+    index.save(state)
+    return index
+
+
+def run_search(args: argparse.Namespace, d: dict | None = None) -> int:
+    index = league_index(args, d, DATA_PATH)
+    matches = index.search(args.player)
+    if not matches:
+        print(f'{Colors.YELLOW}No player matches {args.player!r}{Colors.ENDC}')
+        return 0
+    print(format_matches(
+        (index.rows[playerId] for playerId, _ in matches), args.team_id,
+    ))
+    return 0
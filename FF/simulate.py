@@ -0,0 +1,336 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import functools
+import math
+import operator
+import random
+import statistics
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+
+SIMULATIONS = 100000
+BATCH_SIZE = 10000
+PLAYOFF_TEAMS = 4
+DEFAULT_MEAN = 100.0
+DEFAULT_STDEV = 20.0
+
+# Scores are drawn with random.choices from a per-team table of stratified
+# normal quantiles, which is far cheaper than random.gauss per score.
+_Z_STEPS = 4096
+
+
+class TeamState(NamedTuple):
+    TID: int
+    abbrev: str
+    wins: int
+    losses: int
+    ties: int
+    points_for: float
+    mean: float
+    stdev: float
+    playoffPct: float
+
+
+class SimResult(NamedTuple):
+    TID: int
+    abbrev: str
+    wins: int
+    losses: int
+    ties: int
+    playoffPct: float
+    sim_playoffPct: float
+    seeds: list[float]
+    mean_wins: float
+
+
+def _inv_cdf(p: float) -> float:
+    # statistics.NormalDist is 3.8+, so bisect on erf instead.
+    lo, hi = -8.0, 8.0
+    for _ in range(50):
+        mid = (lo + hi) / 2
+        if .5 * (1 + math.erf(mid / math.sqrt(2))) < p:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+@functools.lru_cache(maxsize=None)
+def _quantiles() -> tuple[float, ...]:
+    return tuple(_inv_cdf((i + .5) / _Z_STEPS) for i in range(_Z_STEPS))
+
+
+def _is_regular(matchup: dict) -> bool:
+    return (
+        'away' in matchup and
+        matchup.get('playoffTierType', 'NONE') == 'NONE'
+    )
+
+
+def _is_decided(matchup: dict) -> bool:
+    return matchup['winner'] in ('HOME', 'AWAY', 'TIE')
+
+
+def team_states(d: dict) -> dict[int, TeamState]:
+    teams = {
+        t['id']: (
+            t.get('abbrev', str(t['id'])),
+            t.get('currentSimulationResults', {}).get('playoffPct', 0),
+        )
+        for t in d.get('teams', [])
+    }
+    record: dict[int, list[int]] = {}
+    scores: dict[int, list[float]] = {}
+    for matchup in d.get('schedule', []):
+        if not _is_regular(matchup):
+            continue
+        home = matchup['home']['teamId']
+        away = matchup['away']['teamId']
+        for TID in (home, away):
+            record.setdefault(TID, [0, 0, 0])
+            scores.setdefault(TID, [])
+        if not _is_decided(matchup):
+            continue
+        scores[home].append(matchup['home']['totalPoints'])
+        scores[away].append(matchup['away']['totalPoints'])
+        if matchup['winner'] == 'HOME':
+            record[home][0] += 1
+            record[away][1] += 1
+        elif matchup['winner'] == 'AWAY':
+            record[away][0] += 1
+            record[home][1] += 1
+        else:
+            record[home][2] += 1
+            record[away][2] += 1
+
+    league_scores = [s for team in scores.values() for s in team]
+    league_mean = (
+        statistics.mean(league_scores) if league_scores else DEFAULT_MEAN
+    )
+    league_stdev = (
+        statistics.stdev(league_scores) if len(league_scores) >= 2
+        else DEFAULT_STDEV
+    )
+
+    states = {}
+    for TID in sorted(set(record) | set(teams)):
+        abbrev, playoffPct = teams.get(TID, (str(TID), 0))
+        wins, losses, ties = record.get(TID, [0, 0, 0])
+        s = scores.get(TID, [])
+        states[TID] = TeamState(
+            TID=TID,
+            abbrev=abbrev,
+            wins=wins,
+            losses=losses,
+            ties=ties,
+            points_for=sum(s),
+            mean=statistics.mean(s) if s else league_mean,
+            stdev=statistics.stdev(s) if len(s) >= 2 else league_stdev,
+            playoffPct=round(playoffPct * 100, 2),
+        )
+    return states
+
+
+def remaining_matchups(d: dict) -> list[tuple[int, int]]:
+    return [
+        (matchup['home']['teamId'], matchup['away']['teamId'])
+        for matchup in d.get('schedule', [])
+        if _is_regular(matchup) and not _is_decided(matchup)
+    ]
+
+
+def _h2h_pairs(d: dict) -> dict[tuple[int, int], int]:
+    """Head-to-head half wins already banked, keyed on (team, opponent):
+    2 for a win, 1 for a tie.
+    """
+    pairs: dict[tuple[int, int], int] = {}
+    for matchup in d.get('schedule', []):
+        if not _is_regular(matchup) or not _is_decided(matchup):
+            continue
+        home = matchup['home']['teamId']
+        away = matchup['away']['teamId']
+        halves = {'HOME': (2, 0), 'AWAY': (0, 2), 'TIE': (1, 1)}
+        for pair, half in zip(
+            ((home, away), (away, home)), halves[matchup['winner']],
+        ):
+            if half:
+                pairs[pair] = pairs.get(pair, 0) + half
+    return pairs
+
+
+def _break_h2h_ties(
+    order: list[int],
+    wins: tuple[int, ...],
+    pf: tuple[float, ...],
+    h2h: dict[tuple[int, int], list[int]],
+    i: int,
+) -> list[int]:
+    """Reorder runs of teams level on wins by head-to-head, then PF.
+
+    `h2h` maps (team, opponent) to that pairing's half wins per
+    simulation of the batch; `i` selects the simulation.
+    """
+    start = 0
+    n = len(order)
+    while start < n:
+        end = start + 1
+        while end < n and wins[order[end]] == wins[order[start]]:
+            end += 1
+        if end - start > 1:
+            group = order[start:end]
+            order[start:end] = sorted(
+                group,
+                key=lambda t: (
+                    sum(h2h[(t, o)][i] for o in group if (t, o) in h2h),
+                    pf[t],
+                ),
+                reverse=True,
+            )
+        start = end
+    return order
+
+
+def simulate_season(
+    d: dict,
+    sims: int = SIMULATIONS,
+    playoff_teams: int | None = None,
+    batch_size: int = BATCH_SIZE,
+    seed: int | None = None,
+) -> list[SimResult]:
+    states = team_states(d)
+    if not states:
+        raise SystemExit(
+            f'{Colors.RED}No schedule data to simulate. '
+            f'Please try pulling (-p) again.{Colors.ENDC}',
+        )
+    settings = d.get('settings', {}).get('scheduleSettings', {})
+    if playoff_teams is None:
+        playoff_teams = settings.get('playoffTeamCount', PLAYOFF_TEAMS)
+    playoff_teams = min(playoff_teams, len(states))
+    use_h2h = settings.get('playoffSeedingRule') == 'H2H_RECORD'
+
+    TIDs = list(states)
+    index = {TID: i for i, TID in enumerate(TIDs)}
+    n = len(TIDs)
+    games = [(index[h], index[a]) for h, a in remaining_matchups(d)]
+    banked_h2h = {
+        (index[t], index[o]): c
+        for (t, o), c in _h2h_pairs(d).items()
+    }
+    # Wins are tracked in half-win units so ties stay integral.
+    base_wins = [2 * states[t].wins + states[t].ties for t in TIDs]
+    base_pf = [states[t].points_for for t in TIDs]
+    means = [states[t].mean for t in TIDs]
+    stdevs = [states[t].stdev for t in TIDs]
+
+    tables = [
+        [m + sd * z for z in _quantiles()]
+        for m, sd in zip(means, stdevs)
+    ]
+
+    rng = random.Random(seed)
+    seed_counts = [[0] * n for _ in range(n)]
+    win_totals = [0] * n
+    done = 0
+    while done < sims:
+        B = min(batch_size, sims - done)
+        wins = [[0] * B for _ in range(n)]
+        pf = [[p] * B for p in base_pf]
+        h2h = {pair: [c] * B for pair, c in banked_h2h.items()}
+        for h, a in games:
+            home = rng.choices(tables[h], k=B)
+            away = rng.choices(tables[a], k=B)
+            # Half wins: 2 for a win, 1 each for a tie.
+            home_won = list(
+                map(
+                    operator.add, map(operator.gt, home, away),
+                    map(operator.ge, home, away),
+                ),
+            )
+            away_won = list(map((2).__sub__, home_won))
+            wins[h] = list(map(operator.add, wins[h], home_won))
+            wins[a] = list(map(operator.add, wins[a], away_won))
+            pf[h] = list(map(operator.add, pf[h], home))
+            pf[a] = list(map(operator.add, pf[a], away))
+            if use_h2h:
+                h2h[(h, a)] = list(
+                    map(operator.add, h2h.get((h, a), [0] * B), home_won),
+                )
+                h2h[(a, h)] = list(
+                    map(operator.add, h2h.get((a, h), [0] * B), away_won),
+                )
+
+        for t in range(n):
+            win_totals[t] += base_wins[t] * B + sum(wins[t])
+            wins[t] = [base_wins[t] + w for w in wins[t]]
+        # Points for never reaches 1e7, so one float orders by wins then PF.
+        keys = [
+            [w * 1e7 + p for w, p in zip(wins[t], pf[t])]
+            for t in range(n)
+        ]
+        for i, row in enumerate(zip(*keys)):
+            order = sorted(range(n), key=row.__getitem__, reverse=True)
+            if use_h2h:
+                order = _break_h2h_ties(
+                    order,
+                    tuple(w[i] for w in wins),
+                    tuple(p[i] for p in pf),
+                    h2h,
+                    i,
+                )
+            for place, t in enumerate(order):
+                seed_counts[t][place] += 1
+        done += B
+
+    return [
+        SimResult(
+            TID=TID,
+            abbrev=states[TID].abbrev,
+            wins=states[TID].wins,
+            losses=states[TID].losses,
+            ties=states[TID].ties,
+            playoffPct=states[TID].playoffPct,
+            sim_playoffPct=round(
+                sum(seed_counts[t][:playoff_teams]) / sims * 100, 2,
+            ),
+            seeds=[
+                round(c / sims * 100, 2)
+                for c in seed_counts[t][:playoff_teams]
+            ],
+            mean_wins=round(win_totals[t] / sims / 2, 2),
+        )
+        for t, TID in enumerate(TIDs)
+    ]
+
+
+def print_simulation(results: list[SimResult], TID: int) -> None:
+    playoff_teams = len(results[0].seeds) if results else 0
+    header = ('{:<7}{:<9}{:>7}{:>7}{:>7}').format(
+        'Team', 'Record', 'W', 'PO%', 'SIM%',
+    )
+    seeds = ''.join(f'{"#" + str(s + 1):>7}' for s in range(playoff_teams))
+    print(header + seeds)
+    print(Box.DOUBLE_LINE*(len(header) + len(seeds)))
+    results = sorted(
+        results, key=operator.attrgetter('sim_playoffPct'), reverse=True,
+    )
+    for r in results:
+        color = Colors.CYAN if r.TID == TID else ''
+        end = Colors.ENDC if color else ''
+        record = f'{r.wins}-{r.losses}-{r.ties}'
+        row = ('{:<7}{:<9}{:>7}{:>7}{:>7}').format(
+            r.abbrev, record, r.mean_wins, r.playoffPct, r.sim_playoffPct,
+        )
+        print(color + row + ''.join(f'{s:>7}' for s in r.seeds) + end)
+
+
+def run_simulation(d: dict, args: argparse.Namespace) -> int:
+    print(f'Simulating {args.simulate} seasons...')
+    results = simulate_season(
+        d, sims=args.simulate, playoff_teams=args.playoff_teams,
+    )
+    print_simulation(results, args.team_id)
+    return 0
@@ -0,0 +1,193 @@
+"""Strength of schedule, points against and all-play records.
+
+The regular season is laid out once as teams × periods matrices (score,
+opponent, result), and every figure is a pass over their rows and
+columns: all-play records rank each period's scores once instead of
+pairing every team with every other, so histories of many seasons cost
+time linear in their games.
+"""
+from __future__ import annotations  # python3.7+
+
+import bisect
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+
+RESULTS = {'win': 1.0, 'loss': 0.0, 'tie': .5}
+
+
+class ScheduleMatrix(NamedTuple):
+    TIDs: list[int]
+    periods: list[Any]
+    # scores[i][j]: team i's points in period j, None before it's decided
+    scores: list[list[float | None]]
+    # opponents[i][j]: the row of team i's opponent in period j, or -1
+    opponents: list[list[int]]
+    # results[i][j]: 1 win, .5 tie, 0 loss, None undecided or no game
+    results: list[list[float | None]]
+
+
+class TeamSOS(NamedTuple):
+    TID: int
+    wins: int
+    losses: int
+    ties: int
+    all_play: tuple[int, int, int]
+    points_for: float
+    points_against: float
+    # Mean all-play win % of the opponents played, and still to play
+    sos: float | None
+    remaining_sos: float | None
+    remaining: int
+
+
+def _is_regular(matchup: dict) -> bool:
+    return (
+        'away' in matchup and 'home' in matchup and
+        matchup.get('playoffTierType', 'NONE') == 'NONE'
+    )
+
+
+def schedule_matrix(
+    schedule: list[dict],
+    key: Callable[[dict], Any] = lambda m: m['matchupPeriodId'],
+) -> ScheduleMatrix:
+    """The regular season matchups of `schedule` as matrices, one column
+    per distinct `key` (the matchup period; e.g. (season, period) for a
+    history of several seasons).
+    """
+    matchups = [m for m in schedule if _is_regular(m)]
+    TIDs = sorted({
+        m[side]['teamId'] for m in matchups for side in ('home', 'away')
+    })
+    periods = sorted({key(m) for m in matchups})
+    row = {TID: i for i, TID in enumerate(TIDs)}
+    column = {period: j for j, period in enumerate(periods)}
+    scores: list[list[float | None]] = [[None] * len(periods) for _ in TIDs]
+    opponents = [[-1] * len(periods) for _ in TIDs]
+    results: list[list[float | None]] = [
+        [None] * len(periods) for _ in TIDs
+    ]
+    for m in matchups:
+        j = column[key(m)]
+        home = row[m['home']['teamId']]
+        away = row[m['away']['teamId']]
+        opponents[home][j] = away
+        opponents[away][j] = home
+        winner = m.get('winner', 'UNDECIDED')
+        if winner not in ('HOME', 'AWAY', 'TIE'):
+            continue
+        scores[home][j] = m['home']['totalPoints']
+        scores[away][j] = m['away']['totalPoints']
+        if winner == 'TIE':
+            results[home][j] = results[away][j] = RESULTS['tie']
+        else:
+            results[home][j] = RESULTS['win' if winner == 'HOME' else 'loss']
+            results[away][j] = RESULTS['win' if winner == 'AWAY' else 'loss']
+    return ScheduleMatrix(TIDs, periods, scores, opponents, results)
+
+
+def all_play(matrix: ScheduleMatrix) -> list[tuple[int, int, int]]:
+    """Each team's record had it played every team every period."""
+    records = [[0, 0, 0] for _ in matrix.TIDs]
+    for j in range(len(matrix.periods)):
+        column = [row[j] for row in matrix.scores]
+        ranked = sorted(s for s in column if s is not None)
+        n = len(ranked)
+        for i, s in enumerate(column):
+            if s is None:
+                continue
+            below = bisect.bisect_left(ranked, s)
+            above = n - bisect.bisect_right(ranked, s)
+            records[i][0] += below
+            records[i][1] += above
+            records[i][2] += n - below - above - 1
+    return [(w, l, t) for w, l, t in records]
+
+
+def _pct(record: tuple[int, int, int]) -> float | None:
+    games = sum(record)
+    return (record[0] + record[2] / 2) / games if games else None
+
+
+def team_sos(matrix: ScheduleMatrix) -> list[TeamSOS]:
+    """Every team's record, points, all-play record and strength of
+    schedule, in `matrix.TIDs` order.
+    """
+    records = all_play(matrix)
+    strength = [_pct(r) for r in records]
+    teams = []
+    for i, TID in enumerate(matrix.TIDs):
+        counts = {result: 0 for result in RESULTS.values()}
+        points_for = points_against = 0.0
+        played: list[float] = []
+        to_play: list[float] = []
+        remaining = 0
+        for j, result in enumerate(matrix.results[i]):
+            op = matrix.opponents[i][j]
+            if op < 0:
+                continue
+            if result is None:
+                remaining += 1
+                opponent = strength[op]
+                if opponent is not None:
+                    to_play.append(opponent)
+                continue
+            counts[result] += 1
+            points_for += matrix.scores[i][j] or 0.0
+            points_against += matrix.scores[op][j] or 0.0
+            played.append(strength[op] or 0.0)
+        teams.append(TeamSOS(
+            TID,
+            counts[RESULTS['win']],
+            counts[RESULTS['loss']],
+            counts[RESULTS['tie']],
+            records[i],
+            round(points_for, 2),
+            round(points_against, 2),
+            sum(played) / len(played) if played else None,
+            sum(to_play) / len(to_play) if to_play else None,
+            remaining,
+        ))
+    return teams
+
+
+def _fraction(value: float | None) -> str:
+    return '-' if value is None else f'{value:.3f}'.lstrip('0')
+
+
+def format_sos(
+    teams: list[TeamSOS],
+    abbrevs: dict[int, str],
+    TID: int,
+) -> str:
+    """Teams by all-play win %, best first."""
+    line = '{:<7}{:<9}{:<11}{:>8}{:>8}{:>7}{:>9}'
+    header = line.format(
+        'Team', 'Record', 'All-play', 'PF', 'PA', 'SOS', 'Rem SOS',
+    )
+    lines = [header, Box.DOUBLE_LINE*len(header)]
+    for t in sorted(teams, key=lambda t: (-(_pct(t.all_play) or 0), t.TID)):
+        color = Colors.CYAN if t.TID == TID else ''
+        end = Colors.ENDC if color else ''
+        row = line.format(
+            abbrevs.get(t.TID, str(t.TID)),
+            f'{t.wins}-{t.losses}-{t.ties}',
+            '-'.join(map(str, t.all_play)),
+            round(t.points_for, 1),
+            round(t.points_against, 1),
+            _fraction(t.sos),
+            _fraction(t.remaining_sos),
+        )
+        lines.append(color + row + end)
+    return '\n'.join(lines)
+
+
+def league_sos(d: dict, TID: int) -> str:
+    """The strength of schedule table of snapshot `d`."""
+    abbrevs = {t['id']: t.get('abbrev', str(t['id'])) for t in d['teams']}
+    matrix = schedule_matrix(d.get('schedule', []))
+    return format_sos(team_sos(matrix), abbrevs, TID)
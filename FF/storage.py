@@ -0,0 +1,565 @@
+from __future__ import annotations  # python3.7+
+
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Any
+from typing import IO
+from typing import Iterator
+from typing import NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (windows)
+    fcntl = None  # type: ignore
+    import msvcrt
+
+DATA_ENV = 'FF_DATA_DIR'
+SNAPSHOT_RE = re.compile(
+    r'^FF_(?P<year>\d+)_wk(?P<week>\d+)_(?P<LID>\d+)\.json$',
+)
+# ff-backfill's checkpoints; the seasons they list are kept.
+BACKFILL_RE = re.compile(r'^FF_backfill_(?P<LID>\d+)\.json$')
+# Temp files older than this were left by a crashed writer.
+TMP_MAX_AGE = 60 * 60
+# Snapshots keep their teams, players and stats in packs of blocks
+# under this directory; see write_snapshot().
+BLOCKS = 'blocks'
+REF = '$block'
+PACKS = '$packs'
+# The manifest's entry digests for its own week; see entry_digests().
+ENTRIES = '$entries'
+# Each manifest's packs, as of the last gc; see _sweep().
+REFS = 'refs.json'
+
+
+def data_dir() -> str:
+    if os.environ.get(DATA_ENV):
+        return os.environ[DATA_ENV]
+    base = os.environ.get('XDG_DATA_HOME') or os.path.join(
+        os.path.expanduser('~'), '.local', 'share',
+    )
+    return os.path.join(base, 'ff')
+
+
+def _try_lock(f: IO[str]) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover (windows)
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _lock(f: IO[str]) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    # msvcrt.LK_LOCK gives up after ten seconds.
+    while True:  # pragma: no cover (windows)
+        try:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+
+def _unlock(f: IO[str]) -> None:
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:  # pragma: no cover (windows)
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def locked(path: str) -> Iterator[bool]:
+    """Hold an exclusive advisory lock on the file `path` (created if
+    needed), waiting for any other holder.
+
+    Yields True when another process or thread held the lock first.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a+') as f:
+        waited = not _try_lock(f)
+        if waited:
+            _lock(f)
+        try:
+            yield waited
+        finally:
+            _unlock(f)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str, mode: str = 'w') -> Iterator[IO[Any]]:
+    """Open a temp file beside `path` for writing and, once the block
+    exits cleanly, fsync it and rename it over `path`.
+
+    Readers see either the old file or the new one, never a partial
+    write; on error `path` is left untouched.
+    """
+    tmp = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    try:
+        with open(tmp, mode) as wf:
+            yield wf
+            wf.flush()
+            os.fsync(wf.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    _fsync_dir(os.path.dirname(path) or '.')
+
+
+def _fsync_dir(path: str) -> None:
+    # Makes the rename itself durable; not possible on every platform.
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def touch(path: str) -> None:
+    """Mark `path` used now for eviction, leaving its mtime alone."""
+    with contextlib.suppress(OSError):
+        st = os.stat(path)
+        os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+
+
+def _block_hash(block: Any) -> str:
+    data = json.dumps(block, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+def split(d: dict) -> tuple[dict, dict[str, Any]]:
+    """`d` as a manifest, and the blocks it references by content hash.
+
+    Each team's metadata, each roster player's details and each of their
+    stat entries is a block. The manifest keeps the rest: a team is
+    {"$block": hash, "id": id, "roster": ...} and a player {"$block":
+    hash, "stats": [hash, ...]}. Unchanged players and past stat entries are
+    the same blocks from one week to the next. `d` is left as it was.
+    """
+    blocks: dict[str, Any] = {}
+
+    def store(block: Any) -> str:
+        h = _block_hash(block)
+        blocks[h] = block
+        return h
+
+    teams = []
+    for team in d['teams']:
+        team = dict(team)
+        roster = team.pop('roster', None)
+        ref: dict[str, Any] = {REF: store(team)}
+        if 'id' in team:
+            ref['id'] = team['id']
+        if roster is not None:
+            entries = []
+            for e in roster.get('entries', []):
+                pool = e['playerPoolEntry']
+                player = dict(pool['player'])
+                stats = player.pop('stats', None)
+                player_ref: dict[str, Any] = {REF: store(player)}
+                if stats is not None:
+                    player_ref['stats'] = [store(s) for s in stats]
+                entries.append({**e, 'playerPoolEntry': {
+                    **pool, 'player': player_ref,
+                }})
+            ref['roster'] = {**roster, 'entries': entries}
+        teams.append(ref)
+    return {**d, 'teams': teams}, blocks
+
+
+def join(manifest: dict, blocks: dict[str, Any]) -> dict:
+    """Rebuild the document split() took apart, in place."""
+    seen: set[str] = set()
+
+    def block(h: str) -> Any:
+        try:
+            b = blocks[h]
+        except KeyError:
+            raise ValueError(f'Snapshot block {h} is missing')
+        if h in seen:
+            # Equal blocks in two places must not share one object.
+            return copy.deepcopy(b)
+        seen.add(h)
+        return b
+
+    teams = []
+    for ref in manifest['teams']:
+        team = block(ref.pop(REF))
+        team.update(ref)
+        if 'roster' in ref:
+            for e in ref['roster'].get('entries', []):
+                pool = e['playerPoolEntry']
+                player_ref = pool['player']
+                player = pool['player'] = block(player_ref[REF])
+                if 'stats' in player_ref:
+                    player['stats'] = [block(h) for h in player_ref['stats']]
+        teams.append(team)
+    manifest['teams'] = teams
+    return manifest
+
+
+def _pack_index(store: str) -> dict[str, str]:
+    """Every stored block's hash and the pack holding it."""
+    index = {}
+    try:
+        with os.scandir(store) as it:
+            names = [e.name for e in it if e.name.endswith('.idx')]
+    except FileNotFoundError:
+        return {}
+    for name in names:
+        pack = name[:-len('.idx')]
+        with contextlib.suppress(OSError):
+            with open(os.path.join(store, name)) as rf:
+                for h in rf.read().split():
+                    index[h] = pack
+    return index
+
+
+def write_snapshot(path: str, d: dict) -> None:
+    """Save `d` to `path` as a manifest whose blocks are stored once.
+
+    Blocks not already in the store go into one new pack in blocks/
+    beside `path`: a zlib compressed JSON object of hash to block, and a
+    .idx listing its hashes. The manifest, plain JSON, lists the packs
+    it needs under "$packs", and when `path` is named for a week, its
+    entry digests for that week under "$entries". Documents without
+    teams are written as they are.
+    """
+    if not isinstance(d.get('teams'), list):
+        with atomic_write(path) as wf:
+            json.dump(d, wf)
+        return
+    manifest, blocks = split(d)
+    match = SNAPSHOT_RE.match(os.path.basename(path))
+    if match:
+        year, week = int(match['year']), int(match['week'])
+        manifest[ENTRIES] = {
+            'period': [year, week],
+            'teams': _entry_digests(d, year, week),
+        }
+    store = os.path.join(os.path.dirname(path) or '.', BLOCKS)
+    with locked(os.path.join(store, '.lock')):
+        index = _pack_index(store)
+        packs = {index[h] for h in blocks if h in index}
+        new = {h: b for h, b in blocks.items() if h not in index}
+        if new:
+            data = json.dumps(new, separators=(',', ':')).encode()
+            pack = hashlib.blake2b(data, digest_size=16).hexdigest()
+            base = os.path.join(store, pack)
+            # The index last: a pack without one is never reused.
+            with atomic_write(f'{base}.pack', 'wb') as wf:
+                wf.write(zlib.compress(data))
+            with atomic_write(f'{base}.idx') as wf:
+                wf.write('\n'.join(new))
+            packs.add(pack)
+        with atomic_write(path) as wf:
+            json.dump(
+                {PACKS: sorted(packs), **manifest}, wf,
+                separators=(',', ':'),
+            )
+
+
+def read_snapshot(path: str) -> dict:
+    """The document write_snapshot() saved to `path` (or a plain one)."""
+    with open(path) as rf:
+        d = json.load(rf)
+    d.pop(ENTRIES, None)
+    packs = d.pop(PACKS, None)
+    if packs is None:
+        return d
+    store = os.path.join(os.path.dirname(path) or '.', BLOCKS)
+    blocks: dict[str, Any] = {}
+    for pack in packs:
+        with open(os.path.join(store, f'{pack}.pack'), 'rb') as rf:
+            try:
+                blocks.update(json.loads(zlib.decompress(rf.read())))
+            except zlib.error as e:
+                raise ValueError(f'Snapshot pack {pack} is corrupt: {e}')
+    return join(d, blocks)
+
+
+def entry_digest(e: dict, year: int, week: int) -> str:
+    """A digest of what FF.diff compares in roster entry `e`: its slot,
+    injury status and projection for `week` of season `year`.
+    """
+    player = e['playerPoolEntry']['player']
+    projections = [
+        stat['appliedTotal'] for stat in player.get('stats', [])
+        if (
+            stat['seasonId'] == year and
+            stat['scoringPeriodId'] == week and
+            stat['statSourceId'] == 1 and
+            stat['statSplitTypeId'] == 1
+        )
+    ]
+    return _block_hash([
+        e['lineupSlotId'], player.get('injuryStatus', 'ACTIVE'), projections,
+    ])
+
+
+def _entry_digests(d: dict, year: int, week: int) -> dict[int, dict[int, str]]:
+    return {
+        team['id']: {
+            e['playerId']: entry_digest(e, year, week)
+            for e in team.get('roster', {}).get('entries', [])
+        }
+        for team in d.get('teams', [])
+    }
+
+
+def entry_digests(
+    path: str,
+    year: int,
+    week: int,
+) -> dict[int, dict[int, str]]:
+    """Each team's roster entries by playerId, as their entry_digest()
+    for `week` of season `year`.
+
+    A manifest's own week is read from its "$entries" without reading
+    any pack; other weeks and plain snapshots are read in full.
+    """
+    with open(path) as rf:
+        d = json.load(rf)
+    digests = d.get(ENTRIES)
+    if digests is not None and digests['period'] == [year, week]:
+        return {
+            int(TID): {
+                int(playerId): h for playerId, h in entries.items()
+            }
+            for TID, entries in digests['teams'].items()
+        }
+    if PACKS in d:
+        d = read_snapshot(path)
+    return _entry_digests(d, year, week)
+
+
+class Retention(NamedTuple):
+    """How many snapshots gc() keeps.
+
+    The `keep` latest weeks of each league, and the seasons ff-backfill
+    pulled for it, are always kept. Other snapshots go once unused for
+    `max_age` seconds, then least recently used first while they take
+    more than `max_bytes`. Block packs go once no snapshot needs them.
+    """
+    max_bytes: int = 256 * 1024 * 1024
+    max_age: float = 90 * 24 * 60 * 60
+    keep: int = 2
+
+    @classmethod
+    def from_env(cls) -> Retention:
+        """Defaults overridden by FF_DATA_MAX_MB, FF_DATA_MAX_DAYS and
+        FF_DATA_KEEP.
+        """
+        policy = cls()
+        try:
+            if os.environ.get('FF_DATA_MAX_MB'):
+                policy = policy._replace(
+                    max_bytes=int(
+                        float(os.environ['FF_DATA_MAX_MB']) * 1024 * 1024,
+                    ),
+                )
+            if os.environ.get('FF_DATA_MAX_DAYS'):
+                policy = policy._replace(
+                    max_age=float(os.environ['FF_DATA_MAX_DAYS']) * 86400,
+                )
+            if os.environ.get('FF_DATA_KEEP'):
+                policy = policy._replace(keep=int(os.environ['FF_DATA_KEEP']))
+        except ValueError as e:
+            raise SystemExit(f'Bad retention setting: {e}')
+        return policy
+
+
+class _Snapshot(NamedTuple):
+    used: float
+    size: int
+    path: str
+
+
+def gc(
+    directory: str,
+    policy: Retention = Retention(),
+    now: float | None = None,
+) -> dict[str, int]:
+    """Remove snapshots from `directory` past the retention `policy`.
+
+    A scandir and a stat per file, and a read of each manifest written
+    since the last gc, so cheap enough to run after every save.
+    Snapshots whose lock is held (a pull in progress) are skipped.
+    """
+    now = time.time() if now is None else now
+    leagues: dict[str, list[tuple[int, int, _Snapshot]]] = {}
+    backfilled: dict[str, set[int]] = {}
+    total = 0
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if entry.name.endswith('.tmp'):
+            with contextlib.suppress(OSError):
+                if now - entry.stat().st_mtime > TMP_MAX_AGE:
+                    os.unlink(entry.path)
+            continue
+        m = BACKFILL_RE.match(entry.name)
+        if m:
+            backfilled[m['LID']] = _backfilled(entry.path)
+            continue
+        m = SNAPSHOT_RE.match(entry.name)
+        if not m:
+            continue
+        st = entry.stat()
+        snapshot = _Snapshot(
+            max(st.st_atime, st.st_mtime), st.st_size, entry.path,
+        )
+        leagues.setdefault(m['LID'], []).append(
+            (int(m['year']), int(m['week']), snapshot),
+        )
+        total += st.st_size
+    candidates: list[_Snapshot] = []
+    pinned = 0
+    for LID, snapshots in leagues.items():
+        snapshots.sort(reverse=True)
+        seasons = backfilled.get(LID, set())
+        for year, _, snapshot in snapshots[policy.keep:]:
+            if year in seasons:
+                pinned += snapshot.size
+            else:
+                candidates.append(snapshot)
+    candidates.sort()
+    # Kept whatever the size, so they don't count against it.
+    total -= pinned
+
+    stats = {'removed': 0, 'removed_bytes': 0}
+    for snapshot in candidates:
+        if now - snapshot.used <= policy.max_age and total <= policy.max_bytes:
+            # Everything after this was used more recently.
+            break
+        if _remove(snapshot.path):
+            total -= snapshot.size
+            stats['removed'] += 1
+            stats['removed_bytes'] += snapshot.size
+    stats['kept'] = sum(len(s) for s in leagues.values()) - stats['removed']
+    stats['kept_bytes'] = total + pinned
+    removed_bytes, kept_bytes = _sweep(directory)
+    stats['removed_bytes'] += removed_bytes
+    stats['kept_bytes'] += kept_bytes
+    return stats
+
+
+def _backfilled(path: str) -> set[int]:
+    """The seasons an ff-backfill checkpoint has saved weeks of."""
+    try:
+        with open(path) as rf:
+            return {int(year) for year in json.load(rf).get('done', {})}
+    except (OSError, ValueError, AttributeError):
+        return set()
+
+
+def _manifest_packs(path: str) -> list[str]:
+    with open(path) as rf:
+        return json.load(rf).get(PACKS, [])
+
+
+def _load_refs(store: str) -> dict[str, list]:
+    try:
+        with open(os.path.join(store, REFS)) as rf:
+            refs = json.load(rf)
+    except (OSError, ValueError):
+        return {}
+    return refs if isinstance(refs, dict) else {}
+
+
+def _sweep(directory: str) -> tuple[int, int]:
+    """Remove the packs no snapshot in `directory` lists; returns the
+    bytes removed and kept.
+
+    The packs each manifest lists are kept in blocks/refs.json with the
+    manifest's inode, size and mtime, so only manifests written since
+    the last sweep are read.
+    """
+    store = os.path.join(directory, BLOCKS)
+    if not os.path.isdir(store):
+        return 0, 0
+    removed = kept = 0
+    # Saves hold this lock from reading the pack index until their
+    # manifest is written, so no pack is swept while being reused.
+    with locked(os.path.join(store, '.lock')):
+        refs = _load_refs(store)
+        found: dict[str, list] = {}
+        needed: set[str] = set()
+        with os.scandir(directory) as it:
+            manifests = [e for e in it if SNAPSHOT_RE.match(e.name)]
+        for entry in manifests:
+            try:
+                st = entry.stat()
+                stamp = [st.st_ino, st.st_size, st.st_mtime_ns]
+                cached = refs.get(entry.name)
+                if cached is not None and cached[:3] == stamp:
+                    packs = cached[3]
+                else:
+                    packs = _manifest_packs(entry.path)
+            except (FileNotFoundError, ValueError):
+                continue
+            except OSError:
+                # Can't tell what this snapshot needs; keep everything.
+                return 0, 0
+            found[entry.name] = [*stamp, packs]
+            needed.update(packs)
+        if found != refs:
+            with contextlib.suppress(OSError):
+                with atomic_write(os.path.join(store, REFS)) as wf:
+                    json.dump(found, wf, separators=(',', ':'))
+        with os.scandir(store) as it:
+            entries = list(it)
+        for entry in entries:
+            pack, ext = os.path.splitext(entry.name)
+            if ext not in ('.pack', '.idx'):
+                continue
+            size = entry.stat().st_size
+            if pack in needed:
+                kept += size
+                continue
+            with contextlib.suppress(OSError):
+                os.unlink(entry.path)
+                removed += size
+    return removed, kept
+
+
+def _remove(path: str) -> bool:
+    lock = f'{path}.lock'
+    try:
+        with open(lock, 'a+') as f:
+            if not _try_lock(f):
+                return False
+            try:
+                # The lock file stays: unlinked while held, another
+                # process could lock the old inode while a third locks
+                # a new file at the same path.
+                os.unlink(path)
+            finally:
+                _unlock(f)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,434 @@
+"""Local stand-in for the ESPN fantasy league endpoint.
+
+Serves saved snapshots (FF_{season}_wk{week}_{league}.json, as written by
+save_data) and the pro teams' game schedule (proTeamSchedules_{season}.json)
+so the pull path can be tested and load tested offline:
+
+    python -m FF.stub tests/data --port 8000 --latency 50 --error-rate .05
+    FF_BASE_URL=http://127.0.0.1:8000/apis/v3/games/ffl ff -p
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
+
+from FF.main import Colors
+from FF.storage import read_snapshot
+from FF.storage import SNAPSHOT_RE
+
+API_PATH = '/apis/v3/games/ffl'
+LEAGUE_RE = re.compile(
+    rf'^{API_PATH}/seasons/(?P<year>\d+)/segments/0/'
+    r'leagues/(?P<LID>\d+)/?$',
+)
+# Seasons before 2018, answered as a one-season list.
+HISTORY_RE = re.compile(rf'^{API_PATH}/leagueHistory/(?P<LID>\d+)/?$')
+# The pro teams' game schedule, served from proTeamSchedules_{year}.json.
+SEASON_RE = re.compile(rf'^{API_PATH}/seasons/(?P<year>\d+)/?$')
+
+# Keys every view returns.
+BASE_KEYS = ('gameId', 'id', 'scoringPeriodId', 'seasonId', 'segmentId')
+# Top-level keys each view adds to the response.
+VIEW_KEYS = {
+    'mBoxscore': ('schedule',),
+    'mDraftDetail': ('draftDetail',),
+    'mMatchup': ('schedule',),
+    'mMatchupScore': ('schedule',),
+    'mNav': ('members', 'teams'),
+    'mPositionalRatings': ('positionAgainstOpponent',),
+    'mRoster': ('teams',),
+    'mScoreboard': ('schedule',),
+    'mSettings': ('settings',),
+    'mStandings': ('teams',),
+    'mStatus': ('status',),
+    'mTeam': ('members', 'teams'),
+}
+
+
+def filter_views(d: dict, views: list[str]) -> dict:
+    keys = set(BASE_KEYS)
+    keys.add('status')
+    for view in views:
+        keys.update(VIEW_KEYS.get(view, ()))
+    return {k: v for k, v in d.items() if k in keys}
+
+
+def apply_filter(d: dict, fantasy_filter: dict, week: int | None) -> dict:
+    """Narrow `d` as the API does for an x-fantasy-filter header.
+
+    Supports teams.filterIds, schedule.filterMatchupPeriodIds,
+    players.filterStatsForTopScoringPeriodIds (the `value` latest scoring
+    periods up to `week` plus the stat ids in `additionalValue`) and
+    players.filterStatsForSourceIds / filterStatsForSplitTypeIds (this
+    season's stats of those sources and splits).
+    """
+    d = dict(d)
+    team_ids = fantasy_filter.get('teams', {}).get('filterIds')
+    if team_ids is not None and 'teams' in d:
+        keep = set(team_ids['value'])
+        d['teams'] = [t for t in d['teams'] if t['id'] in keep]
+    periods = fantasy_filter.get('schedule', {}).get(
+        'filterMatchupPeriodIds',
+    )
+    if periods is not None and 'schedule' in d:
+        keep = set(periods['value'])
+        d['schedule'] = [
+            m for m in d['schedule'] if m.get('matchupPeriodId') in keep
+        ]
+    players = fantasy_filter.get('players', {})
+    season = d.get('seasonId')
+    tests: list[Callable[..., bool]] = []
+    top = players.get('filterStatsForTopScoringPeriodIds')
+    if top is not None:
+        last = week if week is not None else d.get('scoringPeriodId', 0)
+        first = last - top.get('value', 0)
+        ids = set(top.get('additionalValue', ()))
+        tests.append(
+            lambda stat: stat['id'] in ids or (
+                first < stat['scoringPeriodId'] <= last and
+                stat.get('seasonId', season) == season
+            ),
+        )
+    for name, key in (
+        ('filterStatsForSourceIds', 'statSourceId'),
+        ('filterStatsForSplitTypeIds', 'statSplitTypeId'),
+    ):
+        if name in players:
+            values = set(players[name]['value'])
+            tests.append(
+                lambda stat, key=key, values=values: (
+                    stat.get(key) in values and
+                    stat.get('seasonId', season) == season
+                ),
+            )
+    if tests and 'teams' in d:
+        def wanted(stat: dict) -> bool:
+            return all(test(stat) for test in tests)
+        d['teams'] = [_filter_stats(t, wanted) for t in d['teams']]
+    return d
+
+
+def _filter_stats(team: dict, wanted: Any) -> dict:
+    if 'roster' not in team:
+        return team
+    entries = []
+    for e in team['roster']['entries']:
+        player = e['playerPoolEntry']['player']
+        player = {
+            **player, 'stats': [s for s in player['stats'] if wanted(s)],
+        }
+        entries.append({
+            **e, 'playerPoolEntry': {**e['playerPoolEntry'], 'player': player},
+        })
+    return {**team, 'roster': {**team['roster'], 'entries': entries}}
+
+
+class Body(NamedTuple):
+    data: bytes
+    etag: str
+
+
+class Snapshots:
+    """Snapshot lookup with response bodies cached per view set and
+    filter.
+
+    Files are re-read when their mtime changes, so snapshots can be
+    swapped while the server runs.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._docs: dict[str, tuple[float, dict]] = {}
+        self._bodies: dict[tuple[Any, ...], Body] = {}
+
+    def find(self, year: int, LID: int, week: int | None) -> str | None:
+        if week is not None:
+            path = os.path.join(
+                self.directory, f'FF_{year}_wk{week}_{LID}.json',
+            )
+            return path if os.path.exists(path) else None
+        # No scoringPeriodId: the latest saved week.
+        latest = None
+        for name in os.listdir(self.directory):
+            m = SNAPSHOT_RE.match(name)
+            if m and (int(m['year']), int(m['LID'])) == (year, LID):
+                if latest is None or int(m['week']) > latest[0]:
+                    latest = (int(m['week']), name)
+        return os.path.join(self.directory, latest[1]) if latest else None
+
+    def body(
+        self,
+        path: str,
+        views: list[str],
+        fantasy_filter: dict | None = None,
+        week: int | None = None,
+    ) -> Body:
+        mtime = os.stat(path).st_mtime
+        key = (
+            path, mtime, tuple(sorted(set(views))),
+            json.dumps(fantasy_filter, sort_keys=True), week,
+        )
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is not None:
+                return body
+            cached = self._docs.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = self._docs[path] = (mtime, read_snapshot(path))
+            d = filter_views(cached[1], views) if views else cached[1]
+            if fantasy_filter:
+                d = apply_filter(d, fantasy_filter, week)
+            data = json.dumps(d).encode()
+            body = self._bodies[key] = Body(
+                data, f'"{hashlib.sha1(data).hexdigest()}"',
+            )
+            return body
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        directory: str,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        etag: bool = True,
+        verbose: bool = False,
+        seed: int | None = None,
+    ) -> None:
+        super().__init__((host, port), StubHandler)
+        self.snapshots = Snapshots(directory)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.etag = etag
+        self.verbose = verbose
+        self.rng = random.Random(seed)
+        self.stats: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to hand to FF (--base-url / FF_BASE_URL)."""
+        host, port = self.socket.getsockname()[:2]
+        return f'http://{host}:{port}{API_PATH}'
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.stats['requests'] = self.stats.get('requests', 0) + 1
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+    def draw(self) -> tuple[float, bool]:
+        """Delay in seconds and whether to fail this request."""
+        with self._lock:
+            delay = self.latency + self.rng.uniform(0, self.jitter)
+            return delay, self.rng.random() < self.error_rate
+
+    def start(self) -> StubServer:
+        self._thread = threading.Thread(
+            target=self.serve_forever, kwargs={'poll_interval': .05},
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def __enter__(self) -> StubServer:
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+        self.server_close()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == '/__stats':
+            with self.server._lock:
+                stats = dict(self.server.stats)
+            self.send_json(200, stats)
+            return
+        delay, fail = self.server.draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.send_error_json(
+                self.server.error_status, 'Service Unavailable',
+            )
+            return
+        m = SEASON_RE.match(url.path)
+        if m:
+            self.send_pro_schedule(int(m['year']))
+            return
+        m = LEAGUE_RE.match(url.path) or HISTORY_RE.match(url.path)
+        if not m:
+            self.send_error_json(404, 'Not Found')
+            return
+        query = parse_qs(url.query)
+        history = m.re is HISTORY_RE
+        try:
+            year = int(query['seasonId'][0] if history else m['year'])
+        except (KeyError, ValueError):
+            self.send_error_json(400, 'Bad seasonId')
+            return
+        try:
+            week = int(query['scoringPeriodId'][0])
+        except KeyError:
+            week = None
+        except ValueError:
+            self.send_error_json(400, 'Bad scoringPeriodId')
+            return
+        try:
+            fantasy_filter = json.loads(
+                self.headers.get('x-fantasy-filter') or 'null',
+            )
+        except ValueError:
+            self.send_error_json(400, 'Bad x-fantasy-filter')
+            return
+        path = self.server.snapshots.find(year, int(m['LID']), week)
+        if path is None:
+            self.send_error_json(404, 'Not Found')
+            return
+        body = self.server.snapshots.body(
+            path, query.get('view', []), fantasy_filter, week,
+        )
+        etag = self.server.etag
+        if etag and self.headers.get('If-None-Match') == body.etag:
+            self.server.count(304)
+            self.send_response(304)
+            self.send_header('ETag', body.etag)
+            self.end_headers()
+            return
+        data = b'[' + body.data + b']' if history else body.data
+        self.server.count(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        if etag:
+            self.send_header('ETag', body.etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_pro_schedule(self, year: int) -> None:
+        path = os.path.join(
+            self.server.snapshots.directory, f'proTeamSchedules_{year}.json',
+        )
+        try:
+            with open(path) as rf:
+                d = json.load(rf)
+        except FileNotFoundError:
+            self.send_error_json(404, 'Not Found')
+            return
+        self.server.count(200)
+        self.send_json(200, d)
+
+    def send_json(self, status: int, d: Any) -> None:
+        body = json.dumps(d).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status: int, message: str) -> None:
+        self.server.count(status)
+        self.send_json(status, {
+            'messages': [message],
+            'details': [{'message': message, 'type': 'GENERAL_ERROR'}],
+        })
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Local ESPN API stand-in')
+    parser.add_argument(
+        'directory',
+        help='Directory of FF_{season}_wk{week}_{league}.json snapshots',
+    )
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='Delay added to every response (ms)',
+    )
+    parser.add_argument(
+        '--jitter', type=float, default=0.0,
+        help='Extra random delay of up to this many ms',
+    )
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help='Fraction of requests answered with --error-status',
+    )
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument(
+        '--no-etag',
+        help='Never send ETags or 304 Not Modified',
+        action='store_true',
+    )
+    parser.add_argument('--seed', type=int)
+    parser.add_argument(
+        '-v', '--verbose',
+        help='Log every request',
+        action='store_true',
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    if not os.path.isdir(args.directory):
+        raise SystemExit(
+            f'{Colors.RED}{args.directory} is not a directory{Colors.ENDC}',
+        )
+    server = StubServer(
+        args.directory,
+        host=args.host,
+        port=args.port,
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        etag=not args.no_etag,
+        verbose=args.verbose,
+        seed=args.seed,
+    )
+    print(f'Serving {args.directory} at {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,356 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import itertools
+from typing import Iterable
+from typing import NamedTuple
+
+from FF.main import Box
+from FF.main import Colors
+from FF.main import FLEX_OK
+from FF.main import Player
+from FF.main import POSITION_SPOTS
+from FF.main import Roster
+
+# Lineup slots only interact within a group: RB/WR/TE share the flex spot,
+# every other position fills its own slots.
+GROUPS = {
+    'QB': 'QB', 'RB': 'FLEX', 'WR': 'FLEX',
+    'TE': 'FLEX', 'DST': 'DST', 'K': 'K',
+}
+
+SUGGESTIONS = 10
+
+
+class Trade(NamedTuple):
+    A: int
+    B: int
+    give: tuple[int, ...]
+    get: tuple[int, ...]
+    gain_A: float
+    gain_B: float
+
+
+def build_rosters(d: dict, year: int, week: int) -> dict[int, Roster]:
+    rosters = {}
+    try:
+        for team in d['teams']:
+            roster = Roster(team['id'])
+            roster.load_team(team, year, week)
+            rosters[roster.TID] = roster
+    except KeyError as e:
+        raise SystemExit(
+            f'{Colors.RED}{type(e).__name__}: Error parsing data. '
+            f'Please try pulling (-p) again.{Colors.ENDC}',
+        )
+    return rosters
+
+
+def lineup_value(players: Iterable[tuple[str, float]]) -> float:
+    """Best starting lineup total, as picked by Roster.decide_lineup."""
+    by_pos: dict[str, list[float]] = {}
+    for pos, value in players:
+        by_pos.setdefault(pos, []).append(value)
+    total = 0.0
+    flex: list[float] = []
+    for pos, values in by_pos.items():
+        values.sort(reverse=True)
+        n = POSITION_SPOTS.get(pos, 0)
+        total += sum(values[:n])
+        if pos in FLEX_OK:
+            flex.extend(values[n:])
+    flex.sort(reverse=True)
+    return total + sum(flex[:POSITION_SPOTS['FLEX']])
+
+
+class LineupCache:
+    """Memoized lineup values for every roster configuration seen.
+
+    A roster is split into position groups and each group's value is
+    cached on the frozenset of its player ids, so a trade only recomputes
+    the groups it touches and repeats of a group are free.
+    """
+
+    def __init__(self, rosters: dict[int, Roster], key: str = 'proj') -> None:
+        self.rosters = rosters
+        self.key = key
+        self.players: dict[int, Player] = {}
+        self.groups: dict[int, dict[str, frozenset[int]]] = {}
+        self._values: dict[frozenset[int], float] = {}
+        self.hits = 0
+        self.misses = 0
+        for TID, roster in rosters.items():
+            groups: dict[str, set[int]] = {g: set() for g in GROUPS.values()}
+            for p in roster.roster:
+                self.players[p.playerId] = p
+                if p.pos in GROUPS:
+                    groups[GROUPS[p.pos]].add(p.playerId)
+            self.groups[TID] = {g: frozenset(ids) for g, ids in groups.items()}
+
+    def worth(self, playerId: int) -> float:
+        return getattr(self.players[playerId], self.key, 0) or 0
+
+    def group_value(self, ids: frozenset[int]) -> float:
+        try:
+            value = self._values[ids]
+            self.hits += 1
+        except KeyError:
+            self.misses += 1
+            value = lineup_value(
+                (self.players[i].pos, self.worth(i)) for i in ids
+            )
+            self._values[ids] = value
+        return value
+
+    def value(
+        self,
+        TID: int,
+        out: Iterable[int] = (),
+        into: Iterable[int] = (),
+    ) -> float:
+        out_ids = frozenset(out)
+        into_ids = frozenset(into)
+        total = 0.0
+        for group, ids in self.groups[TID].items():
+            if out_ids or into_ids:
+                ids = (ids - out_ids) | frozenset(
+                    i for i in into_ids
+                    if GROUPS.get(self.players[i].pos) == group
+                )
+            total += self.group_value(ids)
+        return total
+
+    def thresholds(
+        self,
+        TID: int,
+        out: Iterable[int] = (),
+    ) -> dict[str, float]:
+        """Lowest starter value a newcomer at each position must beat,
+        once the players `out` are gone.
+        """
+        out_ids = frozenset(out)
+        by_pos: dict[str, list[float]] = {pos: [] for pos in GROUPS}
+        for ids in self.groups[TID].values():
+            for i in ids - out_ids:
+                by_pos[self.players[i].pos].append(self.worth(i))
+        flex = []
+        starters = {}
+        for pos, values in by_pos.items():
+            values.sort(reverse=True)
+            n = POSITION_SPOTS[pos]
+            starters[pos] = values[n - 1] if len(values) >= n else 0.0
+            if pos in FLEX_OK:
+                flex.extend(values[n:])
+        flex_value = max(flex) if flex else 0.0
+        return {
+            pos: min(value, flex_value) if pos in FLEX_OK else value
+            for pos, value in starters.items()
+        }
+
+
+def evaluate_trade(
+    cache: LineupCache,
+    A: int,
+    B: int,
+    give: Iterable[int],
+    get: Iterable[int],
+) -> Trade:
+    give = tuple(give)
+    get = tuple(get)
+    gain_A = cache.value(A, give, get) - cache.value(A)
+    gain_B = cache.value(B, get, give) - cache.value(B)
+    return Trade(A, B, give, get, round(gain_A, 2), round(gain_B, 2))
+
+
+def suggest_trades(
+    cache: LineupCache,
+    TIDs: Iterable[int] | None = None,
+    max_players: int = 2,
+) -> list[Trade]:
+    """All 1-for-1 up to max_players-for-max_players trades that improve
+    both lineups, best first.
+
+    Every player traded must beat the receiving team's weakest starter at
+    their position once the players it gives up are gone: one who can't
+    start there is a throw-in, left out of the search. At least one of
+    them must beat it with the whole roster, or that lineup can't improve.
+    A trade with the same gains as a smaller one inside it (plus an even
+    swap) is left out too.
+    """
+    TIDs = sorted(TIDs if TIDs is not None else cache.rosters)
+    thresholds = {TID: cache.thresholds(TID) for TID in TIDs}
+    # Each team's thresholds without every n of its players.
+    after = {
+        TID: {
+            out: cache.thresholds(TID, out)
+            for n in range(1, max_players + 1)
+            for out in itertools.combinations(_ids(cache, TID), n)
+        }
+        for TID in TIDs
+    }
+    base = {TID: cache.value(TID) for TID in TIDs}
+    # (A, B, give, get) to (gain_A, gain_B)
+    gains: dict[tuple, tuple[float, float]] = {}
+    for A, B in itertools.combinations(TIDs, 2):
+        upgrades_B = set(_upgrades(cache, A, thresholds[B]))
+        upgrades_A = set(_upgrades(cache, B, thresholds[A]))
+        if not upgrades_A or not upgrades_B:
+            continue
+        for n in range(1, max_players + 1):
+            # B's outgoing players to what A could give for them, and
+            # the other way round.
+            fits_B = _offers(cache, A, after[B], upgrades_B, n)
+            fits_A = _offers(cache, B, after[A], upgrades_A, n)
+            for give, gets in fits_A.items():
+                for get in gets:
+                    if give not in fits_B[get]:
+                        continue
+                    # As evaluate_trade(), with each side's value now
+                    # computed once and B's only when A gains.
+                    gain_A = round(cache.value(A, give, get) - base[A], 2)
+                    if gain_A <= 0:
+                        continue
+                    gain_B = round(cache.value(B, get, give) - base[B], 2)
+                    if gain_B > 0 and not any(
+                        gains.get((A, B, less_give, less_get)) ==
+                        (gain_A, gain_B)
+                        for less_give in itertools.combinations(give, n - 1)
+                        for less_get in itertools.combinations(get, n - 1)
+                    ):
+                        gains[A, B, give, get] = (gain_A, gain_B)
+    trades = [
+        Trade(A, B, give, get, gain_A, gain_B)
+        for (A, B, give, get), (gain_A, gain_B) in gains.items()
+    ]
+    trades.sort(
+        key=lambda t: (min(t.gain_A, t.gain_B), t.gain_A + t.gain_B),
+        reverse=True,
+    )
+    return trades
+
+
+def _ids(cache: LineupCache, TID: int) -> list[int]:
+    return [p.playerId for p in cache.rosters[TID].roster]
+
+
+def _upgrades(
+    cache: LineupCache,
+    TID: int,
+    thresholds: dict[str, float],
+) -> list[int]:
+    return [
+        p.playerId for p in cache.rosters[TID].roster
+        if p.pos in thresholds and
+        cache.worth(p.playerId) > thresholds[p.pos]
+    ]
+
+
+def _offers(
+    cache: LineupCache,
+    giver: int,
+    after: dict[tuple[int, ...], dict[str, float]],
+    upgrades: set[int],
+    n: int,
+) -> dict[tuple[int, ...], set[tuple[int, ...]]]:
+    """For each `n` players the taker could give up (keys of `after`,
+    its thresholds without them), the `n` of the giver's that would all
+    start for it and include one of `upgrades`.
+    """
+    offers = {}
+    for out, thresholds in after.items():
+        if len(out) != n:
+            continue
+        fits = _upgrades(cache, giver, thresholds)
+        offers[out] = {
+            offer for offer in itertools.combinations(fits, n)
+            if not upgrades.isdisjoint(offer)
+        }
+    return offers
+
+
+def find_players(roster: Roster, names: list[str]) -> list[int]:
+    found = []
+    for name in names:
+        name = name.lower()
+        matches = [
+            p.playerId for p in roster.roster
+            if name in (p.last.lower(), f'{p.first} {p.last}'.lower())
+        ]
+        if not matches:
+            raise SystemExit(
+                f'{Colors.RED}Player {name!r} is not on team '
+                f'{roster.TID}{Colors.ENDC}',
+            )
+        found.extend(matches[:1])
+    return found
+
+
+def _names(cache: LineupCache, ids: tuple[int, ...]) -> str:
+    return ', '.join(
+        f'{cache.players[i].first[0]}. {cache.players[i].last}'
+        for i in ids
+    )
+
+
+def _gain(value: float) -> str:
+    color = Colors.GREEN if value > 0 else Colors.RED if value < 0 else ''
+    end = Colors.ENDC if color else ''
+    return f'{color}{value:>+7.1f}{end}'
+
+
+def print_trade(cache: LineupCache, trade: Trade) -> None:
+    print(('{:<7}{:>8}{:>8}{:>7}').format('Team', 'Before', 'After', '+/-'))
+    print(Box.DOUBLE_LINE*30)
+    for TID, out, into, gain in (
+        (trade.A, trade.give, trade.get, trade.gain_A),
+        (trade.B, trade.get, trade.give, trade.gain_B),
+    ):
+        before = cache.value(TID)
+        after = cache.value(TID, out, into)
+        print(
+            f'{cache.rosters[TID].abbrev:<7}'
+            f'{round(before, 1):>8}{round(after, 1):>8}{_gain(gain)}',
+        )
+        print(f'  gives: {_names(cache, out)}')
+
+
+def print_suggestions(
+    cache: LineupCache,
+    trades: list[Trade],
+    TID: int,
+) -> None:
+    if not trades:
+        print('No trades improve both lineups.')
+        return
+    for trade in trades:
+        color = Colors.CYAN if TID in (trade.A, trade.B) else ''
+        end = Colors.ENDC if color else ''
+        A = cache.rosters[trade.A].abbrev
+        B = cache.rosters[trade.B].abbrev
+        print(
+            f'{color}{A:<5}{_gain(trade.gain_A)}  {B:<5}'
+            f'{_gain(trade.gain_B)}{end}  '
+            f'{A} gives {_names(cache, trade.give)} | '
+            f'{B} gives {_names(cache, trade.get)}',
+        )
+
+
+def run_trade(d: dict, args: argparse.Namespace) -> int:
+    rosters = build_rosters(d, args.season, args.week)
+    cache = LineupCache(rosters, key=args.trade_key)
+    if args.suggest_trades:
+        print('Searching trades...')
+        trades = suggest_trades(cache)
+        print_suggestions(cache, trades[:SUGGESTIONS], args.team_id)
+        return 0
+    for TID in (args.team_id, args.trade):
+        if TID not in rosters:
+            raise SystemExit(
+                f'{Colors.RED}Team id: {TID} does not exist{Colors.ENDC}',
+            )
+    give = find_players(rosters[args.team_id], args.give or [])
+    get = find_players(rosters[args.trade], args.get or [])
+    print_trade(
+        cache, evaluate_trade(cache, args.team_id, args.trade, give, get),
+    )
+    return 0
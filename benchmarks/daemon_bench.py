@@ -0,0 +1,58 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from benchmarks.synthetic import generate_league
+from FF.client import request
+from FF.daemon import Daemon
+from FF.main import save_data
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Daemon query latency')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    d = generate_league(teams=args.teams)
+    year, week, LID = d['seasonId'], d['scoringPeriodId'], d['id']
+    base = ['-s', str(year), '-w', str(week), '-l', str(LID), '-t', '1']
+    p1 = mock.patch('FF.main.check_cookies_exists')
+    p2 = mock.patch('FF.main.update_cookies')
+    with tempfile.TemporaryDirectory() as tmp, p1, p2:
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_data(tmp, d, year, week, LID)
+        path = os.path.join(tmp, 'ff.sock')
+        with Daemon(path, data_path=tmp) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            for name, extra in (
+                ('roster', []), ('matchup', ['-m']),
+                ('standings', ['--standings']),
+            ):
+                start = time.perf_counter()
+                request({'argv': base + extra}, path)
+                first = (time.perf_counter() - start) * 1000
+                times = []
+                for _ in range(args.queries):
+                    start = time.perf_counter()
+                    request({'argv': base + extra}, path)
+                    times.append((time.perf_counter() - start) * 1000)
+                print(
+                    f'{name:<10} first {first:8.2f}ms  '
+                    f'median {statistics.median(times):6.2f}ms  '
+                    f'max {max(times):6.2f}ms',
+                )
+            server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import json
+import tempfile
+import time
+
+import requests
+
+from benchmarks.synthetic import generate_league
+from FF.delta import merge_scores
+from FF.delta import SCORE_VIEWS
+from FF.main import FULL_VIEWS
+from FF.main import league_filter
+from FF.main import save_data
+from FF.stub import StubServer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Full vs scores-only vs matchup-only pull',
+    )
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--history', type=int, default=12)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    d = generate_league(
+        teams=args.teams, played=12, history=args.history,
+        seasons=args.seasons, live=True,
+    )
+    year, week, LID = d['seasonId'], d['scoringPeriodId'], d['id']
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_data(tmp, d, year, week, LID)
+        with StubServer(tmp) as stub:
+            url = f'{stub.url}/seasons/{year}/segments/0/leagues/{LID}'
+            f = league_filter([1, 2], year, week)
+            matchup = {'x-fantasy-filter': json.dumps(f)}
+            for name, views, headers in (
+                ('full', FULL_VIEWS, {}),
+                ('scores', SCORE_VIEWS, {}),
+                ('matchup', FULL_VIEWS, matchup),
+            ):
+                params = {'scoringPeriodId': week, 'view': list(views)}
+                best = float('inf')
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    r = requests.get(
+                        url, params=params, headers=headers, timeout=30,
+                    )
+                    doc = r.json()
+                    if name == 'scores':
+                        merge_scores(d, doc, week)
+                    best = min(best, time.perf_counter() - start)
+                print(
+                    f'{name:<8}{len(r.content) / 1024:>10.1f} KiB'
+                    f'{best * 1000:>10.1f} ms (fetch, decode, merge)',
+                )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
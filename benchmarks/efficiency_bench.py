@@ -0,0 +1,52 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.cache import RenderCache
+from FF.efficiency import season_efficiency
+from FF.main import save_data
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Season efficiency report over saved weeks',
+    )
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=13)
+    parser.add_argument('--jobs', type=int)
+    args = parser.parse_args()
+
+    season = generate_league(
+        teams=args.teams, weeks=args.weeks, played=args.weeks,
+    )
+    weeks = list(range(1, args.weeks))
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for week in range(1, args.weeks + 1):
+                save_data(tmp, as_of(season, week), 2021, week, 0)
+        cache = RenderCache(os.path.join(tmp, 'cache'))
+        for name, run in (
+            ('serial', lambda: season_efficiency(tmp, 2021, 0, weeks, jobs=1)),
+            (
+                'parallel',
+                lambda: season_efficiency(tmp, 2021, 0, weeks, jobs=args.jobs),
+            ),
+            ('cold', lambda: season_efficiency(tmp, 2021, 0, weeks, cache)),
+            ('cached', lambda: season_efficiency(tmp, 2021, 0, weeks, cache)),
+        ):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f'{name:<10}{elapsed * 1000:>8.1f} ms ({len(weeks)} weeks)')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from benchmarks.synthetic import generate_league
+from FF import main as ff
+from FF.main import connect_FF
+from FF.main import pull_stats
+from FF.main import save_data
+from FF.stub import StubServer
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Concurrent pull bench')
+    parser.add_argument('--leagues', type=int, default=4)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument(
+        '--jobs', type=int, default=4,
+        help='Pulls requested per (league, week)',
+    )
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=100, help='ms')
+    parser.add_argument('--rate', type=float, default=10)
+    parser.add_argument('--burst', type=int, default=5)
+    args = parser.parse_args()
+
+    ff.LIMITER.rate = args.rate
+    ff.LIMITER.burst = ff.LIMITER.tokens = args.burst
+    cookies = {'season': 2021, 'SWID': '{SWID}', 'espn_s2': ''}
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for LID in range(args.leagues):
+                d = generate_league(teams=10, played=args.weeks, seed=LID)
+                for week in range(1, args.weeks + 1):
+                    save_data(tmp, d, 2021, week, LID)
+        pulls = [
+            (LID, week)
+            for _ in range(args.jobs)
+            for LID in range(args.leagues)
+            for week in range(1, args.weeks + 1)
+        ]
+        stub = StubServer(tmp, latency=args.latency / 1000)
+        with stub, mock.patch('FF.main.load_cookies', return_value=cookies):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.workers) as pool:
+                    list(pool.map(
+                        lambda p: connect_FF(p[0], p[1], False, stub.url),
+                        pulls,
+                    ))
+                elapsed = time.perf_counter() - start
+    stats = pull_stats()
+    print(
+        f'{len(pulls)} pulls in {elapsed:.2f}s: '
+        f'{stats["requests_issued"]} issued, '
+        f'{stats["requests_coalesced"]} coalesced, '
+        f'{stats["requests_throttled"]} throttled '
+        f'({stats["throttle_wait_s"]}s waiting), '
+        f'{stub.stats.get("requests", 0)} served',
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import time
+
+from benchmarks.synthetic import generate_league
+from FF.scoring import league_rules
+from FF.scoring import Rules
+from FF.scoring import StatTable
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Season rescoring bench')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=17)
+    parser.add_argument('--seasons', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    d = generate_league(
+        teams=args.teams, weeks=args.weeks, played=args.weeks,
+        seasons=args.seasons,
+    )
+    rules = league_rules(d)
+    assert rules is not None
+    start = time.perf_counter()
+    table = StatTable.from_league(d)
+    build = time.perf_counter() - start
+    off = table.mismatches(table.score(rules))
+    print(
+        f'{len(table.lines)} stat lines in {build * 1000:.1f} ms, '
+        f'{len(off)} off the league\'s appliedTotal',
+    )
+    # Point per reception, six point passing touchdowns.
+    what_if = Rules({**rules.points, '53': 1.0, '4': 6.0}, rules.overrides)
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        table.score(what_if)
+        best = min(best, time.perf_counter() - start)
+    print(f'rescore  {best * 1000:>8.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,45 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import time
+
+from benchmarks.synthetic import generate_league
+from FF.search import player_rows
+from FF.search import PlayerIndex
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Player search bench')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--roster-size', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    d = generate_league(teams=args.teams, roster_size=args.roster_size)
+    start = time.perf_counter()
+    rows = player_rows(d, 2021, 4)
+    index = PlayerIndex()
+    index.update(rows, 4, 'a')
+    build = time.perf_counter() - start
+    print(
+        f'{len(rows)} players, {len(index.postings)} trigrams in '
+        f'{build * 1000:.1f} ms',
+    )
+    # A pull's worth of change: fresh rows, one new player.
+    rows = player_rows(d, 2021, 5)
+    _, row = rows.popitem()
+    rows[-1] = row._replace(name='Alvin Kamara')
+    start = time.perf_counter()
+    index.update(rows, 5, 'b')
+    print(f'update   {(time.perf_counter() - start) * 1000:>8.2f} ms')
+    best = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        index.search('kamra')
+        best = min(best, time.perf_counter() - start)
+    print(f'search   {best * 1000:>8.2f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,34 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import time
+
+from benchmarks.synthetic import generate_league
+from FF.simulate import simulate_season
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Playoff simulator bench')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--sims', type=int, default=100000)
+    parser.add_argument('--played', type=int, default=6)
+    parser.add_argument('--h2h', action='store_true')
+    args = parser.parse_args()
+
+    d = generate_league(teams=args.teams, played=args.played)
+    if args.h2h:
+        d['settings']['scheduleSettings']['playoffSeedingRule'] = (
+            'H2H_RECORD'
+        )
+    start = time.perf_counter()
+    simulate_season(d, sims=args.sims, seed=0)
+    elapsed = time.perf_counter() - start
+    print(
+        f'{args.teams} teams, {args.sims} sims: {elapsed:.2f}s '
+        f'({args.sims / elapsed:,.0f} sims/s)',
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.main import load_data
+from FF.main import save_data
+
+
+def du(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if not name.endswith('.lock'):
+                total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def read(path: str) -> dict:
+    with open(path) as rf:
+        return json.load(rf)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='Disk use and load time of a season of snapshots',
+    )
+    parser.add_argument('--leagues', type=int, default=3)
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--weeks', type=int, default=13)
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = os.path.join(tmp, 'plain')
+        store = os.path.join(tmp, 'store')
+        os.makedirs(plain)
+        save_time = 0.0
+        for LID in range(args.leagues):
+            season = generate_league(
+                teams=args.teams, weeks=args.weeks, played=args.weeks,
+                seasons=args.seasons, seed=LID,
+            )
+            for week in range(1, args.weeks + 1):
+                d = as_of(season, week)
+                name = f'FF_{d["seasonId"]}_wk{week}_{LID}.json'
+                with open(os.path.join(plain, name), 'w') as wf:
+                    json.dump(d, wf)
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    save_data(store, d, d['seasonId'], week, LID)
+                save_time += time.perf_counter() - start
+        saves = args.leagues * args.weeks
+        print(
+            f'plain  {du(plain) / 1024:>10.0f} KiB\n'
+            f'store  {du(store) / 1024:>10.0f} KiB  '
+            f'({du(plain) / du(store):.1f}x smaller, '
+            f'{save_time / saves * 1000:.1f} ms per save)',
+        )
+
+        latest = argparse.Namespace(
+            season=d['seasonId'], week=args.weeks, league_id=0,
+        )
+        path = os.path.join(
+            plain, f'FF_{d["seasonId"]}_wk{args.weeks}_0.json',
+        )
+        for name, load in (
+            ('plain', lambda: read(path)),
+            ('store', lambda: load_data(store, latest)),
+        ):
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                load()
+                best = min(best, time.perf_counter() - start)
+            print(f'load {name:<8}{best * 1000:>8.1f} ms (week {args.weeks})')
+        assert load_data(store, latest) == read(path)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+"""Benchmark suite for the FF hot paths.
+
+Runs every case against the fixture snapshots in tests/data and against a
+synthetic league, writes the timings as JSON and, given a baseline from an
+earlier run, flags cases that slowed down by more than the threshold:
+
+    python -m benchmarks.suite --output before.json
+    python -m benchmarks.suite --baseline before.json
+"""
+from __future__ import annotations  # python3.7+
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+
+from benchmarks.synthetic import generate_league
+from FF.league import League
+from FF.main import Colors
+from FF.main import format_scoreboard
+from FF.main import load_data
+from FF.main import Player
+from FF.main import print_matchup
+from FF.main import Roster
+from FF.main import save_data
+
+FIXTURES = './tests/data'
+# Largest fixture: a full 16-player roster.
+FIXTURE_LEAGUE = 4
+FIXTURE_TEAM = 9
+THRESHOLD = .2
+MIN_TIME = .2
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[..., Any]
+    # Called before every run and excluded from the timing; its return
+    # value is passed to fn.
+    setup: Callable[[], tuple] | None = None
+
+
+def _args(league_id: int, season: int, week: int) -> argparse.Namespace:
+    return argparse.Namespace(
+        league_id=league_id, season=season, week=week,
+    )
+
+
+def _roster(d: dict, TID: int, year: int, week: int) -> Roster:
+    roster = Roster(TID)
+    # Snapshots without a schedule leave no matchup to score.
+    roster.op_TID = TID
+    roster.winner = None
+    roster.total_score = 0.0
+    roster.generate_roster(d, year, week)
+    if 'schedule' in d:
+        roster.generate_record(d)
+        roster.get_matchup_score(d, week)
+    roster.ytp_projected()
+    roster.decide_lineup()
+    roster.sort_roster_by_pos()
+    return roster
+
+
+def _reset(roster: Roster) -> tuple:
+    for p in roster.roster:
+        p.shouldStart = False
+    return ()
+
+
+def cases(
+    path: str,
+    args: argparse.Namespace,
+    prefix: str,
+    TID: int,
+    year: int,
+    week: int,
+) -> list[Case]:
+    """Every benchmark case for the snapshot `args` selects under `path`,
+    parsed as `year`/`week`.
+    """
+    d = load_data(path, args)
+    with contextlib.redirect_stdout(io.StringIO()):
+        myTeam = _roster(d, TID, year, week)
+        opTeam = _roster(d, myTeam.op_TID, year, week)
+    team = next(t for t in d['teams'] if t['id'] == TID)
+    entry = max(
+        team['roster']['entries'],
+        key=lambda e: len(e['playerPoolEntry']['player']['stats']),
+    )
+    player = Player(entry, year, week)
+
+    def generate_roster() -> None:
+        Roster(TID).generate_roster(d, year, week)
+
+    return [
+        Case(f'load_data[{prefix}]', lambda: load_data(path, args)),
+        Case(f'generate_roster[{prefix}]', generate_roster),
+    ] + ([
+        Case(
+            f'generate_record[{prefix}]',
+            lambda: Roster(TID).generate_record(d),
+        ),
+        Case(
+            f'scoreboard[{prefix}]',
+            lambda: format_scoreboard(
+                League(d, year, week).scoreboard(), TID,
+            ),
+        ),
+    ] if 'schedule' in d else []) + [
+        Case(
+            f'decide_lineup[{prefix}]',
+            myTeam.decide_lineup,
+            lambda: _reset(myTeam),
+        ),
+        Case(
+            f'generate_player_stats[{prefix}]',
+            lambda: player.generate_player_stats(entry),
+        ),
+        Case(f'print_roster[{prefix}]', myTeam.print_roster),
+        Case(
+            f'print_matchup[{prefix}]',
+            lambda: print_matchup(myTeam, opTeam),
+        ),
+    ]
+
+
+def fixture_cases() -> list[Case]:
+    # Fixtures are saved as season/week 0 but hold 2021 week 1 stats.
+    return cases(
+        FIXTURES, _args(FIXTURE_LEAGUE, 0, 0), 'fixture', FIXTURE_TEAM,
+        2021, 1,
+    )
+
+
+def synthetic_cases(path: str, args: argparse.Namespace) -> list[Case]:
+    d = generate_league(
+        teams=args.teams,
+        roster_size=args.roster_size,
+        weeks=args.weeks,
+        played=args.played,
+        history=args.history,
+        seasons=args.seasons,
+    )
+    year, week, LID = d['seasonId'], d['scoringPeriodId'], d['id']
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_data(path, d, year, week, LID)
+    # The last team is the worst case for the linear team scans.
+    return cases(
+        path, _args(LID, year, week), 'synthetic', d['teams'][-1]['id'],
+        year, week,
+    )
+
+
+def measure(case: Case, repeat: int) -> dict:
+    """Median and best per-call time in ms over `repeat` runs."""
+    timer = time.perf_counter
+    sink = io.StringIO()
+    number = 1
+    # Calibrate like timeit.autorange so fast cases are timed in batches
+    # long enough for the clock.
+    while True:
+        start = timer()
+        with contextlib.redirect_stdout(sink):
+            for _ in range(number):
+                case.fn(*(case.setup() if case.setup else ()))
+        if timer() - start >= MIN_TIME / repeat or number >= 1 << 20:
+            break
+        number *= 2
+    times = []
+    for _ in range(repeat):
+        elapsed = 0.0
+        with contextlib.redirect_stdout(sink):
+            for _ in range(number):
+                setup_args = case.setup() if case.setup else ()
+                start = timer()
+                case.fn(*setup_args)
+                elapsed += timer() - start
+        sink.seek(0)
+        sink.truncate()
+        times.append(elapsed / number * 1000)
+    return {
+        'median_ms': round(statistics.median(times), 6),
+        'min_ms': round(min(times), 6),
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+) -> dict[str, float]:
+    """Relative change of each case's best time; only cases in both runs.
+
+    The best of several runs is the least noisy estimate for code this
+    short, so regressions are judged on min_ms.
+    """
+    return {
+        name: result['min_ms'] / baseline[name]['min_ms'] - 1
+        for name, result in results.items()
+        if name in baseline and baseline[name]['min_ms'] > 0
+    }
+
+
+def regressions(
+    changes: dict[str, float],
+    threshold: float = THRESHOLD,
+) -> list[str]:
+    return [name for name, change in changes.items() if change > threshold]
+
+
+def print_results(
+    results: dict[str, dict],
+    changes: dict[str, float],
+    threshold: float,
+) -> None:
+    print(('{:<34}{:>12}{:>12}{:>9}').format(
+        'Case', 'Median ms', 'Min ms', 'Change',
+    ))
+    for name, result in results.items():
+        change = ''
+        if name in changes:
+            c = changes[name]
+            color = (
+                Colors.RED if c > threshold
+                else Colors.GREEN if c < -threshold else ''
+            )
+            end = Colors.ENDC if color else ''
+            change = f'{color}{c * 100:>+8.1f}%{end}'
+        print(
+            f'{name:<34}{result["median_ms"]:>12.4f}'
+            f'{result["min_ms"]:>12.4f}{change}',
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='FF benchmark suite')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--roster-size', type=int, default=16)
+    parser.add_argument('--weeks', type=int, default=13)
+    parser.add_argument('--played', type=int, default=6)
+    parser.add_argument(
+        '--history', type=int,
+        help='Weeks of per-game stats per player (default: --played)',
+    )
+    parser.add_argument('--seasons', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument(
+        '-k', '--filter', default='',
+        help='Only run cases whose name contains this',
+    )
+    parser.add_argument(
+        '--output', default='bench_results.json',
+        help='Where to write the results JSON',
+    )
+    parser.add_argument('--baseline', help='Results JSON to compare with')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        all_cases = fixture_cases() + synthetic_cases(tmp, args)
+        results = {
+            case.name: measure(case, args.repeat)
+            for case in all_cases if args.filter in case.name
+        }
+    params = vars(args).copy()
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': params,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as wf:
+        json.dump(report, wf, indent=2)
+
+    changes: dict[str, float] = {}
+    if args.baseline:
+        with open(args.baseline) as rf:
+            changes = compare(results, json.load(rf)['results'])
+    print_results(results, changes, args.threshold)
+    print(f'Results saved to {os.path.abspath(args.output)}')
+    slow = regressions(changes, args.threshold)
+    if slow:
+        print(
+            f'{Colors.RED}Regressions over {args.threshold:.0%}: '
+            f'{", ".join(slow)}{Colors.ENDC}',
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
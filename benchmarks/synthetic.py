@@ -0,0 +1,503 @@
+from __future__ import annotations  # python3.7+
+
+import random
+
+POSITIONS = {'QB': 1, 'RB': 2, 'WR': 3, 'TE': 4, 'K': 5, 'DST': 16}
+SLOTS = {'QB': 0, 'RB': 2, 'WR': 4, 'TE': 6, 'DST': 16, 'K': 17}
+STARTERS = {'QB': 1, 'RB': 2, 'WR': 2, 'TE': 1, 'DST': 1, 'K': 1}
+# Bench spots are handed out in this order until the roster is full.
+BENCH_ORDER = ['RB', 'WR', 'QB', 'TE', 'RB', 'WR', 'TE']
+# Points a defense allows a position per game, on average.
+AVERAGE_ALLOWED = {
+    'QB': 18.0, 'RB': 24.0, 'WR': 30.0, 'TE': 8.0, 'K': 8.0, 'DST': 7.0,
+}
+
+# Standard ESPN scoring for the stat ids the generator emits.
+RULES = {
+    '3': .04, '4': 4, '20': -2,
+    '24': .1, '25': 6,
+    '42': .1, '43': 6,
+    '72': -2,
+    '83': 3, '85': -1, '86': 1, '88': -1,
+    '94': 6, '95': 2, '96': 2, '99': 1,
+}
+
+
+def weekly_stats(pos: str, quality: float, rng: random.Random) -> dict:
+    """Raw single-game stat map for a player of the given position."""
+    def n(mean: float) -> int:
+        return max(int(rng.gauss(mean * quality, mean * quality / 2)), 0)
+
+    if pos == 'QB':
+        att = max(n(35), 1)
+        return {
+            '0': att, '1': min(n(23), att), '3': n(250), '4': n(1.6),
+            '20': n(.8), '23': n(3), '24': n(15), '25': n(.2), '72': n(.2),
+        }
+    if pos in ('RB', 'WR', 'TE'):
+        carries = {'RB': 15, 'WR': 1, 'TE': 0}[pos]
+        targets = {'RB': 4, 'WR': 8, 'TE': 6}[pos]
+        return {
+            '23': n(carries), '24': n(carries * 4.3),
+            '25': n(carries / 30), '42': n(targets * 8),
+            '43': n(targets / 15), '53': n(targets * .65),
+            '58': n(targets), '72': n(.1),
+        }
+    if pos == 'K':
+        fga, xpa = n(2), max(n(3), 1)
+        fgm, xpm = min(n(1.7), fga), min(n(2.8), xpa)
+        return {
+            '83': fgm, '84': fga, '85': fga - fgm,
+            '86': xpm, '87': xpa, '88': xpa - xpm,
+        }
+    return {'94': n(.2), '95': n(1), '96': n(.7), '99': n(2.5)}
+
+
+def applied(stats: dict) -> dict:
+    return {
+        k: round(v * RULES[k], 2) for k, v in stats.items()
+        if k in RULES and v
+    }
+
+
+def stat_entry(
+    year: int,
+    week: int,
+    source: int,
+    stats: dict,
+) -> dict:
+    applied_stats = applied(stats)
+    return {
+        'appliedStats': applied_stats,
+        'appliedTotal': round(sum(applied_stats.values()), 2),
+        'externalId': f'{year}{week}',
+        'id': f'{source}1{year}{week}',
+        'proTeamId': 0,
+        'scoringPeriodId': week,
+        'seasonId': year,
+        'statSourceId': source,
+        'statSplitTypeId': 1,
+        'stats': stats,
+    }
+
+
+def season_entry(year: int, weeks: list[dict]) -> dict:
+    stats: dict = {'210': len(weeks)}
+    for w in weeks:
+        for k, v in w['stats'].items():
+            stats[k] = stats.get(k, 0) + v
+    applied_stats = applied(stats)
+    total = round(sum(applied_stats.values()), 2)
+    return {
+        'appliedAverage': total / max(len(weeks), 1),
+        'appliedStats': applied_stats,
+        'appliedTotal': total,
+        'externalId': str(year),
+        'id': f'00{year}',
+        'proTeamId': 0,
+        'scoringPeriodId': 0,
+        'seasonId': year,
+        'statSourceId': 0,
+        'statSplitTypeId': 0,
+        'stats': stats,
+    }
+
+
+def generate_entry(
+    playerId: int,
+    pos: str,
+    slot: int,
+    year: int,
+    week: int,
+    history: int,
+    seasons: int,
+    rng: random.Random,
+) -> dict:
+    """ESPN-shaped roster entry with `history` weeks of actuals and
+    projections before `week` plus `seasons` previous season totals.
+    """
+    quality = rng.uniform(.5, 1.5)
+    stats = []
+    for past in range(seasons, 0, -1):
+        games = [
+            stat_entry(year - past, w, 0, weekly_stats(pos, quality, rng))
+            for w in range(1, 18)
+        ]
+        stats.append(season_entry(year - past, games))
+    actuals = []
+    for w in range(max(week - history, 1), week):
+        actuals.append(stat_entry(year, w, 0, weekly_stats(pos, quality, rng)))
+        stats.append(stat_entry(
+            year, w, 1, weekly_stats(pos, quality, rng),
+        ))
+    stats.extend(actuals)
+    stats.append(season_entry(year, actuals or [
+        stat_entry(year, 0, 0, weekly_stats(pos, quality, rng)),
+    ]))
+    stats.append(stat_entry(year, week, 1, weekly_stats(pos, quality, rng)))
+    played = rng.random() < .5
+    if played:
+        stats.append(
+            stat_entry(year, week, 0, weekly_stats(pos, quality, rng)),
+        )
+    return {
+        'injuryStatus': 'NORMAL',
+        'lineupSlotId': slot,
+        'playerId': playerId,
+        'playerPoolEntry': {
+            'appliedStatTotal': stats[-1]['appliedTotal'] if played else 0,
+            'id': playerId,
+            'lineupLocked': played,
+            'onTeamId': playerId // 1000,
+            'rosterLocked': played,
+            'player': {
+                'active': True,
+                'defaultPositionId': POSITIONS[pos],
+                'firstName': f'First{playerId}',
+                'fullName': f'First{playerId} Last{playerId}',
+                'id': playerId,
+                'injured': False,
+                'injuryStatus': 'ACTIVE',
+                'lastName': f'Last{playerId}',
+                'proTeamId': rng.randint(1, 32),
+                'stats': stats,
+            },
+        },
+    }
+
+
+def roster_positions(roster_size: int) -> list[tuple[str, bool]]:
+    """(position, starting) for each roster spot."""
+    spots = [
+        (pos, True) for pos, n in STARTERS.items() for _ in range(n)
+    ]
+    bench = max(roster_size - len(spots), 0)
+    spots.extend(
+        (BENCH_ORDER[i % len(BENCH_ORDER)], False) for i in range(bench)
+    )
+    return spots
+
+
+def generate_roster(
+    TID: int,
+    roster_size: int,
+    year: int,
+    week: int,
+    history: int,
+    seasons: int,
+    rng: random.Random,
+) -> list[dict]:
+    return [
+        generate_entry(
+            TID * 1000 + i, pos, SLOTS[pos] if starting else 20,
+            year, week, history, seasons, rng,
+        )
+        for i, (pos, starting) in enumerate(roster_positions(roster_size))
+    ]
+
+
+def _starter_points(entries: list[dict], week: int) -> float:
+    total = 0.0
+    for e in entries:
+        if e['lineupSlotId'] == 20:
+            continue
+        for stat in e['playerPoolEntry']['player']['stats']:
+            if (
+                stat['scoringPeriodId'] == week and
+                stat['statSourceId'] == 0 and
+                stat['statSplitTypeId'] == 1
+            ):
+                total += stat['appliedTotal']
+    return round(total, 2)
+
+
+def generate_schedule(
+    rosters: dict[int, list[dict]],
+    weeks: int,
+    played: int,
+    rng: random.Random,
+) -> list[dict]:
+    """Round-robin schedule; the first `played` weeks have results.
+
+    Played weeks are scored from each starting lineup's actuals when the
+    roster carries that week's history, otherwise drawn at random.
+    """
+    rotation: list[int] = list(rosters)
+    if len(rotation) % 2:
+        rotation.append(-1)
+    schedule = []
+    matchup_id = 1
+    for week in range(1, weeks + 1):
+        half = len(rotation) // 2
+        for home, away in zip(rotation[:half], reversed(rotation[half:])):
+            if -1 in (home, away):
+                continue
+            matchup: dict = {
+                'away': {'teamId': away, 'totalPoints': 0.0},
+                'home': {'teamId': home, 'totalPoints': 0.0},
+                'id': matchup_id,
+                'matchupPeriodId': week,
+                'playoffTierType': 'NONE',
+                'winner': 'UNDECIDED',
+            }
+            if week <= played:
+                h = (
+                    _starter_points(rosters[home], week) or
+                    round(rng.gauss(100, 20), 2)
+                )
+                a = (
+                    _starter_points(rosters[away], week) or
+                    round(rng.gauss(100, 20), 2)
+                )
+                matchup['home']['totalPoints'] = h
+                matchup['away']['totalPoints'] = a
+                matchup['winner'] = (
+                    'HOME' if h > a else 'AWAY' if a > h else 'TIE'
+                )
+            schedule.append(matchup)
+            matchup_id += 1
+        rotation.insert(1, rotation.pop())
+    return schedule
+
+
+def live_roster(entries: list[dict], year: int, week: int) -> dict:
+    """rosterForCurrentScoringPeriod: the roster with only the week's
+    stats, as the mScoreboard view returns it.
+    """
+    period = []
+    for e in entries:
+        pool = e['playerPoolEntry']
+        stats = [
+            s for s in pool['player']['stats']
+            if s['seasonId'] == year and s['scoringPeriodId'] == week
+        ]
+        period.append({
+            **e,
+            'playerPoolEntry': {
+                **pool, 'player': {**pool['player'], 'stats': stats},
+            },
+        })
+    return {'entries': period}
+
+
+def generate_league(
+    teams: int = 12,
+    roster_size: int = 16,
+    weeks: int = 13,
+    played: int = 6,
+    history: int | None = None,
+    seasons: int = 1,
+    year: int = 2021,
+    seed: int = 0,
+    live: bool = False,
+    future: bool = False,
+) -> dict:
+    """ESPN-shaped league document with teams, rosters and a schedule.
+
+    `history` is the number of completed weeks of per-game stats each
+    player carries (defaults to `played`) and `seasons` the number of
+    previous season totals. With `live`, the current week's matchups
+    carry live totals and each side's rosterForCurrentScoringPeriod.
+    With `future`, players carry projections for the rest of the regular
+    season, zero in their pro team's bye week.
+    """
+    rng = random.Random(seed)
+    week = played + 1
+    if history is None:
+        history = played
+    rosters = {
+        TID: generate_roster(
+            TID, roster_size, year, week, history, seasons, rng,
+        )
+        for TID in range(1, teams + 1)
+    }
+    schedule = generate_schedule(rosters, weeks, played, rng)
+    if live:
+        for m in schedule:
+            if m['matchupPeriodId'] != week:
+                continue
+            for side in ('home', 'away'):
+                entries = rosters[m[side]['teamId']]
+                m[side]['totalPointsLive'] = _starter_points(entries, week)
+                m[side]['rosterForCurrentScoringPeriod'] = live_roster(
+                    entries, year, week,
+                )
+    d = {
+        'gameId': 1,
+        'id': 0,
+        'scoringPeriodId': week,
+        'seasonId': year,
+        'segmentId': 0,
+        'settings': {
+            'scheduleSettings': {
+                'matchupPeriodCount': weeks,
+                'playoffTeamCount': 6 if teams >= 10 else 4,
+                'playoffSeedingRule': 'TOTAL_POINTS_SCORED',
+            },
+            'scoringSettings': {
+                'scoringItems': [
+                    {'statId': int(statId), 'points': points}
+                    for statId, points in RULES.items()
+                ],
+            },
+        },
+        'status': {
+            'currentMatchupPeriod': week,
+            'finalScoringPeriod': 17,
+            'firstScoringPeriod': 1,
+            'latestScoringPeriod': week,
+            'previousSeasons': list(range(year - seasons, year)),
+        },
+        'schedule': schedule,
+        'teams': [
+            {
+                'abbrev': f'T{TID}',
+                'currentSimulationResults': {
+                    'playoffPct': round(rng.random(), 3), 'rank': TID,
+                },
+                'id': TID,
+                'roster': {'entries': entries},
+            }
+            for TID, entries in rosters.items()
+        ],
+    }
+    if future:
+        add_projections(d, weeks, random.Random(seed + 1))
+    d['positionAgainstOpponent'] = positional_ratings(random.Random(seed + 2))
+    return d
+
+
+def positional_ratings(rng: random.Random, teams: int = 32) -> dict:
+    """An mPositionalRatings view: points each pro defense allows per
+    game to each position, and its rank against it.
+    """
+    ratings = {}
+    for pos, positionId in POSITIONS.items():
+        allowed = {
+            t: round(rng.uniform(.6, 1.4) * AVERAGE_ALLOWED[pos], 2)
+            for t in range(1, teams + 1)
+        }
+        order = sorted(allowed.values())
+        ratings[str(positionId)] = {
+            'average': round(sum(allowed.values()) / teams, 2),
+            'ratingsByOpponent': {
+                str(t): {
+                    'average': allowed[t],
+                    'rank': order.index(allowed[t]) + 1,
+                }
+                for t in allowed
+            },
+        }
+    return {'positionalRatings': ratings}
+
+
+def bye_week(proTeamId: int, weeks: int) -> int:
+    return 4 + proTeamId % max(weeks - 4, 1)
+
+
+def add_projections(d: dict, weeks: int, rng: random.Random) -> None:
+    year, week = d['seasonId'], d['scoringPeriodId']
+    for team in d['teams']:
+        for e in team['roster']['entries']:
+            player = e['playerPoolEntry']['player']
+            pos = next(
+                p for p, i in POSITIONS.items()
+                if i == player['defaultPositionId']
+            )
+            bye = bye_week(player['proTeamId'], weeks)
+            for w in range(week + 1, weeks + 1):
+                stats = {} if w == bye else weekly_stats(pos, 1, rng)
+                player['stats'].append(stat_entry(year, w, 1, stats))
+
+
+def as_of(d: dict, week: int) -> dict:
+    """`d` (a finished season) as it was pulled in `week`: stats up to
+    the week before, that week's projection and the season totals so far.
+    """
+    year = d['seasonId']
+    teams = []
+    for team in d['teams']:
+        entries = []
+        for e in team['roster']['entries']:
+            player = e['playerPoolEntry']['player']
+            stats = [
+                s for s in player['stats']
+                if s['seasonId'] != year or s['scoringPeriodId'] and (
+                    s['scoringPeriodId'] < week or
+                    s['scoringPeriodId'] == week and s['statSourceId'] == 1
+                )
+            ]
+            actuals = [
+                s for s in stats
+                if s['seasonId'] == year and s['statSourceId'] == 0
+            ]
+            if actuals:
+                stats.append(season_entry(year, actuals))
+            entries.append({**e, 'playerPoolEntry': {
+                **e['playerPoolEntry'], 'player': {**player, 'stats': stats},
+            }})
+        teams.append({**team, 'roster': {'entries': entries}})
+    return {**d, 'scoringPeriodId': week, 'teams': teams}
+
+
+# Kickoffs as (days, hours) after a week's Thursday midnight, and how many
+# games each slot gets: Thursday night, Sunday early, late and night, and
+# Monday night.
+KICKOFFS = [
+    ((0, 20.25), 1),
+    ((3, 13), 9),
+    ((3, 16.25), 4),
+    ((3, 20.25), 1),
+    ((4, 20.25), 1),
+]
+
+
+def generate_pro_schedule(
+    year: int = 2021,
+    weeks: int = 17,
+    kickoff: float = 0.0,
+    teams: int = 32,
+) -> dict:
+    """A proTeamSchedules_wl response: each week's games from `kickoff`
+    (the first Thursday's midnight, epoch seconds), with the teams on
+    bye (see bye_week) sitting out.
+    """
+    games: dict[int, dict[str, list[dict]]] = {
+        t: {} for t in range(1, teams + 1)
+    }
+    gameId = 0
+    for week in range(1, weeks + 1):
+        playing = [
+            t for t in range(1, teams + 1) if bye_week(t, weeks) != week
+        ]
+        if not playing:
+            continue
+        # Rotate the pairings week to week.
+        shift = week % len(playing)
+        playing = playing[shift:] + playing[:shift]
+        pairs = list(zip(playing[::2], playing[1::2]))
+        start = kickoff + (week - 1) * 7 * 24 * 60 * 60
+        slots = [
+            start + (days * 24 + hours) * 60 * 60
+            for (days, hours), n in KICKOFFS for _ in range(n)
+        ]
+        for (home, away), at in zip(pairs, slots + slots[-1:] * len(pairs)):
+            gameId += 1
+            game = {
+                'id': gameId,
+                'date': int(at * 1000),
+                'homeProTeamId': home,
+                'awayProTeamId': away,
+                'scoringPeriodId': week,
+            }
+            for t in (home, away):
+                games[t].setdefault(str(week), []).append(game)
+    return {
+        'settings': {
+            'proTeams': [
+                {'id': t, 'proGamesByScoringPeriod': by_period}
+                for t, by_period in games.items()
+            ],
+        },
+        'seasonId': year,
+    }
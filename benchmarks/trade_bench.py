@@ -0,0 +1,32 @@
+from __future__ import annotations  # python3.7+
+
+import argparse
+import time
+
+from benchmarks.synthetic import generate_league
+from FF.trade import build_rosters
+from FF.trade import LineupCache
+from FF.trade import suggest_trades
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Trade search bench')
+    parser.add_argument('--teams', type=int, default=12)
+    parser.add_argument('--max-players', type=int, default=2)
+    args = parser.parse_args()
+
+    d = generate_league(teams=args.teams)
+    rosters = build_rosters(d, d['seasonId'], d['scoringPeriodId'])
+    start = time.perf_counter()
+    cache = LineupCache(rosters)
+    trades = suggest_trades(cache, max_players=args.max_players)
+    elapsed = time.perf_counter() - start
+    print(
+        f'{args.teams} teams: {len(trades)} trades in {elapsed:.3f}s '
+        f'({cache.misses} lineups computed, {cache.hits} cache hits)',
+    )
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
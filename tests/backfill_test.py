@@ -0,0 +1,171 @@
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.backfill import Backfill
+from FF.backfill import Checkpoint
+from FF.backfill import checkpoint_path
+from FF.backfill import DEFAULT_WEEKS
+from FF.backfill import fetch_week
+from FF.backfill import main
+from FF.backfill import save_week
+from FF.main import LIMITER
+from FF.main import save_data
+from FF.main import snapshot_path
+from FF.storage import read_snapshot
+from FF.stub import StubServer
+
+WEEKS = 3
+
+
+def mock_load_cookies(dev, key=None):
+    cookies = {
+        'season': 2021, 'week': 2, 'league_id': 7, 'SWID': '{SWID}',
+        'espn_s2': 'ABC',
+    }
+    return cookies[key] if key else cookies
+
+
+@pytest.fixture(scope='module')
+def remote(tmpdir_factory):
+    # Two past seasons of WEEKS weeks and the current one, as the API
+    # would serve them.
+    directory = tmpdir_factory.mktemp('remote')
+    for year in (2016, 2019):
+        d = generate_league(teams=4, weeks=WEEKS, played=WEEKS, year=year)
+        d['status'] = {'finalScoringPeriod': WEEKS}
+        for week in range(1, WEEKS + 1):
+            save_data(str(directory), d, year, week, 7)
+    current = generate_league(teams=4, played=1, year=2021)
+    current['status'] = {'previousSeasons': [2019, 2016]}
+    save_data(str(directory), current, 2021, 2, 7)
+    return str(directory)
+
+
+def fake_fetch(fail=()):
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(year, week):
+        with lock:
+            calls.append((year, week))
+        if (year, week) in fail:
+            return 503, {}
+        return 200, {'status': {'finalScoringPeriod': WEEKS}}
+    return fetch, calls
+
+
+def test_checkpoint(tmpdir):
+    path = str(tmpdir.join('checkpoint.json'))
+    checkpoint = Checkpoint.load(path)
+    assert checkpoint.todo(2019) == list(range(1, DEFAULT_WEEKS + 1))
+    checkpoint.set_weeks(2019, 3)
+    checkpoint.finish(2019, 2)
+    loaded = Checkpoint.load(path)
+    assert (loaded.weeks, loaded.done) == ({2019: 3}, {2019: {2}})
+    assert loaded.todo(2019) == [1, 3]
+    # Week 2's snapshot was removed since.
+    assert Checkpoint.load(
+        path, lambda year, week: week != 2,
+    ).todo(2019) == [1, 2, 3]
+    tmpdir.join('checkpoint.json').write('{')
+    assert Checkpoint.load(path).done == {}
+
+
+def test_fetch_week(remote):
+    with StubServer(remote) as stub, mock.patch(
+        'FF.backfill.load_cookies', mock_load_cookies,
+    ):
+        # 2016 comes from the league history endpoint.
+        for year in (2016, 2019):
+            status_code, d = fetch_week(7, year, 2, False, stub.url)
+            assert status_code == 200
+            assert d['status']['finalScoringPeriod'] == WEEKS
+            assert len(d['teams']) == 4
+        assert fetch_week(7, 2015, 1, False, stub.url)[0] == 404
+        # History with no seasons in it.
+        empty = mock.Mock(status_code=200, json=lambda: [])
+        with mock.patch('FF.backfill.requests.get', return_value=empty):
+            assert fetch_week(7, 2016, 2, False, stub.url) == (404, {})
+
+
+def test_backfill_resumes(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join('checkpoint.json')))
+    saved = []
+    fetch, calls = fake_fetch(fail={(2019, 2)})
+    backfill = Backfill(
+        [2016, 2019], checkpoint, fetch,
+        lambda d, year, week: saved.append((year, week)),
+        jobs=3, retries=1, log=lambda line: None,
+    )
+    with mock.patch('FF.backfill.time.sleep') as sleep:
+        assert backfill.run() == 1
+    sleep.assert_called_once_with(2)
+    assert sorted(saved) == [
+        (2016, 1), (2016, 2), (2016, 3), (2019, 1), (2019, 3),
+    ]
+    assert calls.count((2019, 2)) == 2
+    # A second run pulls just the week that failed.
+    fetch, calls = fake_fetch()
+    resumed = Backfill(
+        [2016, 2019], Checkpoint.load(checkpoint.path), fetch,
+        lambda d, year, week: saved.append((year, week)),
+        log=lambda line: None,
+    )
+    assert resumed.run() == 0
+    assert calls == [(2019, 2)]
+    assert resumed.saved == 1
+    assert Backfill(
+        [2016, 2019], Checkpoint.load(checkpoint.path), fetch, saved.append,
+    ).run() == 0
+    assert calls == [(2019, 2)]
+
+
+def test_backfill_empty_week(tmpdir):
+    checkpoint = Checkpoint(str(tmpdir.join('checkpoint.json')))
+    saved = []
+    backfill = Backfill(
+        [2019], checkpoint, lambda year, week: (200, {}),
+        lambda d, year, week: saved.append((year, week)),
+        retries=0, log=lambda line: None,
+    )
+    backfill.pull_week(2019, 1)
+    assert backfill.failed == [(2019, 1)]
+    assert saved == []
+    assert 1 in Checkpoint.load(checkpoint.path).todo(2019)
+
+
+def test_save_week(tmpdir):
+    save_week(str(tmpdir), 7)({'id': 7}, 2016, 4)
+    assert read_snapshot(snapshot_path(str(tmpdir), 2016, 4, 7)) == {'id': 7}
+
+
+@mock.patch('FF.backfill.load_cookies', mock_load_cookies)
+@mock.patch('FF.main.load_cookies', mock_load_cookies)
+def test_main(remote, tmpdir, capsys):
+    with StubServer(remote) as stub, mock.patch(
+        'FF.backfill.DATA_PATH', str(tmpdir),
+    ), mock.patch.object(LIMITER, 'rate', LIMITER.rate):
+        argv = ['--base-url', stub.url, '--rate-limit', '1000']
+        assert main(argv + ['-j', '2']) == 0
+        # One status read and every week of both seasons.
+        assert stub.stats['requests'] == 1 + 2 * WEEKS
+        capsys.readouterr()
+        assert main(argv) == 0
+        assert stub.stats['requests'] == 2 + 2 * WEEKS
+        out, _ = capsys.readouterr()
+        assert 'Saved 0 weeks of 2 seasons in ' in out
+        os.unlink(snapshot_path(str(tmpdir), 2016, 2, 7))
+        assert main(argv) == 0
+        assert stub.stats['requests'] == 4 + 2 * WEEKS
+    out, _ = capsys.readouterr()
+    assert 'Saved 1 weeks of 2 seasons in ' in out
+    for year in (2016, 2019):
+        for week in range(1, WEEKS + 1):
+            d = read_snapshot(snapshot_path(str(tmpdir), year, week, 7))
+            assert d['FF']['full_pull'] > 0
+            assert d['status']['finalScoringPeriod'] == WEEKS
+    assert os.path.exists(checkpoint_path(str(tmpdir), 7))
@@ -0,0 +1,54 @@
+import pytest
+
+from benchmarks.suite import compare
+from benchmarks.suite import regressions
+from benchmarks.synthetic import generate_league
+from FF.main import Roster
+
+
+@pytest.mark.parametrize(
+    ('teams', 'roster_size'),
+    (
+        (4, 9),
+        (12, 16),
+        (7, 20),
+    ),
+)
+def test_generate_league(teams, roster_size):
+    d = generate_league(teams=teams, roster_size=roster_size, played=3)
+    assert len(d['teams']) == teams
+    assert all(
+        len(t['roster']['entries']) == roster_size for t in d['teams']
+    )
+    roster = Roster(d['teams'][-1]['id'])
+    roster.generate_roster(d, d['seasonId'], d['scoringPeriodId'])
+    roster.generate_record(d)
+    roster.decide_lineup()
+    assert roster.wins + roster.losses == 3
+    assert len([p for p in roster.roster if p.shouldStart]) == 9
+
+
+def test_generate_league_history():
+    d = generate_league(teams=2, played=5, history=2, seasons=3)
+    stats = d['teams'][0]['roster']['entries'][0]['playerPoolEntry'][
+        'player'
+    ]['stats']
+    weeks = {s['scoringPeriodId'] for s in stats if s['seasonId'] == 2021}
+    seasons = {s['seasonId'] for s in stats}
+    assert weeks == {0, 4, 5, 6}
+    assert seasons == {2018, 2019, 2020, 2021}
+    assert d['status']['previousSeasons'] == [2018, 2019, 2020]
+
+
+def test_generate_league_seeded():
+    assert generate_league(teams=2, seed=1) == generate_league(teams=2, seed=1)
+
+
+def test_compare_regressions():
+    baseline = {'a': {'min_ms': 1.0}, 'b': {'min_ms': 2.0}}
+    results = {
+        'a': {'min_ms': 1.5}, 'b': {'min_ms': 2.0}, 'c': {'min_ms': 1.0},
+    }
+    changes = compare(results, baseline)
+    assert changes == {'a': pytest.approx(.5), 'b': 0}
+    assert regressions(changes, .2) == ['a']
@@ -0,0 +1,147 @@
+import argparse
+import os
+from unittest import mock
+
+import pytest
+
+from FF.cache import cache_dir
+from FF.cache import RenderCache
+from FF.main import main
+
+VIEW = {'team_id': 1, 'week': 1, 'matchup': False}
+
+
+@pytest.fixture
+def snapshot(tmpdir):
+    file = tmpdir.join('FF_0_wk1_2.json')
+    file.write('{"teams": []}')
+    return file
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return RenderCache(str(tmpdir.join('cache')))
+
+
+def test_cache_dir(monkeypatch):
+    monkeypatch.delenv('FF_CACHE_DIR', raising=False)
+    monkeypatch.setenv('XDG_CACHE_HOME', '/xdg')
+    assert cache_dir() == '/xdg/ff'
+    monkeypatch.setenv('FF_CACHE_DIR', '/ff-cache')
+    assert cache_dir() == '/ff-cache'
+
+
+def test_cache_key(cache, snapshot):
+    key = cache.key(str(snapshot), VIEW)
+    assert key == cache.key(str(snapshot), dict(reversed(VIEW.items())))
+    assert key != cache.key(str(snapshot), {**VIEW, 'matchup': True})
+    snapshot.write('{"teams": [1]}')
+    assert key != cache.key(str(snapshot), VIEW)
+
+
+def test_cache_key_content(cache, snapshot, tmpdir):
+    # Same content at another path shares rendered output.
+    other = tmpdir.join('FF_0_wk1_3.json')
+    other.write(snapshot.read())
+    assert cache.key(str(snapshot), VIEW) == cache.key(str(other), VIEW)
+
+
+def test_cache_key_code(cache, snapshot, tmpdir):
+    package = tmpdir.mkdir('FF')
+    for name in ('main.py', 'league.py', 'ratings.py'):
+        package.join(name).write('')
+    with mock.patch('FF.cache.__file__', str(package.join('cache.py'))):
+        key = cache.key(str(snapshot), VIEW)
+        assert key == cache.key(str(snapshot), VIEW)
+        package.join('ratings.py').write('# changed')
+        assert key != cache.key(str(snapshot), VIEW)
+
+
+def test_cache_key_missing(cache, tmpdir):
+    assert cache.key(str(tmpdir.join('missing.json')), VIEW) is None
+
+
+def test_cache_fingerprint_memo(cache, snapshot):
+    digest = cache.fingerprint(str(snapshot))
+    with mock.patch('builtins.open', side_effect=OSError) as m:
+        with pytest.raises(OSError):
+            cache.fingerprint(str(snapshot))
+    # The memo is tried first; the snapshot itself is only opened after.
+    assert m.call_count == 2
+    assert cache.fingerprint(str(snapshot)) == digest
+
+
+def test_cache_get_put(cache, snapshot):
+    key = cache.key(str(snapshot), VIEW)
+    assert cache.get(key) is None
+    cache.put(key, 'rendered ═')
+    assert cache.get(key) == 'rendered ═'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_evict_lru(tmpdir):
+    cache = RenderCache(str(tmpdir), max_bytes=350)
+    for i in range(3):
+        cache.put(f'k{i}', 'x' * 100)
+        os.utime(tmpdir.join(f'k{i}.out'), (i, i))
+    # Reading k0 makes k1 the least recently used.
+    assert cache.get('k0') is not None
+    cache.put('k3', 'x' * 100)
+    assert sorted(os.listdir(tmpdir)) == ['k0.out', 'k2.out', 'k3.out']
+
+
+def test_cache_put_unwritable(tmpdir):
+    cache = RenderCache(str(tmpdir.join('file')))
+    tmpdir.join('file').write('')
+    cache.put('key', 'output')
+    assert cache.get('key') is None
+
+
+def args(**kwargs):
+    return argparse.Namespace(**{
+        'pull': False, 'week': 1, 'league_id': 2, 'team_id': 9,
+        'season': 0, 'cookies': False, 'matchup': False, 'standings': False,
+        'dev': False, 'simulate': None, 'trade': None,
+        'suggest_trades': False, 'profile': False, 'profile_memory': False,
+        'profile_cprofile': None, 'profile_json': None, 'no_cache': False,
+        'gc': False, 'scoreboard': None, 'plan': False, 'diff': None,
+        'scoring': None, 'local_proj': False,
+        'efficiency': False, 'sos': False, 'player': None,
+        'SWID': None,
+        'espn_s2': None,
+        **kwargs,
+    })
+
+
+@mock.patch('FF.main.format_standings', return_value='STANDINGS')
+@mock.patch('FF.league.build_standings')
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+def test_main_cache_hit(
+    check_cookies_exists,
+    update_cookies,
+    build_standings,
+    format_standings,
+    snapshot,
+    tmpdir,
+    monkeypatch,
+    capsys,
+):
+    monkeypatch.setenv('FF_CACHE_DIR', str(tmpdir.join('cache')))
+    monkeypatch.setattr('FF.main.DATA_PATH', str(tmpdir))
+    with mock.patch('FF.main.parse_args', return_value=args(standings=True)):
+        assert main() == 0
+        with mock.patch('FF.main.load_data') as load_data, mock.patch(
+            'FF.main.touch',
+        ) as touch:
+            assert main() == 0
+            load_data.assert_not_called()
+        touch.assert_called_once_with(str(snapshot))
+    assert format_standings.call_count == 1
+    with mock.patch(
+        'FF.main.parse_args', return_value=args(standings=True, no_cache=True),
+    ):
+        assert main() == 0
+    assert format_standings.call_count == 2
+    out, err = capsys.readouterr()
+    assert out.split('\n') == ['STANDINGS'] * 3 + ['']
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF import client
+from FF.daemon import _claim
+from FF.daemon import Daemon
+from FF.main import build_parser
+from FF.main import build_standings
+from FF.main import build_team
+from FF.main import format_standings
+from FF.main import print_matchup
+from FF.main import save_data
+from FF.profiling import Profiler
+from FF.sos import league_sos
+from FF.storage import read_snapshot
+from FF.stub import StubServer
+
+ARGS = ['-s', '2021', '-w', '4', '-l', '7', '-t', '2']
+
+
+@pytest.fixture
+def league(tmpdir, capsys):
+    d = generate_league(teams=4, played=3, seed=7)
+    save_data(str(tmpdir), d, 2021, 4, 7)
+    capsys.readouterr()
+    return d
+
+
+@pytest.fixture
+def daemon(tmpdir, league):
+    path = str(tmpdir.join('ff.sock'))
+    p1 = mock.patch('FF.main.check_cookies_exists')
+    p2 = mock.patch('FF.main.update_cookies')
+    with p1, p2, Daemon(path, data_path=str(tmpdir)) as server:
+        thread = threading.Thread(
+            target=server.serve_forever, kwargs={'poll_interval': .05},
+        )
+        thread.start()
+        yield server
+        server.shutdown()
+        thread.join()
+    assert not os.path.exists(path)
+
+
+def query(server, argv):
+    return client.request({'argv': argv}, server.path)
+
+
+def team(d, TID):
+    args = argparse.Namespace(season=2021, week=4)
+    return build_team(d, TID, args, Profiler())
+
+
+def test_daemon_roster(daemon, league, capsys):
+    with mock.patch('FF.main.update_cookies') as update_cookies:
+        reply = query(daemon, ARGS)
+    update_cookies.assert_not_called()
+    assert reply['status'] == 0
+    myTeam = team(league, 2)
+    capsys.readouterr()
+    myTeam.print_roster()
+    out, err = capsys.readouterr()
+    assert reply['output'] + '\n' == out
+
+
+def test_daemon_matchup(daemon, league, capsys):
+    reply = query(daemon, ARGS + ['-m'])
+    myTeam = team(league, 2)
+    opTeam = team(league, myTeam.op_TID)
+    capsys.readouterr()
+    print_matchup(myTeam, opTeam)
+    out, err = capsys.readouterr()
+    assert reply['output'] + '\n' == out
+
+
+def test_daemon_standings(daemon, league):
+    reply = query(daemon, ARGS + ['--standings'])
+    teams = build_standings(league, 2021, 4)
+    assert reply['output'] == format_standings(teams, 2)
+
+
+def test_daemon_sos(daemon, league):
+    reply = query(daemon, ARGS + ['--sos'])
+    assert reply['output'] == league_sos(league, 2)
+
+
+def test_daemon_caches_rosters(daemon):
+    query(daemon, ARGS)
+    cached = daemon.leagues[(2021, 4, 7)]
+    roster = cached.team(2)
+    query(daemon, ARGS)
+    assert daemon.leagues[(2021, 4, 7)] is cached
+    assert cached.team(2) is roster
+    assert daemon.served == 2
+
+
+def test_daemon_refresh(daemon, league, tmpdir):
+    query(daemon, ARGS)
+    assert client.request({'cmd': 'refresh'}, daemon.path)['output'] == (
+        'Reloaded 0'
+    )
+    league['teams'][0]['abbrev'] = 'NEW'
+    save_data(str(tmpdir), league, 2021, 4, 7)
+    path = daemon.leagues[(2021, 4, 7)].path
+    os.utime(path, (0, 0))
+    assert daemon.refresh() == 1
+    assert 'NEW' in query(daemon, ARGS + ['--standings'])['output']
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    # Another season in the cookies: the league's own is pulled.
+    return_value={'season': 2020, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_daemon_refresh_pull(load_cookies, league, tmpdir, capsys):
+    remote = tmpdir.mkdir('remote')
+    changed = generate_league(teams=4, played=3, seed=7)
+    changed['teams'][0]['abbrev'] = 'NEW'
+    save_data(str(remote), changed, 2021, 4, 7)
+    capsys.readouterr()
+    path = str(tmpdir.join('ff.sock'))
+    p1 = mock.patch('FF.main.check_cookies_exists')
+    p2 = mock.patch('FF.main.update_cookies')
+    with StubServer(str(remote)) as stub, p1, p2, Daemon(
+        path, data_path=str(tmpdir), pull=True,
+    ) as server:
+        server.league(build_parser().parse_args(
+            ARGS + ['--base-url', stub.url],
+        ))
+        os.utime(server.leagues[(2021, 4, 7)].path, (0, 0))
+        assert server.refresh() == 1
+        # The league, and the pro schedule the stub doesn't have.
+        assert stub.stats['requests'] == 2
+        d = read_snapshot(server.leagues[(2021, 4, 7)].path)
+        assert d['teams'][0]['abbrev'] == 'NEW'
+        # Saved as ff -p saves it.
+        assert d['FF']['full_pull'] > 0
+
+
+@pytest.mark.parametrize(
+    'argv',
+    (
+        ARGS + ['-p'],
+        ARGS + ['--simulate'],
+        ARGS + ['--profile'],
+        ['-h'],
+    ),
+)
+def test_daemon_fallback(daemon, argv):
+    assert query(daemon, argv) == {'fallback': True}
+
+
+@pytest.mark.parametrize(
+    ('argv', 'status', 'message'),
+    (
+        (['-w', 'x'], 2, 'invalid int value'),
+        (['-s', '2021', '-w', '4', '-l', '7', '-t', '99'], 1, 'Team id: 99'),
+        (['-s', '2021', '-w', '5', '-l', '7', '-t', '2'], 1, 'pulled first'),
+    ),
+)
+def test_daemon_errors(daemon, argv, status, message):
+    reply = query(daemon, argv)
+    assert reply['status'] == status
+    assert message in reply['error']
+
+
+def test_daemon_stats(daemon):
+    query(daemon, ARGS)
+    stats = json.loads(client.request({'cmd': 'stats'}, daemon.path)['output'])
+    assert stats == {'served': 1, 'leagues': [[2021, 4, 7]]}
+
+
+def test_claim_stale_socket(tmpdir):
+    path = tmpdir.join('ff.sock')
+    path.write('')
+    _claim(str(path))
+    assert not path.exists()
+
+
+def test_claim_running(daemon):
+    with pytest.raises(SystemExit):
+        _claim(daemon.path)
+
+
+def test_client_main(daemon, capsys, monkeypatch):
+    monkeypatch.setenv('FF_SOCKET', daemon.path)
+    assert client.main(ARGS + ['--standings']) == 0
+    out, err = capsys.readouterr()
+    assert out.startswith('Rank')
+    assert client.main(['-w', 'x']) == 2
+    out, err = capsys.readouterr()
+    assert 'invalid int value' in err
+
+
+@mock.patch('FF.main.main', return_value=0)
+def test_client_fallback(ff_main, tmpdir, monkeypatch):
+    monkeypatch.setenv('FF_SOCKET', str(tmpdir.join('missing.sock')))
+    assert client.main(ARGS) == 0
+    ff_main.assert_called_once()
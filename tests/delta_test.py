@@ -0,0 +1,162 @@
+import argparse
+import copy
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.delta import is_stale
+from FF.delta import merge_scores
+from FF.delta import pull_scores
+from FF.main import save_data
+from FF.stub import StubServer
+
+WEEK = 4
+
+
+@pytest.fixture
+def live():
+    return generate_league(teams=4, played=WEEK - 1, seed=3, live=True)
+
+
+@pytest.fixture
+def snapshot(live):
+    # The same league saved before any of this week's games were scored.
+    d = copy.deepcopy(live)
+    for m in d['schedule']:
+        for side in ('home', 'away'):
+            m[side].pop('rosterForCurrentScoringPeriod', None)
+            m[side].pop('totalPointsLive', None)
+    for team in d['teams']:
+        for e in team['roster']['entries']:
+            pool = e['playerPoolEntry']
+            pool['player']['stats'] = [
+                s for s in pool['player']['stats']
+                if (s['scoringPeriodId'], s['statSourceId']) != (WEEK, 0)
+            ]
+            pool['appliedStatTotal'] = 0
+    d['FF'] = {'full_pull': 1000.0}
+    return d
+
+
+def scores_only(d):
+    return {'schedule': d['schedule']}
+
+
+def week_stats(d):
+    return {
+        e['playerId']: sorted(
+            (s['id'], s['appliedTotal'])
+            for s in e['playerPoolEntry']['player']['stats']
+            if s['scoringPeriodId'] == WEEK
+        )
+        for team in d['teams'] for e in team['roster']['entries']
+    }
+
+
+def test_merge_scores(snapshot, live):
+    assert week_stats(snapshot) != week_stats(live)
+    assert merge_scores(snapshot, scores_only(live), WEEK)
+    assert week_stats(snapshot) == week_stats(live)
+    for old, new in zip(snapshot['schedule'], live['schedule']):
+        if new['matchupPeriodId'] == WEEK:
+            assert old['home']['totalPointsLive'] == (
+                new['home']['totalPointsLive']
+            )
+
+
+def test_merge_scores_lineup(snapshot, live):
+    m = next(m for m in live['schedule'] if m['matchupPeriodId'] == WEEK)
+    entry = m['home']['rosterForCurrentScoringPeriod']['entries'][0]
+    entry['lineupSlotId'] = 20
+    assert merge_scores(snapshot, scores_only(live), WEEK)
+    team = next(t for t in snapshot['teams'] if t['id'] == m['home']['teamId'])
+    assert team['roster']['entries'][0]['lineupSlotId'] == 20
+
+
+def test_merge_scores_roster_changed(snapshot, live):
+    m = next(m for m in live['schedule'] if m['matchupPeriodId'] == WEEK)
+    m['away']['rosterForCurrentScoringPeriod']['entries'][0]['playerId'] = 1
+    before = copy.deepcopy(snapshot)
+    assert not merge_scores(snapshot, scores_only(live), WEEK)
+    assert snapshot == before
+
+
+def test_merge_scores_partial(snapshot, live):
+    # A --matchup-only snapshot: only teams 1 and 2 were pulled.
+    snapshot['teams'] = [t for t in snapshot['teams'] if t['id'] in (1, 2)]
+    snapshot['FF']['teams'] = [1, 2]
+    assert merge_scores(snapshot, scores_only(live), WEEK)
+    expected = week_stats(live)
+    assert week_stats(snapshot) == {
+        playerId: expected[playerId] for playerId in week_stats(snapshot)
+    }
+
+
+@pytest.mark.parametrize(
+    'delta',
+    (
+        {'schedule': []},
+        {'schedule': [{'id': 999, 'matchupPeriodId': WEEK}]},
+    ),
+)
+def test_merge_scores_mismatch(snapshot, delta):
+    assert not merge_scores(snapshot, delta, WEEK)
+
+
+@pytest.mark.parametrize(
+    ('meta', 'stale'),
+    (
+        ({}, True),
+        ({'full_pull': 0.0}, True),
+        ({'full_pull': 99000.0}, False),
+    ),
+)
+def test_is_stale(meta, stale):
+    assert is_stale({'FF': meta}, now=100000.0) is stale
+
+
+def args(LID):
+    return argparse.Namespace(
+        season=2021, week=WEEK, league_id=LID, dev=False, base_url=None,
+    )
+
+
+@mock.patch('FF.delta.is_stale', return_value=False)
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_pull_scores(load_cookies, is_stale, snapshot, live, tmpdir, capsys):
+    local = tmpdir.mkdir('local')
+    remote = tmpdir.mkdir('remote')
+    save_data(str(local), snapshot, 2021, WEEK, 5)
+    save_data(str(remote), live, 2021, WEEK, 5)
+    with StubServer(str(remote)) as stub:
+        a = args(5)
+        a.base_url = stub.url
+        d = pull_scores(str(local), a)
+    assert week_stats(d) == week_stats(live)
+    assert d['FF']['scores_pull'] > d['FF']['full_pull']
+
+
+def test_pull_scores_stale(snapshot, tmpdir, capsys):
+    assert pull_scores(str(tmpdir), args(5)) is None
+    save_data(str(tmpdir), snapshot, 2021, WEEK, 5)
+    with mock.patch('FF.delta.connect_FF') as connect_FF:
+        assert pull_scores(str(tmpdir), args(5)) is None
+        connect_FF.assert_not_called()
+
+
+@mock.patch('FF.main.connect_FF', return_value=(200, {'teams': []}))
+@mock.patch('FF.delta.pull_scores', return_value=None)
+def test_main_pull_scores_fallback(pull_scores, connect_FF, capsys):
+    from FF.main import pull
+    a = args(5)
+    a.scores = True
+    a.matchup_only = False
+    d = pull(a)
+    assert d['FF']['full_pull'] > 0
+    connect_FF.assert_called_once()
+    out, err = capsys.readouterr()
+    assert 'stale' in out
@@ -0,0 +1,255 @@
+import copy
+import json
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.diff import Change
+from FF.diff import changed_entries
+from FF.diff import diff_snapshots
+from FF.diff import format_diff
+from FF.diff import PROJ_EPSILON
+from FF.diff import projection
+from FF.diff import Snapshot
+from FF.main import Colors
+from FF.main import main
+from FF.main import parse_args
+from FF.main import save_data
+from FF.storage import entry_digests
+
+
+@pytest.fixture(scope='module')
+def season():
+    return generate_league(teams=4, weeks=8, played=8, seed=2)
+
+
+def edited(d):
+    """`d` with a drop, an add, a slot move, an injury and a projection
+    move on team 1 and nothing else changed.
+    """
+    d = copy.deepcopy(d)
+    entries = d['teams'][0]['roster']['entries']
+    dropped = entries.pop(0)
+    added = copy.deepcopy(dropped)
+    added['playerId'] = 9999
+    added['playerPoolEntry']['player']['fullName'] = 'New Guy'
+    entries.append(added)
+    entries[1]['lineupSlotId'] = 20
+    entries[2]['playerPoolEntry']['player']['injuryStatus'] = 'OUT'
+    for stat in entries[3]['playerPoolEntry']['player']['stats']:
+        if (
+            stat['scoringPeriodId'] == d['scoringPeriodId'] and
+            stat['statSourceId'] == 1
+        ):
+            stat['appliedTotal'] += 2
+    return d
+
+
+def names(d):
+    return [
+        e['playerPoolEntry']['player']['fullName']
+        for e in d['teams'][0]['roster']['entries']
+    ]
+
+
+@pytest.fixture
+def saved(season, tmpdir, capsys):
+    old = as_of(season, 4)
+    new = edited(as_of(season, 5))
+    save_data(str(tmpdir), old, 2021, 4, 1)
+    save_data(str(tmpdir), new, 2021, 5, 1)
+    capsys.readouterr()
+    return old, new
+
+
+def snapshots(tmpdir):
+    return (
+        Snapshot(str(tmpdir.join('FF_2021_wk4_1.json')), 2021, 4),
+        Snapshot(str(tmpdir.join('FF_2021_wk5_1.json')), 2021, 5),
+    )
+
+
+def proj_moves(old, new):
+    """The 'proj' changes from week 4's projections in `old` to week
+    5's in `new`.
+    """
+    moves = []
+    for before, after in zip(old['teams'], new['teams']):
+        entries = {e['playerId']: e for e in before['roster']['entries']}
+        for e in after['roster']['entries']:
+            if e['playerId'] not in entries:
+                continue
+            proj = (
+                projection(entries[e['playerId']], 2021, 4),
+                projection(e, 2021, 5),
+            )
+            if abs(proj[1] - proj[0]) > PROJ_EPSILON:
+                name = e['playerPoolEntry']['player']['fullName']
+                moves.append(Change(after['id'], 'proj', name, *proj))
+    return moves
+
+
+def test_changed_entries(saved, tmpdir):
+    old, new = saved
+    changed = changed_entries(*(s.digests for s in snapshots(tmpdir)))
+    entries = old['teams'][0]['roster']['entries']
+    assert changed[1] >= {9999} | {
+        entries[i]['playerId'] for i in (0, 2, 3, 4)
+    }
+    moved = {}
+    for c in proj_moves(old, new):
+        moved.setdefault(c.TID, set()).add(c.name)
+    for team in new['teams'][1:]:
+        assert {
+            e['playerPoolEntry']['player']['fullName']
+            for e in team['roster']['entries']
+            if e['playerId'] in changed.get(team['id'], ())
+        } == moved.get(team['id'], set())
+
+
+def test_diff_snapshots(saved, tmpdir):
+    old, new = saved
+    entries = old['teams'][0]['roster']['entries']
+    slot = {0: 'QB', 2: 'RB', 4: 'WR'}[entries[2]['lineupSlotId']]
+    _, moved, hurt, projected = names(old)[1:5]
+    changes = diff_snapshots(*snapshots(tmpdir))
+    assert [c for c in changes if c.kind != 'proj'] == [
+        Change(1, 'slot', moved, slot, 'B'),
+        Change(1, 'status', hurt, 'ACTIVE', 'OUT'),
+        Change(1, 'add', 'New Guy', None, 'QB'),
+        Change(1, 'drop', names(old)[0], 'QB', None),
+    ]
+    assert [c for c in changes if c.kind == 'proj'] == proj_moves(old, new)
+    assert any(c.name == projected for c in proj_moves(old, new))
+
+
+def test_projection():
+    def stat(year, split, total):
+        return {
+            'appliedTotal': total, 'scoringPeriodId': 5, 'seasonId': year,
+            'statSourceId': 1, 'statSplitTypeId': split,
+        }
+
+    # A backfilled season's week 5 and a season split come first.
+    entry = {'playerPoolEntry': {'player': {'stats': [
+        stat(2020, 1, 4.0), stat(2021, 0, 150.0), stat(2021, 1, 12.04),
+    ]}}}
+    assert projection(entry, 2021, 5) == 12.0
+    assert projection(entry, 2019, 5) is None
+
+
+def test_diff_unchanged_snapshots_not_read(season, tmpdir, capsys):
+    # Week 5 pulled again after its games: the stat history grows, but
+    # no slot, status or week 5 projection moves.
+    early = tmpdir.mkdir('early')
+    late = tmpdir.mkdir('late')
+    save_data(str(early), as_of(season, 5), 2021, 5, 1)
+    save_data(str(late), as_of(season, 6), 2021, 5, 1)
+    path = 'FF_2021_wk5_1.json'
+    with mock.patch('FF.diff.read_snapshot') as read:
+        assert diff_snapshots(
+            Snapshot(str(early.join(path)), 2021, 5),
+            Snapshot(str(late.join(path)), 2021, 5),
+        ) == []
+    read.assert_not_called()
+
+
+def test_diff_plain_snapshot(saved, tmpdir):
+    _, new = saved
+    # Digested from the whole snapshot rather than the manifest.
+    plain = tmpdir.join('plain.json')
+    plain.write(json.dumps(new))
+    _, new_snapshot = snapshots(tmpdir)
+    assert entry_digests(str(plain), 2021, 5) == new_snapshot.digests
+    # Another week's digests are read in full.
+    assert entry_digests(new_snapshot.path, 2021, 4) == entry_digests(
+        str(plain), 2021, 4,
+    )
+
+
+def test_format_diff():
+    changes = [
+        Change(1, 'add', 'New Guy', None, 'RB'),
+        Change(1, 'proj', 'Some One', 10.0, 12.5),
+        Change(2, 'status', 'Hurt Guy', 'ACTIVE', 'OUT'),
+    ]
+    assert format_diff(changes, {1: 'T1', 2: 'T2'}, 'Title').split('\n') == [
+        'Title',
+        f'{Colors.CYAN}T1{Colors.ENDC}',
+        f'{Colors.GREEN}+ {"New Guy":<24}RB{Colors.ENDC}',
+        f'  {"Some One":<24}{"proj":<8}10.0 -> 12.5 '
+        f'({Colors.GREEN}+2.5{Colors.ENDC})',
+        f'{Colors.CYAN}T2{Colors.ENDC}',
+        f'{Colors.YELLOW}  {"Hurt Guy":<24}{"status":<8}ACTIVE -> OUT'
+        f'{Colors.ENDC}',
+    ]
+    assert format_diff([], {}, 'Title') == 'Title: no roster changes'
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_diff(
+    mock_parse_args, check_cookies_exists, update_cookies, saved, tmpdir,
+    capsys,
+):
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '5', '-l', '1', '-t', '1', '--diff', '4',
+    ])
+    with mock.patch('FF.diff.DATA_PATH', str(tmpdir)):
+        assert main() == 0
+    out, _ = capsys.readouterr()
+    lines = out.split('\n')
+    assert lines[0] == 'Week 4 -> week 5'
+    assert lines[1] == f'{Colors.CYAN}T1{Colors.ENDC}'
+    assert 'New Guy' in out
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_diff_pull(
+    mock_parse_args, check_cookies_exists, update_cookies, saved, tmpdir,
+    capsys,
+):
+    old, new = saved
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '4', '-l', '1', '-t', '1', '-p', '--diff', '4',
+    ])
+
+    def pull_and_save(args, profiler):
+        # Replaces the saved week 4.
+        save_data(str(tmpdir), edited(old), 2021, 4, 1)
+
+    with mock.patch('FF.diff.DATA_PATH', str(tmpdir)):
+        with mock.patch('FF.diff.pull_and_save', side_effect=pull_and_save):
+            assert main() == 0
+    out, _ = capsys.readouterr()
+    assert out.startswith('Saving data...\nWeek 4: saved -> pulled\n')
+    assert 'New Guy' in out
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_diff_pull_second_week(
+    mock_parse_args, check_cookies_exists, update_cookies, saved, tmpdir,
+    capsys,
+):
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '8', '-l', '1', '-t', '1', '-p', '--diff', '4',
+        '5',
+    ])
+    with mock.patch('FF.diff.DATA_PATH', str(tmpdir)):
+        with mock.patch('FF.diff.pull_and_save') as pull_and_save:
+            assert main() == 0
+    assert pull_and_save.call_args[0][0].week == 5
+    out, _ = capsys.readouterr()
+    assert 'Week 4 -> week 5' in out
+
+
+def test_snapshot_missing(tmpdir):
+    with pytest.raises(SystemExit, match='No saved snapshot for week 3'):
+        Snapshot(str(tmpdir.join('FF_2021_wk3_1.json')), 2021, 3)
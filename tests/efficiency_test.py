@@ -0,0 +1,129 @@
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.cache import RenderCache
+from FF.efficiency import completed_weeks
+from FF.efficiency import Efficiency
+from FF.efficiency import format_efficiency
+from FF.efficiency import read_weeks
+from FF.efficiency import season_efficiency
+from FF.efficiency import totals
+from FF.main import Colors
+from FF.main import main
+from FF.main import parse_args
+from FF.main import Roster
+from FF.main import save_data
+
+
+@pytest.fixture(scope='module')
+def season():
+    return generate_league(teams=4, weeks=8, played=8, seed=4)
+
+
+@pytest.fixture
+def saved(season, tmpdir, capsys):
+    # Each week saved before its games, as a Tuesday pull would be.
+    for week in range(1, 7):
+        save_data(str(tmpdir), as_of(season, week), 2021, week, 1)
+    capsys.readouterr()
+    return str(tmpdir)
+
+
+def optimal(season, TID, week):
+    roster = Roster(TID)
+    team = next(t for t in season['teams'] if t['id'] == TID)
+    roster.load_team(team, 2021, week)
+    roster.decide_lineup('score')
+    return sum(p.score for p in roster.roster if p.shouldStart)
+
+
+def test_completed_weeks(season):
+    assert completed_weeks(season) == list(range(1, 9))
+    assert completed_weeks(generate_league(teams=4, played=3)) == [1, 2, 3]
+
+
+def test_season_efficiency(season, saved, capsys):
+    results, missing = season_efficiency(
+        saved, 2021, 1, [1, 2, 3, 4, 5, 7], jobs=2,
+    )
+    capsys.readouterr()
+    assert missing == [7]
+    assert sorted(results) == [1, 2, 3, 4, 5]
+    for m in season['schedule']:
+        week = m['matchupPeriodId']
+        if week not in results:
+            continue
+        for side in ('home', 'away'):
+            TID = m[side]['teamId']
+            actual, best = results[week][TID]
+            assert actual == pytest.approx(m[side]['totalPoints'])
+            # Player.score is rounded to a tenth.
+            assert best == pytest.approx(optimal(season, TID, week), abs=.5)
+    serial, _ = season_efficiency(saved, 2021, 1, [1, 2, 3, 4, 5], jobs=1)
+    assert serial == results
+
+
+def test_season_efficiency_cached(saved, tmpdir):
+    cache = RenderCache(str(tmpdir.join('cache')))
+    results, _ = season_efficiency(saved, 2021, 1, [1, 2, 3], cache)
+    with mock.patch('FF.efficiency.read_week') as read_week:
+        assert season_efficiency(saved, 2021, 1, [1, 2, 3], cache)[0] == (
+            results
+        )
+    read_week.assert_not_called()
+    # A new week 3 snapshot changes week 3 (its lineups) and week 2 (its
+    # scores), and only those are read again.
+    save_data(saved, as_of(generate_league(teams=4, seed=9), 3), 2021, 3, 1)
+    with mock.patch(
+        'FF.efficiency.read_weeks', wraps=read_weeks,
+    ) as wrapped:
+        changed, _ = season_efficiency(saved, 2021, 1, [1, 2, 3], cache)
+    assert sorted(wrapped.call_args[0][0]) == [2, 3, 4]
+    assert changed[1] == results[1]
+    assert changed[2] != results[2]
+
+
+def test_totals_and_format():
+    teams = totals({
+        1: {1: (80.0, 100.0), 2: (90.0, 90.0)},
+        2: {1: (100.0, 100.0), 2: (70.0, 100.0)},
+    })
+    assert teams == [
+        Efficiency(1, 180.0, 200.0, 2),
+        Efficiency(2, 160.0, 190.0, 2),
+    ]
+    assert teams[0].bench == 20.0
+    lines = format_efficiency(teams, {1: 'T1', 2: 'T2'}, 2).split('\n')
+    assert lines[2] == 'T1          2    180.0    200.0    20.0   90.0'
+    assert lines[3].startswith(f'{Colors.CYAN}T2 ')
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_efficiency(
+    mock_parse_args, check_cookies_exists, update_cookies, season, saved,
+    capsys,
+):
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '6', '-l', '1', '-t', '1', '--efficiency',
+        '--no-cache',
+    ])
+    with mock.patch('FF.main.DATA_PATH', saved):
+        with mock.patch('FF.efficiency.DATA_PATH', saved):
+            assert main() == 0
+    out, _ = capsys.readouterr()
+    lines = out.split('\n')
+    # Weeks 7 and 8 are decided in the synthetic schedule but not saved.
+    assert lines[0] == (
+        f'{Colors.YELLOW}No snapshot for week 7, 8; pull it with -p -w WEEK'
+        f'{Colors.ENDC}'
+    )
+    assert lines[1].split() == [
+        'Team', 'Weeks', 'Actual', 'Optimal', 'Bench', 'Eff%',
+    ]
+    assert len(lines) == 2 + 1 + 4 + 1
+    assert lines[-1] == ''
@@ -0,0 +1,164 @@
+import argparse
+import sys
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.league import League
+from FF.main import build_standings
+from FF.main import build_team
+from FF.main import build_teams
+from FF.main import format_matchup
+from FF.main import format_scoreboard
+from FF.main import main
+from FF.main import parse_args
+from FF.main import save_data
+from FF.profiling import Profiler
+
+
+@pytest.fixture
+def d():
+    return generate_league(teams=6, played=3, seed=5)
+
+
+@pytest.fixture
+def league(d):
+    return League(d, 2021, 4)
+
+
+def test_team(league, d, capsys):
+    team = league.team(2)
+    # Quiet by default.
+    assert capsys.readouterr().out == ''
+    expected = build_team(
+        d, 2, argparse.Namespace(season=2021, week=4), Profiler(),
+    )
+    assert team.format_roster() == expected.format_roster()
+    assert league.team(2) is team
+    assert league.team(2, week=3) is not team
+
+
+def test_quiet_leaves_stdout(d, capsys):
+    stdout = sys.stdout
+    with mock.patch('contextlib.redirect_stdout') as redirect:
+        League(d, 2021, 4).teams()
+    redirect.assert_not_called()
+    assert sys.stdout is stdout
+    assert capsys.readouterr().out == ''
+    League(d, 2021, 4, quiet=False).team(1)
+    assert 'Deciding best lineup...' in capsys.readouterr().out
+
+
+def test_team_built_once(league):
+    with mock.patch('FF.league.build_team') as build:
+        league.team(1)
+        league.team(1)
+        league.matchup(4, 1)
+    assert build.call_count == 2
+
+
+def test_matchup(league, d):
+    m = next(m for m in d['schedule'] if m['matchupPeriodId'] == 4)
+    home, away = m['home']['teamId'], m['away']['teamId']
+    myTeam, opTeam = league.matchup(4, home)
+    assert (myTeam.TID, opTeam.TID) == (home, away)
+    assert league.matchup(4, opTeam.TID) == (opTeam, myTeam)
+
+
+def test_matchup_bye(league, d):
+    d['schedule'] = [m for m in d['schedule'] if m['matchupPeriodId'] != 4]
+    with pytest.raises(SystemExit, match='no matchup in week 4'):
+        league.matchup(4, 1)
+
+
+def test_standings(league, d, capsys):
+    teams = league.standings()
+    expected = build_standings(d, 2021, 4)
+    assert [t.TID for t in teams] == [t.TID for t in expected]
+    assert [t.wins for t in teams] == [t.wins for t in expected]
+    assert league.standings() is teams
+    assert league.team_ids == [1, 2, 3, 4, 5, 6]
+
+
+def test_load(d, tmpdir, capsys):
+    save_data(str(tmpdir), d, 2021, 4, 7)
+    league = League.load(str(tmpdir), 2021, 4, 7)
+    assert league.d == d
+    assert league.team(1).TID == 1
+
+
+def test_profiler(d):
+    profiler = Profiler(enabled=True)
+    league = League(d, 2021, 4, profiler)
+    league.team(1)
+    league.team(1)
+    league.standings()
+    assert profiler.phases['generate_roster'].calls == 1
+    assert profiler.phases['generate_record'].calls == 2
+
+
+def test_teams(league, d, capsys):
+    mine = league.team(3)
+    teams = league.teams()
+    assert list(teams) == [1, 2, 3, 4, 5, 6]
+    assert teams[3] is mine
+    args = argparse.Namespace(season=2021, week=4)
+    for TID, team in teams.items():
+        expected = build_team(d, TID, args, Profiler())
+        assert team.format_roster() == expected.format_roster()
+        assert (team.op_TID, team.winner) == (
+            expected.op_TID, expected.winner,
+        )
+    assert league.teams() == teams
+
+
+def test_build_teams_bad_snapshot(d):
+    del d['schedule']
+    with pytest.raises(SystemExit, match='Error parsing data'):
+        build_teams(d, 2021, 4, Profiler())
+
+
+def test_scoreboard(league, d):
+    matchups = league.scoreboard()
+    assert [(a.TID, h.TID) for a, h in matchups] == [
+        (m['away']['teamId'], m['home']['teamId'])
+        for m in d['schedule'] if m['matchupPeriodId'] == 4
+    ]
+    assert len(league.scoreboard(3)) == 3
+
+
+def test_format_scoreboard(league):
+    matchups = league.scoreboard()
+    compact = format_scoreboard(matchups, 2).split('\n')
+    assert len(compact) == 2 + len(matchups)
+    assert compact[0].split()[:2] == ['Away', 'Record']
+    for line, (away, home) in zip(compact[2:], matchups):
+        assert line.index(away.abbrev) < line.index(home.abbrev)
+    assert format_scoreboard(matchups, 2, extended=True) == '\n\n'.join(
+        format_matchup(away, home) for away, home in matchups
+    )
+
+
+@pytest.mark.parametrize('layout', ('compact', 'extended'))
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_scoreboard(
+    mock_parse_args, check_cookies_exists, update_cookies, layout, d,
+    tmpdir, capsys,
+):
+    save_data(str(tmpdir), d, 2021, 4, 7)
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '4', '-l', '7', '-t', '2', '--no-cache',
+        '--scoreboard', layout,
+    ])
+    capsys.readouterr()
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        assert main() == 0
+    out, _ = capsys.readouterr()
+    league = League(d, 2021, 4)
+    expected = format_scoreboard(
+        league.scoreboard(), 2, layout == 'extended',
+    )
+    assert out == expected + '\n'
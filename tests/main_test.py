@@ -68,7 +68,33 @@ class MyMock:
             SWID='{12345}',
             espn_s2='ABCDE12345',
             matchup=True,
+            standings=False,
             dev=False,
+            simulate=None,
+            playoff_teams=None,
+            trade=None,
+            give=None,
+            get=None,
+            suggest_trades=False,
+            trade_key='proj',
+            profile=False,
+            profile_memory=False,
+            profile_cprofile=None,
+            profile_json=None,
+            base_url=None,
+            scores=False,
+            matchup_only=False,
+            gc=False,
+            scoreboard=None,
+            plan=False,
+            diff=None,
+            scoring=None,
+            local_proj=False,
+            efficiency=False,
+            sos=False,
+            player=None,
+            rate_limit=None,
+            no_cache=False,
         )
 
     def mock_args_main():
@@ -82,7 +108,33 @@ class MyMock:
             SWID='{12345}',
             espn_s2='ABCDE12345',
             matchup=False,
+            standings=False,
             dev=False,
+            simulate=None,
+            playoff_teams=None,
+            trade=None,
+            give=None,
+            get=None,
+            suggest_trades=False,
+            trade_key='proj',
+            profile=False,
+            profile_memory=False,
+            profile_cprofile=None,
+            profile_json=None,
+            base_url=None,
+            scores=False,
+            matchup_only=False,
+            gc=False,
+            scoreboard=None,
+            plan=False,
+            diff=None,
+            scoring=None,
+            local_proj=False,
+            efficiency=False,
+            sos=False,
+            player=None,
+            rate_limit=None,
+            no_cache=False,
         )
 
     def mock_args_main_dev():
@@ -96,7 +148,33 @@ class MyMock:
             SWID='{12345}',
             espn_s2='ABCDE12345',
             matchup=False,
+            standings=False,
             dev=True,
+            simulate=None,
+            playoff_teams=None,
+            trade=None,
+            give=None,
+            get=None,
+            suggest_trades=False,
+            trade_key='proj',
+            profile=False,
+            profile_memory=False,
+            profile_cprofile=None,
+            profile_json=None,
+            base_url=None,
+            scores=False,
+            matchup_only=False,
+            gc=False,
+            scoreboard=None,
+            plan=False,
+            diff=None,
+            scoring=None,
+            local_proj=False,
+            efficiency=False,
+            sos=False,
+            player=None,
+            rate_limit=None,
+            no_cache=False,
         )
 
     def mock_args_main_matchup():
@@ -110,7 +188,33 @@ class MyMock:
             SWID='{12345}',
             espn_s2='ABCDE12345',
             matchup=True,
+            standings=False,
             dev=False,
+            simulate=None,
+            playoff_teams=None,
+            trade=None,
+            give=None,
+            get=None,
+            suggest_trades=False,
+            trade_key='proj',
+            profile=False,
+            profile_memory=False,
+            profile_cprofile=None,
+            profile_json=None,
+            base_url=None,
+            scores=False,
+            matchup_only=False,
+            gc=False,
+            scoreboard=None,
+            plan=False,
+            diff=None,
+            scoring=None,
+            local_proj=False,
+            efficiency=False,
+            sos=False,
+            player=None,
+            rate_limit=None,
+            no_cache=False,
         )
 
     def mock_args_default():
@@ -124,7 +228,33 @@ class MyMock:
             SWID=None,
             espn_s2=None,
             matchup=False,
+            standings=False,
             dev=False,
+            simulate=None,
+            playoff_teams=None,
+            trade=None,
+            give=None,
+            get=None,
+            suggest_trades=False,
+            trade_key='proj',
+            profile=False,
+            profile_memory=False,
+            profile_cprofile=None,
+            profile_json=None,
+            base_url=None,
+            scores=False,
+            matchup_only=False,
+            gc=False,
+            scoreboard=None,
+            plan=False,
+            diff=None,
+            scoring=None,
+            local_proj=False,
+            efficiency=False,
+            sos=False,
+            player=None,
+            rate_limit=None,
+            no_cache=False,
         )
 
     def mock_args_one_player():
@@ -399,6 +529,35 @@ def test_load_data(tmpdir, mock_json_data):
         assert isinstance(d, dict)
 
 
+@pytest.mark.parametrize(
+    ('meta', 'options', 'error'),
+    (
+        ({}, {'standings': True}, None),
+        ({'teams': [1, 2], 'periods': [2]}, {}, None),
+        ({'teams': [1, 2], 'periods': [2]}, {'team_id': 3}, 'Team id: 3'),
+        ({'teams': [1, 2], 'periods': [2]}, {'standings': True}, 'only'),
+        ({'teams': [1, 2], 'periods': [2]}, {'simulate': 100}, 'only'),
+        ({'teams': [1, 2], 'periods': [1]}, {}, 'Week 2'),
+    ),
+)
+def test_load_data_partial(tmpdir, meta, options, error):
+    save_data(tmpdir, {'FF': meta}, 1, 2, 3)
+    args = argparse.Namespace(
+        **{'season': 1, 'week': 2, 'league_id': 3, 'team_id': 1, **options},
+    )
+    if error is None:
+        assert load_data(tmpdir, args) == {'FF': meta}
+    else:
+        with pytest.raises(SystemExit, match=error):
+            load_data(tmpdir, args)
+
+
+def test_generate_roster_partial():
+    d = {'FF': {'teams': [1, 2], 'periods': [2]}, 'teams': []}
+    with pytest.raises(SystemExit, match='Team id: 7 not in the saved'):
+        Roster(7).generate_roster(d, 1, 2)
+
+
 def test_load_data_FileNotFoundError():
     with pytest.raises(FileNotFoundError):
         load_data('path/should/not/exist', MyMock.mock_args_cookies())
@@ -548,12 +707,12 @@ def test_print_roster(mock_roster_one_player, capsys):
     mock_roster_one_player.total_score = 0
     mock_roster_one_player.print_roster()
     out, err = capsys.readouterr()
-    HEADER = '\u2550'*80
+    HEADER = '\u2550'*91
     listed = out.split('\n')
     culled = listed[5:]
     joined = '\n'.join(culled)
     exp = 'Slot  Pos Player         Proj  Score  ' \
-          'TAR/gm    Yds   Cmp%   TD      AVG     TOT\n' \
+          'TAR/gm    Yds   Cmp%   TD      AVG     TOT  PRK  OPRK\n' \
           f'{HEADER}\n' \
           '\x1b[94mFLX:\x1b[0m  RB  \x1b[32mN. ' \
           'Chubb   \x1b[0m   \x1b[90m 13.0\x1b[0m ' \
@@ -564,7 +723,9 @@ def test_print_roster(mock_roster_one_player, capsys):
           '      -' \
           '    3' \
           '     17.9' \
-          '    35.9\n' \
+          '    35.9' \
+          '    -' \
+          '     -\n' \
           f'{HEADER}\n' \
           'Yet to Play: 0              0      0\n'
     assert joined == exp
@@ -962,7 +1123,7 @@ def test_Roster_generate_record(mock_roster):
 
 
 @mock.patch('FF.main.load_data')
-@mock.patch('FF.main.Roster.print_roster')
+@mock.patch('FF.main.Roster.format_roster', return_value='')
 @mock.patch('FF.main.Roster.sort_roster_by_pos')
 @mock.patch('FF.main.Roster.decide_lineup')
 @mock.patch('FF.main.Roster.ytp_projected')
@@ -990,7 +1151,7 @@ def test_main(
 
 
 @mock.patch('FF.main.load_data')
-@mock.patch('FF.main.Roster.print_roster')
+@mock.patch('FF.main.Roster.format_roster', return_value='')
 @mock.patch('FF.main.Roster.sort_roster_by_pos')
 @mock.patch('FF.main.Roster.decide_lineup')
 @mock.patch('FF.main.Roster.ytp_projected')
@@ -1018,7 +1179,7 @@ def test_main_dev(
 
 
 @mock.patch('FF.main.load_data')
-@mock.patch('FF.main.print_matchup')
+@mock.patch('FF.main.format_matchup', return_value='')
 @mock.patch('FF.main.Roster.sort_roster_by_pos')
 @mock.patch('FF.main.Roster.decide_lineup')
 @mock.patch('FF.main.Roster.ytp_projected')
@@ -1045,3 +1206,81 @@ def test_main_matchup(
         myTeam.op_TID = 4
         r = main()
         assert r == 0
+
+
+@mock.patch('FF.main.load_data')
+@mock.patch('FF.simulate.run_simulation', return_value=0)
+@mock.patch('FF.main.Roster')
+@mock.patch('FF.main.load_cookies', return_value=4)
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.parse_args')
+def test_main_simulate(
+    mock_parse_args,
+    update_cookies,
+    load_cookies,
+    roster,
+    run_simulation,
+    mock_load_data,
+):
+    args = MyMock.mock_args_main()
+    args.simulate = 100
+    mock_parse_args.return_value = args
+    r = main()
+    assert r == 0
+    run_simulation.assert_called_once_with(mock_load_data.return_value, args)
+    roster.assert_not_called()
+
+
+@mock.patch('FF.main.load_data')
+@mock.patch('FF.trade.run_trade', return_value=0)
+@mock.patch('FF.main.Roster')
+@mock.patch('FF.main.load_cookies', return_value=4)
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.parse_args')
+def test_main_trade(
+    mock_parse_args,
+    update_cookies,
+    load_cookies,
+    roster,
+    run_trade,
+    mock_load_data,
+):
+    args = MyMock.mock_args_main()
+    args.suggest_trades = True
+    mock_parse_args.return_value = args
+    r = main()
+    assert r == 0
+    run_trade.assert_called_once_with(mock_load_data.return_value, args)
+    roster.assert_not_called()
+
+
+@mock.patch('FF.main.load_data')
+@mock.patch('FF.main.format_matchup', return_value='')
+@mock.patch('FF.main.Roster')
+@mock.patch('FF.main.load_cookies', return_value=4)
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.parse_args')
+def test_main_profile(
+    mock_parse_args,
+    update_cookies,
+    load_cookies,
+    roster,
+    print_matchup,
+    mock_load_data,
+    capsys,
+):
+    args = MyMock.mock_args_main_matchup()
+    args.profile_json = '-'
+    mock_parse_args.return_value = args
+    r = main()
+    assert r == 0
+    out, err = capsys.readouterr()
+    phases = {p['name']: p for p in json.loads(out)['phases']}
+    assert list(phases) == [
+        'config', 'render_cache', 'load_data', 'ratings',
+        'generate_roster', 'generate_record', 'decide_lineup', 'render',
+    ]
+    # Computed once for both teams.
+    assert phases['ratings']['calls'] == 1
+    assert phases['generate_roster']['calls'] == 2
+    assert phases['render']['calls'] == 1
@@ -0,0 +1,161 @@
+import argparse
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import bye_week
+from benchmarks.synthetic import generate_league
+from FF.main import load_data
+from FF.main import save_data
+from FF.planner import format_plan
+from FF.planner import has_projections
+from FF.planner import plan
+from FF.planner import plan_weeks
+from FF.planner import Projections
+from FF.planner import projections
+from FF.planner import run_plan
+from FF.planner import WeekPlan
+from FF.storage import locked
+from FF.storage import read_snapshot
+from FF.stub import StubServer
+
+LINEUP = [
+    ('QB1', 'QB', [20, 20, 0]),
+    ('QB2', 'QB', [10, 10, 10]),
+    ('RB1', 'RB', [15, 0, 15]),
+    ('RB2', 'RB', [12, 12, 12]),
+    ('WR1', 'WR', [14, 14, 14]),
+    ('WR2', 'WR', [11, None, 11]),
+    ('TE1', 'TE', [8, 8, 8]),
+    ('RB3', 'RB', [6, 6, 6]),
+    ('K1', 'K', [7, 7, 7]),
+    ('DST1', 'DST', [9, 9, 0]),
+]
+
+
+def matrix():
+    return Projections(
+        [5, 6, 7],
+        [name for name, _, _ in LINEUP],
+        [pos for _, pos, _ in LINEUP],
+        [row for _, _, row in LINEUP],
+    )
+
+
+def test_plan():
+    assert plan(matrix()) == [
+        WeekPlan(5, [], [], 0.0),
+        # RB3 moves up from the flex; nobody is left for it.
+        WeekPlan(6, ['RB1', 'WR2'], ['WR', 'FLEX'], 26.0),
+        # QB2 steps in; no DST.
+        WeekPlan(7, ['QB1', 'DST1'], ['DST'], 19.0),
+    ]
+
+
+def test_format_plan():
+    lines = format_plan(plan(matrix())).split('\n')
+    assert lines[0].split() == ['Week', 'Loss', 'Unfilled', 'Out']
+    assert lines[2].split() == ['5', '0.0', '-', '-']
+    assert 'WR FLEX' in lines[3]
+    assert 'RB1, WR2' in lines[3]
+
+
+@pytest.fixture
+def d():
+    return generate_league(teams=4, played=3, future=True)
+
+
+def test_projections(d):
+    weeks = plan_weeks(d, 4)
+    assert weeks == list(range(5, 14))
+    team = d['teams'][0]
+    proj = projections(team, 2021, weeks)
+    assert len(proj.rows) == len(team['roster']['entries'])
+    for e, row in zip(team['roster']['entries'], proj.rows):
+        bye = bye_week(e['playerPoolEntry']['player']['proTeamId'], 13)
+        if bye in weeks:
+            assert row[weeks.index(bye)] == 0
+
+
+def test_has_projections(d):
+    weeks = plan_weeks(d, 4)
+    assert has_projections(d, 2021, weeks, 1)
+    assert not has_projections(d, 2021, weeks + [14], 1)
+    assert not has_projections(
+        generate_league(teams=4, played=3), 2021, weeks, 1,
+    )
+    d['FF'] = {'projections': {'weeks': weeks[:2], 'teams': [1]}}
+    assert not has_projections(d, 2021, weeks, 1)
+    # Pulled for team 2 only: team 1's own stats decide.
+    plain = generate_league(teams=4, played=3)
+    plain['FF'] = {'projections': {'weeks': weeks, 'teams': [2]}}
+    assert has_projections(plain, 2021, weeks, 2)
+    assert not has_projections(plain, 2021, weeks, 1)
+
+
+def args(stub, TID=2):
+    return argparse.Namespace(
+        season=2021, week=4, league_id=0, team_id=TID, dev=False,
+        base_url=stub.url,
+    )
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_run_plan_pulls_once(load_cookies, d, tmpdir, capsys):
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), d, 2021, 4, 0)
+    save_data(str(tmpdir), generate_league(teams=4, played=3), 2021, 4, 0)
+    expected, expected3 = (
+        format_plan(plan(projections(team, 2021, plan_weeks(d, 4))))
+        for team in d['teams'][1:3]
+    )
+    with StubServer(str(remote)) as stub:
+        for _ in range(2):
+            local = load_data(str(tmpdir), args(stub))
+            assert run_plan(local, args(stub), str(tmpdir)) == 0
+            out, _ = capsys.readouterr()
+            assert out.endswith(expected + '\n')
+        assert stub.stats['requests'] == 1
+        # Another team's projections weren't pulled yet.
+        local = load_data(str(tmpdir), args(stub, 3))
+        assert run_plan(local, args(stub, 3), str(tmpdir)) == 0
+        out, _ = capsys.readouterr()
+        assert out.startswith('Pulling projections...\n')
+        assert out.endswith(expected3 + '\n')
+        assert stub.stats['requests'] == 2
+    assert local['FF']['projections'] == {
+        'weeks': plan_weeks(d, 4), 'teams': [2, 3],
+    }
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_run_plan_keeps_concurrent_pull(load_cookies, d, tmpdir, capsys):
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), d, 2021, 4, 0)
+    save_data(str(tmpdir), generate_league(teams=4, played=3), 2021, 4, 0)
+    with StubServer(str(remote)) as stub:
+        local = load_data(str(tmpdir), args(stub))
+        # Pulled by another process after this one loaded.
+        pulled = load_data(str(tmpdir), args(stub))
+        pulled['teams'][0]['abbrev'] = 'NEW'
+        save_data(str(tmpdir), pulled, 2021, 4, 0)
+        with mock.patch('FF.main.locked', wraps=locked) as lock:
+            assert run_plan(local, args(stub), str(tmpdir)) == 0
+    path = str(tmpdir.join('FF_2021_wk4_0.json'))
+    lock.assert_called_once_with(f'{path}.lock')
+    saved = read_snapshot(path)
+    assert saved['teams'][0]['abbrev'] == 'NEW'
+    assert has_projections(saved, 2021, plan_weeks(d, 4), 2)
+    capsys.readouterr()
+
+
+def test_run_plan_season_over(d, capsys):
+    assert run_plan(d, argparse.Namespace(season=2021, week=13)) == 0
+    out, _ = capsys.readouterr()
+    assert out == 'No regular season weeks left to plan.\n'
@@ -0,0 +1,73 @@
+import json
+import pstats
+
+from FF.profiling import Profiler
+
+
+def test_profiler_disabled(capsys):
+    profiler = Profiler()
+    with profiler:
+        with profiler.phase('a'):
+            pass
+    profiler.report()
+    assert profiler.phases == {}
+    assert capsys.readouterr() == ('', '')
+
+
+def test_profiler_phases(capsys):
+    profiler = Profiler(enabled=True)
+    with profiler:
+        for _ in range(3):
+            with profiler.phase('a'):
+                pass
+        with profiler.phase('b'):
+            pass
+    assert [(p.name, p.calls) for p in profiler.phases.values()] == [
+        ('a', 3), ('b', 1),
+    ]
+    assert profiler.total >= sum(p.seconds for p in profiler.phases.values())
+    assert profiler.phases['a'].peak is None
+    profiler.report()
+    out, err = capsys.readouterr()
+    lines = err.split('\n')
+    assert lines[0].split() == ['Phase', 'Calls', 'Time', 'ms', '%']
+    assert lines[1].split()[:2] == ['a', '3']
+    assert lines[3].split()[0] == 'total'
+
+
+def test_profiler_memory():
+    profiler = Profiler(memory=True)
+    with profiler:
+        with profiler.phase('outer'):
+            with profiler.phase('inner'):
+                data = bytearray(1 << 20)
+            del data
+        with profiler.phase('small'):
+            pass
+    assert profiler.enabled
+    assert profiler.phases['inner'].peak >= 1 << 20
+    assert profiler.phases['outer'].peak >= profiler.phases['inner'].peak
+    assert profiler.phases['small'].peak < 1 << 20
+
+
+def test_profiler_json(tmpdir):
+    file = tmpdir.join('profile.json')
+    profiler = Profiler(enabled=True)
+    with profiler:
+        with profiler.phase('a'):
+            pass
+    profiler.report(str(file))
+    report = json.loads(file.read())
+    assert report['memory'] is False
+    assert report['phases'][0]['name'] == 'a'
+    assert report['phases'][0]['calls'] == 1
+
+
+def test_profiler_cprofile(tmpdir):
+    file = tmpdir.join('stats.prof')
+    profiler = Profiler(cprofile=str(file))
+    with profiler:
+        with profiler.phase('a'):
+            sorted(range(100))
+    stats = pstats.Stats(str(file))
+    assert any('sorted' in func[2] for func in stats.stats)
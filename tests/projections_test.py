@@ -0,0 +1,118 @@
+import argparse
+import os
+
+import pytest
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.main import build_team
+from FF.profiling import Profiler
+from FF.projections import local_projections
+from FF.projections import MAX_HISTORY_WEIGHT
+from FF.projections import Model
+from FF.projections import model_path
+
+
+@pytest.fixture(scope='module')
+def season():
+    return generate_league(teams=4, weeks=8, played=8, seed=5)
+
+
+def players(d):
+    return len({
+        e['playerId'] for t in d['teams'] for e in t['roster']['entries']
+    })
+
+
+def test_update_is_incremental(season):
+    model = Model(2021)
+    assert model.update(as_of(season, 5), 5) == 4 * players(season)
+    assert model.update(as_of(season, 5), 5) == 0
+    # The next week folds in one more game each.
+    assert model.update(as_of(season, 6), 6) == players(season)
+    scratch = Model(2021)
+    scratch.update(as_of(season, 6), 6)
+    assert scratch.rows == model.rows
+    assert scratch.level == pytest.approx(model.level)
+    assert scratch.trend == pytest.approx(model.trend)
+    assert scratch.games == model.games == [5] * players(season)
+
+
+def test_save_load(season, tmpdir):
+    path = str(tmpdir.join('model.json'))
+    model = Model(2021)
+    model.update(as_of(season, 5), 5)
+    model.save(path)
+    loaded = Model.load(path, 2021)
+    assert (loaded.rows, loaded.level, loaded.trend) == (
+        model.rows, model.level, model.trend,
+    )
+    # Another season starts over.
+    assert Model.load(path, 2022).rows == {}
+    tmpdir.join('model.json').write('{')
+    assert Model.load(path, 2021).rows == {}
+
+
+def test_blend():
+    model = Model(2021)
+    d = {'teams': [{'roster': {'entries': [{
+        'playerId': 1,
+        'playerPoolEntry': {'player': {'stats': [
+            {
+                'scoringPeriodId': w, 'seasonId': 2021, 'statSourceId': 0,
+                'statSplitTypeId': 1, 'appliedTotal': 20.0,
+            }
+            for w in range(1, 41)
+        ]}},
+    }]}}]}
+    assert model.blend(1, 10.0) == 10.0
+    model.update(d, 41)
+    assert model.forecast(1) == pytest.approx(20.0)
+    # Bye or out.
+    assert model.blend(1, 0) == 0
+    # Forty games in, history nearly reaches its cap.
+    assert model.blend(1, 10.0) == pytest.approx(
+        10 + 10 * MAX_HISTORY_WEIGHT * 40 / 44, abs=.05,
+    )
+    # No games: ESPN's projection as it is.
+    assert model.blend(2, 10.0) == 10.0
+
+
+def test_local_projections(season, tmpdir):
+    args = argparse.Namespace(season=2021, week=6, league_id=3)
+    d = as_of(season, 6)
+    projections = local_projections(d, args, str(tmpdir))
+    assert os.path.exists(model_path(str(tmpdir), 2021, 3))
+    assert len(projections) == players(season)
+    mtime = os.stat(model_path(str(tmpdir), 2021, 3)).st_mtime_ns
+    assert local_projections(d, args, str(tmpdir)) == projections
+    # Nothing new to fold in: not saved again.
+    assert os.stat(model_path(str(tmpdir), 2021, 3)).st_mtime_ns == mtime
+
+
+def test_build_team_local_projections(season, capsys):
+    d = as_of(season, 6)
+    args = argparse.Namespace(season=2021, week=6)
+    espn = build_team(d, 1, args, Profiler())
+    bench = next(
+        p for p in espn.roster
+        if not p.shouldStart and p.pos in ('QB', 'RB', 'WR', 'TE')
+    )
+    local = build_team(d, 1, args, Profiler(), {bench.playerId: 99.0})
+    assert next(
+        p for p in local.roster if p.playerId == bench.playerId
+    ).shouldStart
+    starters = [p for p in local.roster if p.shouldStart]
+    assert len(starters) == len([p for p in espn.roster if p.shouldStart])
+    # Players without a local projection keep ESPN's.
+    assert all(
+        p.local_proj == p.proj for p in local.roster
+        if p.playerId != bench.playerId
+    )
+    # The Proj column and total show what the lineup was picked by.
+    picked = next(p for p in local.roster if p.playerId == bench.playerId)
+    assert ' 99.0' in picked.print_player(ext=True)
+    assert picked.print_player(ext=True) in local.format_roster()
+    assert local.total_projected == pytest.approx(sum(
+        p.local_proj for p in local.roster if p.starting
+    ))
@@ -0,0 +1,127 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from FF.main import connect_FF
+from FF.main import pull_stats
+from FF.ratelimit import SingleFlight
+from FF.ratelimit import TokenBucket
+from FF.stub import StubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(2, burst=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(.5)
+    assert bucket.acquire() == pytest.approx(.5)
+    assert (bucket.acquired, bucket.throttled) == (5, 2)
+    assert bucket.waited == pytest.approx(1)
+
+
+def test_token_bucket_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(1, burst=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 10
+    # Refills up to the burst size only.
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 1]
+
+
+def test_token_bucket_queued():
+    clock = FakeClock()
+    bucket = TokenBucket(4, burst=1, clock=clock, sleep=clock.sleep)
+    # Reservations made at the same instant queue behind each other.
+    assert [bucket.reserve() for _ in range(4)] == [0, .25, .5, .75]
+    assert clock.slept == []
+
+
+def test_token_bucket_disabled():
+    clock = FakeClock()
+    bucket = TokenBucket(0, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(100)] == [0] * 100
+    assert bucket.throttled == 0
+
+
+def test_single_flight_coalesces():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    results = []
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        return {'data': 1}
+
+    def call():
+        results.append(flight.do('key', fetch))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=call) for _ in range(4)]
+    for t in followers:
+        t.start()
+    while flight.coalesced < 4:
+        time.sleep(.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+    assert len(results) == 5
+    assert all(r is results[0] for r in results)
+    assert (flight.issued, flight.coalesced) == (1, 4)
+    # Completed calls are not cached.
+    flight.do('key', lambda: None)
+    assert flight.issued == 2
+
+
+def test_single_flight_error():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do('key', lambda: int('x'))
+    assert flight.do('key', lambda: 1) == 1
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 0, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_connect_FF_coalesced(load_cookies):
+    before = pull_stats()
+    results = []
+    with StubServer('./tests/data', latency=.2) as stub:
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    connect_FF(4, 0, False, stub.url),
+                ),
+            )
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        assert stub.stats['requests'] == 1
+    after = pull_stats()
+    assert after['requests_issued'] - before['requests_issued'] == 1
+    assert after['requests_coalesced'] - before['requests_coalesced'] == 7
+    assert len(results) == 8
+    assert all(r == (200, results[0][1]) for r in results)
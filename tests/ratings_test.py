@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from benchmarks.synthetic import generate_pro_schedule
+from FF.league import League
+from FF.main import build_team
+from FF.main import format_matchup
+from FF.main import PRO_SCHEDULE_MAX_AGE
+from FF.main import pull_and_save
+from FF.main import pull_pro_schedule
+from FF.main import render_view
+from FF.main import save_data
+from FF.main import starters_oprk
+from FF.profiling import Profiler
+from FF.ratings import defense_ranks
+from FF.ratings import league_ratings
+from FF.ratings import opponents
+from FF.ratings import pro_schedule_stamp
+from FF.ratings import ranks
+from FF.ratings import read_pro_schedule
+from FF.stub import StubServer
+
+COOKIES = {'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'}
+
+
+@pytest.fixture(scope='module')
+def league():
+    return generate_league(teams=6, played=3, seed=6)
+
+
+@pytest.fixture(scope='module')
+def schedule():
+    return generate_pro_schedule(weeks=13)
+
+
+def test_ranks():
+    assert ranks({1: 5.0, 2: 3.0, 3: 5.0, 4: 9.0}) == {1: 2, 2: 1, 3: 2, 4: 4}
+    assert ranks({1: 5.0, 2: 3.0, 3: 5.0}, descending=True) == {
+        1: 1, 2: 3, 3: 1,
+    }
+    assert ranks({}) == {}
+
+
+def test_defense_ranks(league):
+    defenses = defense_ranks(league)
+    ratings = league['positionAgainstOpponent']['positionalRatings']
+    assert set(defenses) == {int(pos) for pos in ratings}
+    for pos, by_team in defenses.items():
+        # ESPN's own ranks, 1 allowing the fewest points.
+        assert by_team == {
+            int(t): r['rank']
+            for t, r in ratings[str(pos)]['ratingsByOpponent'].items()
+        }
+    assert defense_ranks({}) == {}
+
+
+def test_opponents(schedule):
+    games = opponents(schedule, 4)
+    assert games
+    assert all(games[games[t]] == t for t in games)
+    # Teams on bye don't play.
+    assert len(games) < 32
+    assert opponents({}, 4) == {}
+
+
+def test_league_ratings(league, schedule):
+    ratings = league_ratings(league, 2021, 4, schedule)
+    averages = {}
+    for team in league['teams']:
+        for e in team['roster']['entries']:
+            player = e['playerPoolEntry']['player']
+            average = next(
+                s['appliedAverage'] for s in player['stats']
+                if s['id'] == '002021'
+            )
+            averages[e['playerId']] = (player['defaultPositionId'], average)
+    for playerId, (pos, average) in averages.items():
+        better = sum(
+            1 for p, a in averages.values() if p == pos and a > average
+        )
+        assert ratings.players[playerId] == better + 1
+    defenses = defense_ranks(league)
+    games = opponents(schedule, 4)
+    for team in league['teams']:
+        for e in team['roster']['entries']:
+            player = e['playerPoolEntry']['player']
+            opponent = games.get(player['proTeamId'])
+            if opponent is None:
+                assert e['playerId'] not in ratings.opponents
+            else:
+                assert ratings.opponents[e['playerId']] == defenses[
+                    player['defaultPositionId']
+                ][opponent]
+    assert league_ratings(league, 2021, 4).opponents == {}
+
+
+def test_roster_ranks(league, schedule, capsys):
+    args = argparse.Namespace(season=2021, week=4)
+    team = build_team(league, 1, args, Profiler())
+    ratings = league_ratings(league, 2021, 4)
+    assert all(p.pos_rank == ratings.players[p.playerId] for p in team.roster)
+    assert all(p.opp_rank is None for p in team.roster)
+    assert team.format_roster().split('\n')[7].split()[-2:] == [
+        str(team.roster[0].pos_rank), '-',
+    ]
+    scheduled = League(league, 2021, 4, schedule=schedule)
+    myTeam, opTeam = scheduled.matchup(4, 1)
+    assert any(p.opp_rank for p in myTeam.roster)
+    oprk = starters_oprk(myTeam)
+    assert oprk is not None
+    assert format_matchup(myTeam, opTeam).split('\n')[-1].startswith(
+        f'Starters avg OPRK:{oprk:>18}',
+    )
+    # Without the pro schedule, no OPRK line.
+    plain = League(league, 2021, 4)
+    lines = format_matchup(*plain.matchup(4, 1)).split('\n')
+    assert lines[-1].startswith('Yet to Play')
+    capsys.readouterr()
+
+
+def test_render_view_schedule(tmpdir):
+    args = argparse.Namespace(
+        season=2021, week=4, league_id=1, team_id=1, matchup=False,
+        standings=False, sos=False, scoreboard=None,
+    )
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        assert render_view(args)['pro_schedule'] is None
+        tmpdir.join('proTeamSchedules_2021.json').write('{}')
+        assert render_view(args)['pro_schedule'] == pro_schedule_stamp(
+            str(tmpdir), 2021,
+        )
+
+
+@mock.patch('FF.main.load_cookies', return_value=COOKIES)
+def test_pull_pro_schedule(load_cookies, schedule, tmpdir):
+    tmpdir.join('proTeamSchedules_2021.json').write(json.dumps(schedule))
+    with StubServer(str(tmpdir)) as server:
+        assert pull_pro_schedule(2021, False, server.url) == (200, schedule)
+        assert pull_pro_schedule(2020, False, server.url)[0] == 404
+        saved = tmpdir.mkdir('saved')
+        pull_pro_schedule(2021, False, server.url, str(saved))
+    assert read_pro_schedule(str(saved), 2021) == schedule
+
+
+@mock.patch('FF.main.load_cookies', return_value=COOKIES)
+def test_pull_saves_pro_schedule(load_cookies, league, schedule, tmpdir):
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), league, 2021, 4, 1)
+    remote.join('proTeamSchedules_2021.json').write(json.dumps(schedule))
+    local = tmpdir.mkdir('local')
+    args = argparse.Namespace(
+        season=2021, week=4, league_id=1, team_id=1, dev=False,
+        scores=False, matchup_only=False,
+    )
+    with StubServer(str(remote)) as stub, mock.patch(
+        'FF.main.DATA_PATH', str(local),
+    ):
+        args.base_url = stub.url
+        pull_and_save(args, Profiler())
+        assert stub.stats['requests'] == 2
+        assert read_pro_schedule(str(local), 2021) == schedule
+        # Under a week old: just the league.
+        pull_and_save(args, Profiler())
+        assert stub.stats['requests'] == 3
+        saved = str(local.join('proTeamSchedules_2021.json'))
+        old = time.time() - PRO_SCHEDULE_MAX_AGE - 60
+        os.utime(saved, (old, old))
+        pull_and_save(args, Profiler())
+        assert stub.stats['requests'] == 5
+    assert os.stat(saved).st_mtime > old
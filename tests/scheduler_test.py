@@ -0,0 +1,221 @@
+import argparse
+import time
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_pro_schedule
+from FF.main import Colors
+from FF.scheduler import game_windows
+from FF.scheduler import GAME_LENGTH
+from FF.scheduler import IDLE_EVERY
+from FF.scheduler import league_args
+from FF.scheduler import LIVE_EVERY
+from FF.scheduler import main
+from FF.scheduler import next_run
+from FF.scheduler import plan
+from FF.scheduler import Run
+from FF.scheduler import Scheduler
+from FF.scheduler import Window
+
+HOUR = 60 * 60
+
+
+class FakeClock:
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def time(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.t += seconds
+
+
+@pytest.fixture(scope='module')
+def schedule():
+    # Thursday midnight at 0: Thursday night's game kicks off at 20:15.
+    return generate_pro_schedule(weeks=6, kickoff=0)
+
+
+def league(LID):
+    return argparse.Namespace(
+        league_id=LID, season=2021, week=1, dev=False, base_url=None,
+        scores=False,
+    )
+
+
+def test_game_windows(schedule):
+    windows = game_windows(schedule)
+    assert [w for w in windows if w.week == 1] == [
+        # Thursday night
+        Window(20.25 * HOUR, 20.25 * HOUR + GAME_LENGTH, 1),
+        # Sunday early and late games, back to back
+        Window(85 * HOUR, 88.25 * HOUR + GAME_LENGTH, 1),
+        # Sunday night, Monday night
+        Window(92.25 * HOUR, 92.25 * HOUR + GAME_LENGTH, 1),
+        Window(116.25 * HOUR, 116.25 * HOUR + GAME_LENGTH, 1),
+    ]
+    assert {w.week for w in windows} == {1, 2, 3, 4, 5, 6}
+    assert game_windows({}) == []
+
+
+def test_plan(schedule):
+    windows = game_windows(schedule)
+    # Four idle runs, a live one every 5 minutes, then the final score.
+    runs = plan(windows, 0, 4 + int(GAME_LENGTH / LIVE_EVERY) + 1)
+    assert runs[:5] == [
+        Run(0, 1, False),
+        Run(6 * HOUR, 1, False),
+        Run(12 * HOUR, 1, False),
+        Run(18 * HOUR, 1, False),
+        # Kickoff
+        Run(20.25 * HOUR, 1, True),
+    ]
+    live = [r for r in runs if r.live]
+    assert all(b.at - a.at == LIVE_EVERY for a, b in zip(live, live[1:]))
+    # One last pull as the game ends, then back to idle.
+    assert runs[-1] == Run(20.25 * HOUR + GAME_LENGTH, 1, False)
+
+
+def test_next_run_between_weeks(schedule):
+    windows = game_windows(schedule)
+    monday = windows[3]
+    run = next_run(windows, monday.end, None)
+    assert run == Run(monday.end, 2, False)
+    assert next_run(windows, monday.end, run) == Run(
+        monday.end + IDLE_EVERY, 2, False,
+    )
+    # Late: pulls straight away.
+    late = next_run(windows, monday.end + 12 * HOUR, run)
+    assert late.at == monday.end + 12 * HOUR
+
+
+def test_next_run_season_over(schedule):
+    windows = game_windows(schedule)
+    after = windows[-1].end + HOUR
+    assert next_run(windows, after, None) == Run(after, 6, False)
+    assert next_run([], 0, None) == Run(0, 0, False)
+
+
+def test_scheduler(schedule):
+    clock = FakeClock()
+    fetches = []
+    pulls = []
+
+    def fetch():
+        fetches.append(clock.time())
+        return 200, schedule
+
+    def pull(args):
+        pulls.append((clock.time(), args.league_id, args.week, args.scores))
+
+    scheduler = Scheduler(
+        [league(1), league(2)], clock=clock, fetch=fetch, pull=pull,
+        log=lambda line: None,
+    )
+    windows = game_windows(schedule)
+    # Up to week 2's kickoff.
+    expected = [
+        run for run in plan(windows, 0, 1000) if run.at <= windows[4].start
+    ]
+    for run in expected:
+        assert scheduler.run_once() == run
+        assert clock.time() == run.at
+    assert pulls == [
+        (run.at, LID, run.week, run.live)
+        for run in expected for LID in (1, 2)
+    ]
+    assert scheduler.pulls == 2 * len(expected)
+    assert expected[-1] == Run(windows[4].start, 2, True)
+    # Once for week 1, then again once it was over.
+    assert len(fetches) == 2
+    assert fetches[1] == windows[3].end
+
+
+def test_scheduler_week_boundary(schedule):
+    windows = game_windows(schedule)
+    monday = windows[3]
+    clock = FakeClock(monday.start)
+    pulls = []
+
+    def pull(args):
+        pulls.append(Run(clock.time(), args.week, args.scores))
+
+    scheduler = Scheduler(
+        [league(1)], clock=clock, fetch=lambda: (200, schedule), pull=pull,
+        log=lambda line: None,
+    )
+    while clock.time() < monday.end:
+        scheduler.run_once()
+    scheduler.run_once()
+    # Live pulls, the final scores in full, then on to week 2.
+    assert pulls[0] == Run(monday.start, 1, True)
+    assert all(run.live for run in pulls[:-2])
+    assert pulls[-2:] == [
+        Run(monday.end, 1, False),
+        Run(monday.end + IDLE_EVERY, 2, False),
+    ]
+
+
+def test_scheduler_failures(schedule):
+    clock = FakeClock()
+    lines = []
+
+    def pull(args):
+        if args.league_id == 2:
+            raise SystemExit('Could not pull')
+
+    responses = [(503, {}), (200, schedule)]
+    scheduler = Scheduler(
+        [league(1), league(2)], clock=clock,
+        fetch=lambda: responses.pop(0), pull=pull, log=lines.append,
+    )
+    # No schedule yet: an idle pull, and the schedule is tried again.
+    assert scheduler.run_once() == Run(0, 0, False)
+    assert (scheduler.pulls, scheduler.failures) == (1, 1)
+    assert lines[0].startswith(f'{Colors.RED}Could not read')
+    assert lines[2].endswith(
+        f'league 2: {Colors.RED}failed: Could not pull{Colors.ENDC}',
+    )
+    assert scheduler.run_once() == Run(IDLE_EVERY, 1, False)
+    assert not responses
+
+
+def mock_load_cookies(dev, key=None):
+    cookies = {'season': 2021, 'week': 4, 'league_id': 1, 'team_id': 3}
+    return cookies[key] if key else cookies
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.load_cookies', mock_load_cookies)
+@mock.patch('FF.scheduler.load_cookies', mock_load_cookies)
+def test_league_args(check_cookies_exists, update_cookies):
+    args = argparse.Namespace(
+        league_id=[1, 2], season=None, dev=False, base_url=None,
+    )
+    leagues = league_args(args)
+    update_cookies.assert_not_called()
+    assert [
+        (a.league_id, a.team_id, a.season, a.week, a.pull) for a in leagues
+    ] == [(1, 3, 2021, 4, True), (2, None, 2021, 4, True)]
+
+
+def test_main_plan(schedule, capsys):
+    # Kickoff in an hour's time: idle, then live.
+    kickoff = time.time() + HOUR - 20.25 * HOUR
+    d = generate_pro_schedule(weeks=6, kickoff=kickoff)
+    with mock.patch('FF.scheduler.league_args', return_value=[league(1)]):
+        with mock.patch(
+            'FF.scheduler.pull_pro_schedule', return_value=(200, d),
+        ):
+            assert main(['--plan', '3']) == 0
+    out, _ = capsys.readouterr()
+    lines = out.split('\n')
+    windows = len(game_windows(d))
+    assert lines[0] == f'Read the game schedule: {windows} windows'
+    assert [line.endswith('idle') for line in lines[1:4]] == [
+        True, False, False,
+    ]
+    assert lines[2].endswith(f'week 1  {Colors.GREEN}live{Colors.ENDC}')
@@ -0,0 +1,154 @@
+import argparse
+import copy
+import json
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.main import Colors
+from FF.main import load_data
+from FF.main import save_data
+from FF.scoring import format_scoring
+from FF.scoring import league_rules
+from FF.scoring import load_rules
+from FF.scoring import Rules
+from FF.scoring import run_scoring
+from FF.scoring import StatTable
+from FF.storage import locked
+from FF.storage import read_snapshot
+from FF.stub import StubServer
+
+
+@pytest.fixture(scope='module')
+def d():
+    return generate_league(teams=4, played=6, seasons=2, seed=3)
+
+
+def test_league_scoring_reproduces_applied_total(d):
+    table = StatTable.from_league(d)
+    scores = table.score(league_rules(d))
+    assert len(table.lines) > 500
+    assert table.mismatches(scores) == []
+
+
+def test_score_overrides():
+    table = StatTable()
+    table.add(1, 0, {
+        'seasonId': 2021, 'scoringPeriodId': 1, 'statSourceId': 0,
+        'statSplitTypeId': 1, 'stats': {'4': 2, '3': 300}, 'appliedTotal': 0,
+    })
+    table.add(2, 16, {
+        'seasonId': 2021, 'scoringPeriodId': 1, 'statSourceId': 0,
+        'statSplitTypeId': 1, 'stats': {'4': 1}, 'appliedTotal': 6,
+    })
+    rules = Rules({'4': 4.0, '3': .04}, {'4': {16: 6.0}})
+    assert table.score(rules) == pytest.approx([20, 6])
+    assert table.mismatches(table.score(rules)) == [0]
+    assert table.season_totals(table.score(rules), 2021) == {
+        1: pytest.approx(20), 2: 6,
+    }
+
+
+def test_league_rules_missing():
+    assert league_rules({'settings': {}}) is None
+
+
+def test_load_rules(tmpdir):
+    base = Rules({'4': 4.0, '53': 0.0, '20': -2.0}, {'4': {16: 6.0}})
+    path = tmpdir.join('ppr.json')
+    path.write(json.dumps({'53': 1, '4': 6, '20': None}))
+    assert load_rules(str(path), base) == Rules({'4': 6.0, '53': 1.0}, {})
+    path.write(json.dumps({'scoringItems': [
+        {'statId': 53, 'points': .5, 'pointsOverrides': {'6': 1}},
+    ]}))
+    assert load_rules(str(path), base) == Rules({'53': .5}, {'53': {6: 1.0}})
+
+
+@pytest.mark.parametrize('content', ('[1, 2]', '{"53": "one"}', '{'))
+def test_load_rules_bad(content, tmpdir):
+    path = tmpdir.join('rules.json')
+    path.write(content)
+    with pytest.raises(SystemExit):
+        load_rules(str(path))
+
+
+def test_format_scoring(d):
+    team = d['teams'][0]
+    table = StatTable.from_league(d)
+    league = table.score(league_rules(d))
+    # A point per reception moves receivers only.
+    rules = Rules({**league_rules(d).points, '53': 1.0}, {})
+    lines = format_scoring(
+        team, table, league, table.score(rules), 2021, 'Title',
+    ).split('\n')
+    assert lines[0] == 'Title'
+    assert len(lines) == 3 + len(team['roster']['entries'])
+    qb = next(line for line in lines if ' QB ' in line)
+    assert qb.endswith('0.0')
+    wr = next(line for line in lines if ' WR ' in line)
+    assert f'{Colors.GREEN}' in wr
+
+
+def args(stub, rules):
+    return argparse.Namespace(
+        season=2021, week=7, league_id=0, team_id=2, dev=False,
+        base_url=stub.url, scoring=rules,
+    )
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_run_scoring_pulls_settings_once(load_cookies, d, tmpdir, capsys):
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), d, 2021, 7, 0)
+    local = copy.deepcopy(d)
+    del local['settings']['scoringSettings']
+    save_data(str(tmpdir), local, 2021, 7, 0)
+    rules = tmpdir.join('ppr.json')
+    rules.write('{"53": 1}')
+    with StubServer(str(remote)) as stub:
+        for _ in range(2):
+            local = load_data(str(tmpdir), args(stub, str(rules)))
+            assert run_scoring(
+                local, args(stub, str(rules)), str(tmpdir),
+            ) == 0
+            out, _ = capsys.readouterr()
+            assert '2021 points: league scoring -> ppr.json\n' in out
+        assert stub.stats['requests'] == 1
+    assert local['settings']['scoringSettings'] == (
+        d['settings']['scoringSettings']
+    )
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 2021, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_run_scoring_keeps_concurrent_pull(load_cookies, d, tmpdir, capsys):
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), d, 2021, 7, 0)
+    local = copy.deepcopy(d)
+    del local['settings']['scoringSettings']
+    save_data(str(tmpdir), local, 2021, 7, 0)
+    rules = tmpdir.join('ppr.json')
+    rules.write('{"53": 1}')
+    # Pulled by another process after this one loaded.
+    pulled = copy.deepcopy(local)
+    pulled['teams'][0]['abbrev'] = 'NEW'
+    save_data(str(tmpdir), pulled, 2021, 7, 0)
+    with StubServer(str(remote)) as stub:
+        with mock.patch('FF.main.locked', wraps=locked) as lock:
+            assert run_scoring(
+                local, args(stub, str(rules)), str(tmpdir),
+            ) == 0
+    path = str(tmpdir.join('FF_2021_wk7_0.json'))
+    lock.assert_called_once_with(f'{path}.lock')
+    saved = read_snapshot(path)
+    assert saved['teams'][0]['abbrev'] == 'NEW'
+    assert saved['settings']['scoringSettings'] == (
+        d['settings']['scoringSettings']
+    )
+    capsys.readouterr()
@@ -0,0 +1,149 @@
+import argparse
+import copy
+import os
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.main import Colors
+from FF.main import main
+from FF.main import parse_args
+from FF.main import save_data
+from FF.search import format_matches
+from FF.search import grams
+from FF.search import index_path
+from FF.search import league_index
+from FF.search import normalize
+from FF.search import player_rows
+from FF.search import PlayerIndex
+
+NAMES = {
+    0: ('Alvin', 'Kamara'),
+    1: ("Ja'Marr", 'Chase'),
+    2: ('Patrick', 'Mahomes'),
+    3: ('Kamar', 'Aiken'),
+}
+
+
+@pytest.fixture(scope='module')
+def league():
+    d = generate_league(teams=4, played=3, seed=2)
+    for i, (first, last) in NAMES.items():
+        player = entry(d, i)['playerPoolEntry']['player']
+        player['firstName'], player['lastName'] = first, last
+    return d
+
+
+def entry(d, i):
+    return [
+        e for t in d['teams'] for e in t['roster']['entries']
+    ][i]
+
+
+def args():
+    return argparse.Namespace(season=2021, week=4, league_id=1, team_id=1)
+
+
+def test_normalize_and_grams():
+    assert normalize("Ja'Marr St. Brown-José") == 'jamarr st brown jose'
+    assert grams('Al Kamara') == {
+        ' al', 'al ', ' ka', 'kam', 'ama', 'mar', 'ara', 'ra ',
+    }
+    # The query's last word may still be typed.
+    assert grams('kam', prefix=True) == {' ka', 'kam'}
+
+
+def test_search(league):
+    index = PlayerIndex()
+    rows = player_rows(league, 2021, 4)
+    assert index.update(rows, 4, 'stamp') == len(rows)
+    ids = {NAMES[i]: entry(league, i)['playerId'] for i in NAMES}
+
+    def names(query):
+        return [index.names[p] for p, _ in index.search(query)]
+    # Four of Kamar's six trigrams are Kamara's.
+    assert names('kamara') == ['Alvin Kamara', 'Kamar Aiken']
+    # Prefixes of any word, then by name.
+    assert names('kama') == ['Alvin Kamara', 'Kamar Aiken']
+    assert names('aik') == ['Kamar Aiken']
+    assert names('jamarr') == ["Ja'Marr Chase"]
+    # A typo still finds the player, by score.
+    assert names('mahoms')[0] == 'Patrick Mahomes'
+    assert index.search('zzzz') == []
+    assert index.search('  ') == []
+    assert index.search('patrick mahomes')[0] == (
+        ids[('Patrick', 'Mahomes')], 1.0,
+    )
+
+
+def test_update_is_incremental(league):
+    index = PlayerIndex()
+    index.update(player_rows(league, 2021, 4), 4, 'a')
+    changed = copy.deepcopy(league)
+    renamed = entry(changed, 0)
+    renamed['playerPoolEntry']['player']['lastName'] = 'Smith'
+    dropped = changed['teams'][1]['roster']['entries'].pop()
+    assert index.update(player_rows(changed, 2021, 4), 4, 'b') == 1
+    assert [index.names[p] for p, _ in index.search('kamara')] == [
+        'Kamar Aiken',
+    ]
+    assert index.search('alvin smith')[0][0] == renamed['playerId']
+    assert dropped['playerId'] not in index.names
+    scratch = PlayerIndex()
+    scratch.update(player_rows(changed, 2021, 4), 4, 'b')
+    assert scratch.postings == index.postings
+
+
+def test_league_index(league, tmpdir, capsys):
+    save_data(str(tmpdir), league, 2021, 4, 1)
+    capsys.readouterr()
+    index = league_index(args(), path=str(tmpdir))
+    assert os.path.exists(index_path(str(tmpdir), 2021, 1))
+    # Unchanged snapshot: the saved index, without reading the snapshot.
+    with mock.patch('FF.search.load_data') as load_data:
+        again = league_index(args(), path=str(tmpdir))
+    load_data.assert_not_called()
+    assert again.rows == index.rows
+    assert again.postings == index.postings
+    save_data(str(tmpdir), generate_league(teams=4, seed=5), 2021, 4, 1)
+    capsys.readouterr()
+    assert league_index(args(), path=str(tmpdir)).rows != index.rows
+
+
+def test_format_matches(league):
+    rows = player_rows(league, 2021, 4)
+    row = rows[entry(league, 0)['playerId']]
+    lines = format_matches([row], row.TID).split('\n')
+    assert lines[0].split() == [
+        'Player', 'Pos', 'Team', 'Slot', 'Status', 'Proj', 'Score', 'Avg',
+        'Total',
+    ]
+    assert lines[2].startswith(f'{Colors.CYAN}Alvin Kamara ')
+    assert lines[2].split()[3] == row.owner
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_player(
+    mock_parse_args, check_cookies_exists, update_cookies, league, tmpdir,
+    capsys,
+):
+    save_data(str(tmpdir), league, 2021, 4, 1)
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)), mock.patch(
+        'FF.search.DATA_PATH', str(tmpdir),
+    ):
+        for query in ('kamara', 'nobody'):
+            mock_parse_args.return_value = parse_args([
+                '-s', '2021', '-w', '4', '-l', '1', '-t', '1', '--player',
+                query,
+            ])
+            capsys.readouterr()
+            assert main() == 0
+            out, _ = capsys.readouterr()
+            lines = out.split('\n')
+            if query == 'kamara':
+                assert 'Alvin Kamara' in lines[2]
+            else:
+                assert "No player matches 'nobody'" in lines[0]
@@ -0,0 +1,143 @@
+import argparse
+from unittest import mock
+
+import pytest
+
+from FF.main import load_data
+from FF.simulate import print_simulation
+from FF.simulate import remaining_matchups
+from FF.simulate import simulate_season
+from FF.simulate import team_states
+
+
+def matchup(week, home, away, winner='UNDECIDED', hp=0.0, ap=0.0):
+    return {
+        'away': {'teamId': away, 'totalPoints': ap},
+        'home': {'teamId': home, 'totalPoints': hp},
+        'matchupPeriodId': week,
+        'winner': winner,
+    }
+
+
+@pytest.fixture
+def mock_league():
+    return {
+        'teams': [
+            {
+                'abbrev': f'T{i}',
+                'currentSimulationResults': {'playoffPct': .5, 'rank': i},
+                'id': i,
+            }
+            for i in range(1, 5)
+        ],
+        'schedule': [
+            matchup(1, 1, 2, 'HOME', 120.0, 80.0),
+            matchup(1, 3, 4, 'AWAY', 90.0, 110.0),
+            matchup(2, 1, 3, 'HOME', 130.0, 70.0),
+            matchup(2, 2, 4, 'TIE', 100.0, 100.0),
+            matchup(3, 1, 4),
+            matchup(3, 2, 3),
+        ],
+    }
+
+
+@pytest.fixture
+def mock_h2h_league():
+    # 1 and 2 finish 2-1 each; 2 beat 1 but 1 scored more overall.
+    return {
+        'settings': {
+            'scheduleSettings': {
+                'playoffTeamCount': 1,
+                'playoffSeedingRule': 'H2H_RECORD',
+            },
+        },
+        'teams': [{'abbrev': f'T{i}', 'id': i} for i in range(1, 5)],
+        'schedule': [
+            matchup(1, 1, 2, 'AWAY', 100.0, 101.0),
+            matchup(1, 3, 4, 'AWAY', 90.0, 95.0),
+            matchup(2, 1, 3, 'HOME', 200.0, 50.0),
+            matchup(2, 2, 4, 'HOME', 80.0, 70.0),
+            matchup(3, 1, 4, 'HOME', 200.0, 50.0),
+            matchup(3, 2, 3, 'AWAY', 60.0, 70.0),
+        ],
+    }
+
+
+def test_team_states_record():
+    args = argparse.Namespace(league_id=6, season=0, week=0)
+    d = load_data('./tests/data', args)
+    states = team_states(d)
+    assert (states[9].wins, states[9].losses) == (2, 2)
+    assert (states[1].wins, states[1].losses) == (2, 2)
+    assert states[9].points_for == 220.0
+
+
+def test_team_states_ties(mock_league):
+    states = team_states(mock_league)
+    assert states[2].ties == 1
+    assert states[4].ties == 1
+    assert states[1].mean == 125.0
+
+
+def test_remaining_matchups(mock_league):
+    assert remaining_matchups(mock_league) == [(1, 4), (2, 3)]
+
+
+def test_simulate_no_data():
+    with pytest.raises(SystemExit):
+        simulate_season({}, sims=10)
+
+
+def test_simulate_totals(mock_league):
+    results = simulate_season(
+        mock_league, sims=2000, playoff_teams=2, batch_size=300, seed=1,
+    )
+    assert sum(r.sim_playoffPct for r in results) == pytest.approx(200)
+    for r in results:
+        assert sum(r.seeds) == pytest.approx(r.sim_playoffPct)
+
+
+def test_simulate_ties():
+    d = {
+        'teams': [{'abbrev': f'T{i}', 'id': i} for i in (1, 2)],
+        'schedule': [
+            matchup(1, 1, 2, 'TIE', 100.0, 100.0),
+            matchup(2, 1, 2),
+        ],
+    }
+    # Every draw lands on the mean, so the remaining game always ties.
+    with mock.patch('FF.simulate._quantiles', return_value=(0.0,)):
+        results = simulate_season(d, sims=100, playoff_teams=1, seed=0)
+    assert [r.mean_wins for r in results] == [1.0, 1.0]
+
+
+def test_simulate_clinched(mock_league):
+    results = {
+        r.TID: r for r in simulate_season(
+            mock_league, sims=2000, playoff_teams=2, seed=1,
+        )
+    }
+    # Team 1 is 2-0 and every rival can reach at most 2 wins on fewer points.
+    assert results[1].sim_playoffPct == 100.0
+    assert results[1].mean_wins >= 2.0
+
+
+def test_simulate_seeding_rule(mock_h2h_league):
+    results = simulate_season(mock_h2h_league, sims=10, seed=0)
+    assert [r.sim_playoffPct for r in results] == [0.0, 100.0, 0.0, 0.0]
+    mock_h2h_league['settings']['scheduleSettings']['playoffSeedingRule'] = (
+        'TOTAL_POINTS_SCORED'
+    )
+    results = simulate_season(mock_h2h_league, sims=10, seed=0)
+    assert [r.sim_playoffPct for r in results] == [100.0, 0.0, 0.0, 0.0]
+
+
+def test_print_simulation(mock_league, capsys):
+    results = simulate_season(mock_league, sims=100, seed=0)
+    print_simulation(results, 1)
+    out, err = capsys.readouterr()
+    lines = out.split('\n')
+    assert lines[0].split() == ['Team', 'Record', 'W', 'PO%', 'SIM%'] + [
+        f'#{s}' for s in range(1, 5)
+    ]
+    assert '\x1b[96mT1' in out
@@ -0,0 +1,137 @@
+import itertools
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import generate_league
+from FF.main import Colors
+from FF.main import main
+from FF.main import parse_args
+from FF.main import save_data
+from FF.sos import all_play
+from FF.sos import format_sos
+from FF.sos import schedule_matrix
+from FF.sos import team_sos
+
+
+def matchup(period, home, away, winner='UNDECIDED', points=(0.0, 0.0)):
+    return {
+        'matchupPeriodId': period,
+        'playoffTierType': 'NONE',
+        'winner': winner,
+        'home': {'teamId': home, 'totalPoints': points[0]},
+        'away': {'teamId': away, 'totalPoints': points[1]},
+    }
+
+
+SCHEDULE = [
+    matchup(1, 1, 2, 'HOME', (110.0, 90.0)),
+    matchup(1, 3, 4, 'AWAY', (80.0, 100.0)),
+    matchup(2, 1, 3, 'TIE', (95.0, 95.0)),
+    matchup(2, 2, 4, 'HOME', (120.0, 70.0)),
+    matchup(3, 1, 4),
+    matchup(3, 2, 3),
+    # Playoffs and byes are left out.
+    dict(matchup(4, 1, 2), playoffTierType='WINNERS_BRACKET'),
+    {'matchupPeriodId': 3, 'home': {'teamId': 5, 'totalPoints': 0.0}},
+]
+
+
+def test_schedule_matrix():
+    matrix = schedule_matrix(SCHEDULE)
+    assert matrix.TIDs == [1, 2, 3, 4]
+    assert matrix.periods == [1, 2, 3]
+    assert matrix.opponents == [[1, 2, 3], [0, 3, 2], [3, 0, 1], [2, 1, 0]]
+    assert matrix.scores[0] == [110.0, 95.0, None]
+    assert matrix.results == [
+        [1.0, .5, None], [0.0, 1.0, None], [0.0, .5, None], [1.0, 0.0, None],
+    ]
+
+
+def test_all_play():
+    # Week 1: 110, 90, 80, 100. Week 2: 95, 120, 95, 70.
+    assert all_play(schedule_matrix(SCHEDULE)) == [
+        (4, 1, 1), (4, 2, 0), (1, 4, 1), (2, 4, 0),
+    ]
+
+
+def test_all_play_matches_pairs():
+    d = generate_league(teams=10, weeks=14, played=9, seed=3)
+    matrix = schedule_matrix(d['schedule'])
+    expected = []
+    for i in range(len(matrix.TIDs)):
+        record = [0, 0, 0]
+        for j, k in itertools.product(
+            range(len(matrix.periods)), range(len(matrix.TIDs)),
+        ):
+            mine, theirs = matrix.scores[i][j], matrix.scores[k][j]
+            if k == i or mine is None or theirs is None:
+                continue
+            record[0 if mine > theirs else 1 if mine < theirs else 2] += 1
+        expected.append(tuple(record))
+    assert all_play(matrix) == expected
+    assert sum(w + t / 2 for w, _, t in expected) == 9 * 10 * 9 / 2
+
+
+def test_team_sos():
+    teams = team_sos(schedule_matrix(SCHEDULE))
+    first = teams[0]
+    assert (first.wins, first.losses, first.ties) == (1, 0, 1)
+    assert (first.points_for, first.points_against) == (205.0, 185.0)
+    # Played 2 (2/3) and 3 (1/4); plays 4 (1/3).
+    assert first.sos == pytest.approx(11 / 24)
+    assert first.remaining_sos == pytest.approx(1 / 3)
+    assert first.remaining == 1
+    assert sum(t.points_for for t in teams) == pytest.approx(
+        sum(t.points_against for t in teams),
+    )
+
+
+def test_team_sos_seasons():
+    # Two seasons as one history, keyed (season, period).
+    history = [dict(m, seasonId=2020) for m in SCHEDULE[:4]] + [
+        dict(m, seasonId=2021) for m in SCHEDULE[:4]
+    ]
+    matrix = schedule_matrix(
+        history, key=lambda m: (m['seasonId'], m['matchupPeriodId']),
+    )
+    assert len(matrix.periods) == 4
+    teams = team_sos(matrix)
+    assert teams[0].all_play == (8, 2, 2)
+    assert teams[0].points_for == 410.0
+    assert teams[0].remaining_sos is None
+
+
+def test_format_sos():
+    lines = format_sos(
+        team_sos(schedule_matrix(SCHEDULE)), {1: 'T1', 2: 'T2'}, 2,
+    ).split('\n')
+    assert lines[0].split() == [
+        'Team', 'Record', 'All-play', 'PF', 'PA', 'SOS', 'Rem', 'SOS',
+    ]
+    assert lines[2].split() == [
+        'T1', '1-0-1', '4-1-1', '205.0', '185.0', '.458', '.333',
+    ]
+    assert lines[3].startswith(f'{Colors.CYAN}T2 ')
+    assert lines[5].startswith('3 ')
+
+
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_sos(
+    mock_parse_args, check_cookies_exists, update_cookies, tmpdir, capsys,
+):
+    d = generate_league(teams=6, weeks=10, played=5, seed=8)
+    save_data(str(tmpdir), d, 2021, 6, 1)
+    mock_parse_args.return_value = parse_args([
+        '-s', '2021', '-w', '6', '-l', '1', '-t', '1', '--sos',
+        '--no-cache',
+    ])
+    capsys.readouterr()
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        assert main() == 0
+    out, _ = capsys.readouterr()
+    lines = out.split('\n')
+    assert lines[0].split()[:3] == ['Team', 'Record', 'All-play']
+    assert len(lines) == 2 + 6 + 1
@@ -0,0 +1,396 @@
+import argparse
+import copy
+import json
+import os
+import threading
+from unittest import mock
+
+import pytest
+
+from benchmarks.synthetic import as_of
+from benchmarks.synthetic import generate_league
+from FF.main import load_data
+from FF.main import main
+from FF.main import pull_and_save
+from FF.main import save_data
+from FF.profiling import Profiler
+from FF.storage import _manifest_packs
+from FF.storage import atomic_write
+from FF.storage import data_dir
+from FF.storage import gc
+from FF.storage import locked
+from FF.storage import read_snapshot
+from FF.storage import Retention
+from FF.storage import split
+from FF.storage import write_snapshot
+from FF.stub import StubServer
+
+
+def test_atomic_write(tmpdir):
+    path = str(tmpdir.join('snapshot.json'))
+    with atomic_write(path) as wf:
+        wf.write('new')
+        # Nothing is visible until the block exits.
+        assert not os.path.exists(path)
+    assert tmpdir.join('snapshot.json').read() == 'new'
+    assert tmpdir.listdir() == [tmpdir.join('snapshot.json')]
+
+
+def test_atomic_write_error(tmpdir):
+    tmpdir.join('snapshot.json').write('old')
+    with pytest.raises(ValueError):
+        with atomic_write(str(tmpdir.join('snapshot.json'))) as wf:
+            wf.write('partial')
+            raise ValueError
+    assert tmpdir.join('snapshot.json').read() == 'old'
+    assert tmpdir.listdir() == [tmpdir.join('snapshot.json')]
+
+
+def test_save_data_readers(tmpdir, capsys):
+    save_data(str(tmpdir), {'n': 0}, 1, 2, 3)
+    path = tmpdir.join('FF_1_wk2_3.json')
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            save_data(str(tmpdir), {'n': n, 'pad': 'x' * 100000}, 1, 2, 3)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(200):
+            # Never a truncated file.
+            assert 'n' in json.loads(path.read())
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_locked(tmpdir):
+    path = str(tmpdir.join('lock'))
+    held = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def holder():
+        with locked(path) as waited:
+            order.append(('holder', waited))
+            held.set()
+            release.wait()
+            order.append(('released', None))
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait()
+    threading.Timer(.1, release.set).start()
+    with locked(path) as waited:
+        order.append(('waiter', waited))
+    thread.join()
+    assert order == [
+        ('holder', False), ('released', None), ('waiter', True),
+    ]
+
+
+def args():
+    return argparse.Namespace(season=1, week=2, league_id=3, scores=False)
+
+
+def test_pull_and_save(tmpdir, capsys):
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        with mock.patch('FF.main.pull', return_value={'id': 3}) as pull:
+            assert pull_and_save(args(), Profiler()) == {'id': 3}
+    pull.assert_called_once()
+    assert json.loads(tmpdir.join('FF_1_wk2_3.json').read()) == {'id': 3}
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 1, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_pull_and_save_keeps_snapshot_on_error(load_cookies, tmpdir, capsys):
+    d = generate_league(teams=4, played=1)
+    save_data(str(tmpdir), d, 1, 2, 3)
+    before = tmpdir.join('FF_1_wk2_3.json').read()
+    with StubServer(
+        str(tmpdir), error_rate=1, error_status=503,
+    ) as stub, mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        pull_args = args()
+        pull_args.dev, pull_args.base_url = False, stub.url
+        pull_args.matchup_only = False
+        with pytest.raises(SystemExit) as e:
+            pull_and_save(pull_args, Profiler())
+    assert '(status 503)' in str(e.value)
+    assert tmpdir.join('FF_1_wk2_3.json').read() == before
+
+
+def test_pull_and_save_reuses_concurrent_pull(tmpdir, capsys):
+    lock = str(tmpdir.join('FF_1_wk2_3.json.lock'))
+    held = threading.Event()
+    release = threading.Event()
+
+    def other_process():
+        with locked(lock):
+            held.set()
+            release.wait()
+            save_data(str(tmpdir), {'id': 3, 'other': True}, 1, 2, 3)
+
+    thread = threading.Thread(target=other_process)
+    thread.start()
+    held.wait()
+    threading.Timer(.1, release.set).start()
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        with mock.patch('FF.main.pull') as pull:
+            d = pull_and_save(args(), Profiler())
+    thread.join()
+    assert d == {'id': 3, 'other': True}
+    pull.assert_not_called()
+
+
+def test_data_dir(monkeypatch):
+    monkeypatch.setenv('FF_DATA_DIR', '/srv/ff')
+    assert data_dir() == '/srv/ff'
+    monkeypatch.delenv('FF_DATA_DIR')
+    monkeypatch.setenv('XDG_DATA_HOME', '/home/u/.data')
+    assert data_dir() == os.path.join('/home/u/.data', 'ff')
+
+
+def test_retention_from_env(monkeypatch):
+    monkeypatch.setenv('FF_DATA_MAX_MB', '.5')
+    monkeypatch.setenv('FF_DATA_MAX_DAYS', '2')
+    monkeypatch.setenv('FF_DATA_KEEP', '4')
+    assert Retention.from_env() == Retention(524288, 172800.0, 4)
+    monkeypatch.setenv('FF_DATA_KEEP', 'all')
+    with pytest.raises(SystemExit):
+        Retention.from_env()
+
+
+def snapshot(tmpdir, year, week, LID, used, size=100):
+    path = tmpdir.join(f'FF_{year}_wk{week}_{LID}.json')
+    path.write('x' * size)
+    os.utime(str(path), (used, used))
+    return path.basename
+
+
+def listed(tmpdir):
+    # gc leaves the lock files of what it removes.
+    return sorted(
+        p.basename for p in tmpdir.listdir() if p.ext != '.lock'
+    )
+
+
+def test_gc(tmpdir):
+    names = [
+        snapshot(tmpdir, 2021, week, 1, used=1000 + week)
+        for week in range(1, 6)
+    ]
+    other = snapshot(tmpdir, 2021, 1, 2, used=0)
+    tmpdir.join('cookies.json').write('{}')
+    stats = gc(str(tmpdir), Retention(max_bytes=350, max_age=1e9, keep=2))
+    # Least recently used first; the latest two weeks of each league stay.
+    assert stats == {
+        'removed': 3, 'removed_bytes': 300, 'kept': 3, 'kept_bytes': 300,
+    }
+    assert listed(tmpdir) == sorted(
+        names[3:] + [other, 'cookies.json'],
+    )
+
+
+def test_gc_max_age(tmpdir):
+    snapshot(tmpdir, 2020, 16, 1, used=0)
+    new = snapshot(tmpdir, 2021, 1, 1, used=9000)
+    latest = snapshot(tmpdir, 2021, 2, 1, used=9000)
+    policy = Retention(max_age=5000, keep=1)
+    assert gc(str(tmpdir), policy, now=10000)['removed'] == 1
+    assert listed(tmpdir) == [new, latest]
+    assert gc(str(tmpdir), policy._replace(max_age=0), now=10000) == {
+        'removed': 1, 'removed_bytes': 100, 'kept': 1, 'kept_bytes': 100,
+    }
+    assert listed(tmpdir) == [latest]
+
+
+def test_gc_keeps_backfilled(tmpdir):
+    old = [snapshot(tmpdir, 2016, week, 1, used=0) for week in (1, 2)]
+    snapshot(tmpdir, 2019, 1, 1, used=0)
+    latest = snapshot(tmpdir, 2021, 1, 1, used=9000)
+    other = snapshot(tmpdir, 2016, 1, 2, used=0)
+    tmpdir.join('FF_backfill_1.json').write(
+        json.dumps({'weeks': {'2016': 2}, 'done': {'2016': [1, 2]}}),
+    )
+    policy = Retention(max_bytes=100, max_age=5000, keep=1)
+    assert gc(str(tmpdir), policy, now=10000) == {
+        'removed': 1, 'removed_bytes': 100, 'kept': 4, 'kept_bytes': 400,
+    }
+    assert listed(tmpdir) == sorted(
+        old + [latest, other, 'FF_backfill_1.json'],
+    )
+
+
+def test_gc_skips_locked(tmpdir):
+    snapshot(tmpdir, 2021, 1, 1, used=0)
+    snapshot(tmpdir, 2021, 2, 1, used=0)
+    lock = str(tmpdir.join('FF_2021_wk1_1.json.lock'))
+    with locked(lock):
+        assert gc(str(tmpdir), Retention(max_age=0, keep=1))['removed'] == 0
+    assert gc(str(tmpdir), Retention(max_age=0, keep=1))['removed'] == 1
+    assert not tmpdir.join('FF_2021_wk1_1.json').exists()
+    # Left for whoever locks it next.
+    assert os.path.exists(lock)
+
+
+def test_gc_stale_tmp(tmpdir):
+    tmpdir.join('FF_2021_wk1_1.json.1-2.tmp').write('partial')
+    fresh = tmpdir.join('FF_2021_wk2_1.json.1-2.tmp')
+    fresh.write('partial')
+    os.utime(str(tmpdir.join('FF_2021_wk1_1.json.1-2.tmp')), (0, 0))
+    gc(str(tmpdir))
+    assert tmpdir.listdir() == [fresh]
+
+
+def test_gc_missing_dir(tmpdir):
+    assert gc(str(tmpdir.join('missing')))['kept'] == 0
+
+
+def test_load_data_marks_used(tmpdir, capsys):
+    save_data(str(tmpdir), {}, 1, 2, 3)
+    path = str(tmpdir.join('FF_1_wk2_3.json'))
+    os.utime(path, (0, 0))
+    load_data(str(tmpdir), argparse.Namespace(season=1, week=2, league_id=3))
+    st = os.stat(path)
+    assert st.st_mtime == 0
+    assert st.st_atime > 0
+
+
+@mock.patch('FF.main.parse_args')
+def test_main_gc(parse_args, tmpdir, capsys):
+    parse_args.return_value = argparse.Namespace(cookies=False, gc=True)
+    snapshot(tmpdir, 2021, 1, 1, used=0)
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        assert main() == 0
+    out, _ = capsys.readouterr()
+    assert out.startswith('Removed 0 snapshots (0 KiB), kept 1')
+
+
+@pytest.fixture(scope='module')
+def season():
+    return generate_league(teams=4, weeks=8, played=8, seed=3)
+
+
+def packs(tmpdir):
+    return sorted(p.basename for p in tmpdir.join('blocks').listdir('*.pack'))
+
+
+def test_write_snapshot(season, tmpdir):
+    d = as_of(season, 5)
+    before = copy.deepcopy(d)
+    path = str(tmpdir.join('FF_2021_wk5_1.json'))
+    write_snapshot(path, d)
+    assert d == before
+    assert read_snapshot(path) == d
+    manifest = json.loads(tmpdir.join('FF_2021_wk5_1.json').read())
+    assert manifest['$packs'] == [p[:-len('.pack')] for p in packs(tmpdir)]
+    assert manifest['schedule'] == d['schedule']
+
+
+def test_write_snapshot_dedupes(season, tmpdir):
+    sizes = []
+    for week in (5, 6):
+        write_snapshot(str(tmpdir.join(f'FF_2021_wk{week}_1.json')), as_of(
+            season, week,
+        ))
+        sizes.append(
+            sum(p.size() for p in tmpdir.join('blocks').listdir()) -
+            sum(sizes),
+        )
+    # Week 6 only adds its new stats and changed players.
+    assert len(packs(tmpdir)) == 2
+    assert sizes[1] < sizes[0] / 3
+    for week in (5, 6):
+        path = str(tmpdir.join(f'FF_2021_wk{week}_1.json'))
+        assert read_snapshot(path) == as_of(season, week)
+    # Saving the same week again stores nothing new.
+    write_snapshot(
+        str(tmpdir.join('FF_2021_wk6_1.json')), as_of(season, 6),
+    )
+    assert len(packs(tmpdir)) == 2
+
+
+def test_read_snapshot_plain(tmpdir):
+    d = generate_league(teams=2, played=1)
+    tmpdir.join('FF_2021_wk2_1.json').write(json.dumps(d))
+    assert read_snapshot(str(tmpdir.join('FF_2021_wk2_1.json'))) == d
+
+
+def test_read_snapshot_equal_blocks(season, tmpdir):
+    d = as_of(season, 3)
+    players = [
+        e['playerPoolEntry']['player']
+        for t in d['teams'] for e in t['roster']['entries']
+    ]
+    players[1]['stats'][0] = copy.deepcopy(players[0]['stats'][0])
+    path = str(tmpdir.join('FF_2021_wk3_1.json'))
+    write_snapshot(path, d)
+    loaded = read_snapshot(path)
+    a, b = (
+        e['playerPoolEntry']['player']['stats'][0]
+        for e in loaded['teams'][0]['roster']['entries'][:2]
+    )
+    assert a == b
+    assert a is not b
+    a['appliedTotal'] = -1
+    assert b['appliedTotal'] != -1
+
+
+def test_read_snapshot_missing_block(season, tmpdir):
+    path = str(tmpdir.join('FF_2021_wk3_1.json'))
+    write_snapshot(path, as_of(season, 3))
+    manifest = json.loads(tmpdir.join('FF_2021_wk3_1.json').read())
+    manifest['teams'][0]['$block'] = '0' * 32
+    tmpdir.join('FF_2021_wk3_1.json').write(json.dumps(manifest))
+    with pytest.raises(ValueError, match='block 0+ is missing'):
+        read_snapshot(path)
+
+
+def test_split_shares_blocks(season):
+    _, week5 = split(as_of(season, 5))
+    _, week6 = split(as_of(season, 6))
+    # Every past game and unchanged player is shared.
+    assert len(set(week6) - set(week5)) < len(week6) / 3
+
+
+def test_gc_sweeps_packs(season, tmpdir, capsys):
+    for week in (1, 2, 3):
+        save_data(str(tmpdir), as_of(season, week), 2021, week, 1)
+        os.utime(str(tmpdir.join(f'FF_2021_wk{week}_1.json')), (week, week))
+    assert len(packs(tmpdir)) == 3
+    stats = gc(str(tmpdir), Retention(max_age=0, keep=1))
+    assert stats['removed'] == 2
+    # Week 3 still needs most of weeks 1 and 2's blocks.
+    assert len(packs(tmpdir)) == 3
+    args = argparse.Namespace(season=2021, week=3, league_id=1)
+    assert load_data(str(tmpdir), args) == as_of(season, 3)
+    save_data(str(tmpdir), {'teams': []}, 2021, 3, 1)
+    assert packs(tmpdir) == []
+    assert tmpdir.join('blocks').listdir('*.idx') == []
+
+
+def test_gc_reads_new_manifests_only(season, tmpdir, capsys):
+    for week in (1, 2, 3):
+        save_data(str(tmpdir), as_of(season, week), 2021, week, 1)
+    with mock.patch(
+        'FF.storage._manifest_packs', wraps=_manifest_packs,
+    ) as read:
+        gc(str(tmpdir))
+        read.assert_not_called()
+        save_data(str(tmpdir), as_of(season, 4), 2021, 4, 1)
+        assert [c.args[0] for c in read.call_args_list] == [
+            str(tmpdir.join('FF_2021_wk4_1.json')),
+        ]
+    # A lost or corrupt index is rebuilt from the manifests.
+    tmpdir.join('blocks', 'refs.json').write('{')
+    gc(str(tmpdir))
+    assert len(packs(tmpdir)) == 4
+    assert sorted(json.loads(tmpdir.join('blocks', 'refs.json').read())) == [
+        f'FF_2021_wk{week}_1.json' for week in (1, 2, 3, 4)
+    ]
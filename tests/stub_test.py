@@ -0,0 +1,240 @@
+import argparse
+import json
+from unittest import mock
+
+import pytest
+import requests
+
+from benchmarks.synthetic import generate_league
+from FF.main import base_url
+from FF.main import build_team
+from FF.main import connect_FF
+from FF.main import league_filter
+from FF.main import load_data
+from FF.main import main
+from FF.main import pull
+from FF.main import save_data
+from FF.profiling import Profiler
+from FF.ratings import league_ratings
+from FF.storage import read_snapshot
+from FF.stub import apply_filter
+from FF.stub import filter_views
+from FF.stub import StubServer
+
+DATA = './tests/data'
+
+
+@pytest.fixture
+def stub():
+    with StubServer(DATA) as server:
+        yield server
+
+
+def league(server, LID, **params):
+    return requests.get(
+        f'{server.url}/seasons/0/segments/0/leagues/{LID}',
+        params=params, timeout=5,
+    )
+
+
+def test_filter_views():
+    d = {'id': 1, 'teams': [], 'schedule': [], 'settings': {}}
+    assert filter_views(d, ['mMatchup']) == {'id': 1, 'schedule': []}
+    assert filter_views(d, ['mTeam', 'mSettings', 'mBogus']) == {
+        'id': 1, 'teams': [], 'settings': {},
+    }
+
+
+def stat_periods(team):
+    return {
+        (s['seasonId'], s['scoringPeriodId'])
+        for e in team['roster']['entries']
+        for s in e['playerPoolEntry']['player']['stats']
+    }
+
+
+def test_apply_filter():
+    d = generate_league(teams=4, played=3, seasons=2)
+    f = league_filter([3, 1], 2021)
+    f['schedule'] = {'filterMatchupPeriodIds': {'value': [4]}}
+    filtered = apply_filter(d, f, 4)
+    assert [t['id'] for t in filtered['teams']] == [1, 3]
+    assert {m['matchupPeriodId'] for m in filtered['schedule']} == {4}
+    assert stat_periods(filtered['teams'][0]) == {(2021, 0), (2021, 4)}
+    # The snapshot itself is left alone.
+    assert len(d['teams']) == 4
+    assert (2020, 0) in stat_periods(d['teams'][0])
+
+
+def test_stub_serves_snapshot(stub):
+    r = league(stub, 4, scoringPeriodId=0)
+    assert r.status_code == 200
+    with open(f'{DATA}/FF_0_wk0_4.json') as rf:
+        assert r.json() == json.load(rf)
+
+
+def test_stub_views(stub):
+    r = league(stub, 4, scoringPeriodId=0, view=['mMatchup', 'mStatus'])
+    assert set(r.json()) == {
+        'gameId', 'id', 'scoringPeriodId', 'seasonId', 'segmentId', 'status',
+    }
+    r = league(stub, 4, view='mRoster')
+    assert 'teams' in r.json()
+
+
+@pytest.mark.parametrize(
+    ('path', 'params'),
+    (
+        ('/seasons/0/segments/0/leagues/99', {'scoringPeriodId': 0}),
+        ('/seasons/0/segments/0/leagues/4', {'scoringPeriodId': 3}),
+        ('/seasons/0/segments/0/players', {}),
+    ),
+)
+def test_stub_not_found(stub, path, params):
+    r = requests.get(f'{stub.url}{path}', params=params, timeout=5)
+    assert r.status_code == 404
+    assert r.json()['messages'] == ['Not Found']
+
+
+def test_stub_not_modified(stub):
+    r = league(stub, 4, scoringPeriodId=0)
+    etag = r.headers['ETag']
+    r = requests.get(
+        r.url, headers={'If-None-Match': etag}, timeout=5,
+    )
+    assert r.status_code == 304
+    assert r.content == b''
+    stats = requests.get(
+        stub.url.split('/apis')[0] + '/__stats', timeout=5,
+    ).json()
+    assert stats == {'requests': 2, '200': 1, '304': 1}
+
+
+def test_stub_no_etag():
+    with StubServer(DATA, etag=False) as server:
+        r = league(server, 4, scoringPeriodId=0)
+        assert 'ETag' not in r.headers
+
+
+def test_stub_errors():
+    with StubServer(DATA, error_rate=1, error_status=500) as server:
+        r = league(server, 4, scoringPeriodId=0)
+        assert r.status_code == 500
+        assert server.stats == {'requests': 1, '500': 1}
+
+
+def test_stub_latency():
+    with StubServer(DATA, latency=.05) as server:
+        r = league(server, 4, scoringPeriodId=0)
+        assert r.elapsed.total_seconds() >= .05
+
+
+@pytest.mark.parametrize(
+    ('url', 'env', 'expected'),
+    (
+        (None, None, 'https://fantasy.espn.com/apis/v3/games/ffl'),
+        (None, 'http://env/api/', 'http://env/api'),
+        ('http://arg', 'http://env', 'http://arg'),
+    ),
+)
+def test_base_url(url, env, expected, monkeypatch):
+    if env:
+        monkeypatch.setenv('FF_BASE_URL', env)
+    else:
+        monkeypatch.delenv('FF_BASE_URL', raising=False)
+    assert base_url(url) == expected
+
+
+@mock.patch(
+    'FF.main.load_cookies',
+    return_value={'season': 0, 'SWID': '{SWID}', 'espn_s2': 'ABC'},
+)
+def test_connect_FF_stub(load_cookies, stub):
+    status_code, d = connect_FF(4, 0, False, stub.url)
+    assert status_code == 200
+    assert [t['id'] for t in d['teams']] == [9]
+    assert 'draftDetail' not in d
+
+
+def mock_load_cookies(dev, key=None):
+    cookies = {'season': 0, 'week': 0, 'SWID': '{SWID}', 'espn_s2': 'ABC'}
+    return cookies[key] if key else cookies
+
+
+@mock.patch('FF.main.format_matchup', return_value='')
+@mock.patch('FF.main.Roster')
+@mock.patch('FF.main.load_cookies', mock_load_cookies)
+@mock.patch('FF.main.update_cookies')
+@mock.patch('FF.main.check_cookies_exists')
+@mock.patch('FF.main.parse_args')
+def test_main_pull_stub(
+    mock_parse_args,
+    check_cookies_exists,
+    update_cookies,
+    roster,
+    print_matchup,
+    stub,
+    tmpdir,
+):
+    mock_parse_args.return_value = argparse.Namespace(
+        pull=True, week=0, league_id=4, team_id=9, season=0, cookies=False,
+        matchup=False, standings=False, dev=False, simulate=None, trade=None,
+        suggest_trades=False, profile=False, profile_memory=False,
+        profile_cprofile=None, profile_json=None, base_url=stub.url,
+        rate_limit=None, no_cache=False, scores=False,
+        matchup_only=False, gc=False, scoreboard=None, plan=False,
+        diff=None,
+        scoring=None,
+        local_proj=False,
+        efficiency=False,
+        sos=False,
+        player=None,
+    )
+    with mock.patch('FF.main.DATA_PATH', str(tmpdir)):
+        assert main() == 0
+    saved = read_snapshot(str(tmpdir.join('FF_0_wk0_4.json')))
+    assert saved.pop('FF')['full_pull'] > 0
+    with open(f'{DATA}/FF_0_wk0_4.json') as rf:
+        assert saved == {
+            k: v for k, v in json.load(rf).items() if k != 'draftDetail'
+        }
+
+
+@mock.patch('FF.main.load_cookies', mock_load_cookies)
+def test_pull_matchup_only(tmpdir, capsys):
+    d = generate_league(teams=6, played=3, year=0)
+    remote = tmpdir.mkdir('remote')
+    save_data(str(remote), d, 0, 4, 0)
+    myTeam = build_team(d, 2, argparse.Namespace(season=0, week=4), Profiler())
+    args = argparse.Namespace(
+        season=0, week=4, league_id=0, team_id=2, dev=False, scores=False,
+        matchup_only=True,
+    )
+    with StubServer(str(remote)) as stub:
+        args.base_url = stub.url
+        filtered = pull(args, str(tmpdir))
+        # No saved snapshot: the opponent comes from a schedule-only pull.
+        assert stub.stats['requests'] == 2
+        # Saved in the data path: its schedule names the opponent.
+        save_data(str(tmpdir), filtered, 0, 4, 0)
+        assert pull(args, str(tmpdir))['FF']['teams'] == filtered['FF'][
+            'teams'
+        ]
+        assert stub.stats['requests'] == 3
+    TIDs = sorted([2, myTeam.op_TID])
+    assert filtered['FF']['teams'] == TIDs
+    assert filtered['FF']['periods'] == [4]
+    assert [t['id'] for t in filtered['teams']] == TIDs
+    assert len(filtered['schedule']) == len(d['schedule'])
+
+    save_data(str(tmpdir), filtered, 0, 4, 0)
+    assert load_data(str(tmpdir), args) == filtered
+    # Too few rosters to rank players league-wide.
+    assert league_ratings(filtered, 0, 4).players == {}
+    team = build_team(
+        filtered, 2, args, Profiler(), ratings=league_ratings(d, 0, 4),
+    )
+    assert team.format_roster() == myTeam.format_roster()
+    args.standings = True
+    with pytest.raises(SystemExit, match='Pull the whole league'):
+        load_data(str(tmpdir), args)
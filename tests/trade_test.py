@@ -0,0 +1,138 @@
+import argparse
+
+import pytest
+
+from FF.main import load_data
+from FF.main import Roster
+from FF.trade import build_rosters
+from FF.trade import evaluate_trade
+from FF.trade import find_players
+from FF.trade import lineup_value
+from FF.trade import LineupCache
+from FF.trade import suggest_trades
+
+POS = {'QB': 1, 'RB': 2, 'WR': 3, 'TE': 4, 'K': 5, 'DST': 16}
+
+
+def entry(playerId, pos, proj):
+    return {
+        'lineupSlotId': 20,
+        'playerId': playerId,
+        'playerPoolEntry': {
+            'rosterLocked': False,
+            'player': {
+                'defaultPositionId': POS[pos],
+                'firstName': 'Player',
+                'lastName': f'P{playerId}',
+                'stats': [
+                    {
+                        'appliedTotal': proj,
+                        'id': '1120211',
+                        'scoringPeriodId': 1,
+                        'statSourceId': 1,
+                    },
+                ],
+            },
+        },
+    }
+
+
+def team(TID, players):
+    return {
+        'abbrev': f'T{TID}',
+        'currentSimulationResults': {'playoffPct': 0, 'rank': TID},
+        'id': TID,
+        'roster': {
+            'entries': [
+                entry(TID * 100 + i, pos, proj)
+                for i, (pos, proj) in enumerate(players)
+            ],
+        },
+    }
+
+
+@pytest.fixture
+def mock_cache():
+    base = [('TE', 5.0), ('DST', 5.0), ('K', 5.0)]
+    d = {
+        'teams': [
+            team(1, [
+                ('QB', 20.0), ('QB', 18.0), ('RB', 10.0), ('RB', 9.0),
+                ('WR', 10.0), ('WR', 9.0), ('WR', 3.0),
+            ] + base),
+            team(2, [
+                ('QB', 10.0), ('RB', 15.0), ('RB', 14.0), ('RB', 13.0),
+                ('WR', 12.0), ('WR', 10.0), ('WR', 9.0),
+            ] + base),
+        ],
+    }
+    return LineupCache(build_rosters(d, 2021, 1))
+
+
+def test_lineup_value_matches_decide_lineup():
+    args = argparse.Namespace(league_id=4, season=0, week=0)
+    d = load_data('./tests/data', args)
+    roster = Roster(9)
+    roster.generate_roster(d, 2021, 1)
+    roster.decide_lineup()
+    expected = sum(p.proj for p in roster.roster if p.shouldStart)
+    value = lineup_value((p.pos, p.proj) for p in roster.roster)
+    assert value == pytest.approx(expected)
+
+
+def test_build_rosters_bad_data():
+    with pytest.raises(SystemExit):
+        build_rosters({'teams': [{'id': 1}]}, 2021, 1)
+
+
+def test_cache_value(mock_cache):
+    # QB 20 + RB 10, 9 + WR 10, 9 + FLEX 3 + TE/DST/K 15
+    assert mock_cache.value(1) == 76.0
+    assert mock_cache.value(2) == 89.0
+
+
+def test_cache_memoized(mock_cache):
+    mock_cache.value(1)
+    misses = mock_cache.misses
+    mock_cache.value(1, [101], [203])
+    # Only the QB and FLEX groups change.
+    assert mock_cache.misses == misses + 2
+    mock_cache.value(1, [101], [203])
+    assert mock_cache.misses == misses + 2
+
+
+def test_thresholds(mock_cache):
+    thresholds = mock_cache.thresholds(2)
+    assert thresholds['QB'] == 10.0
+    assert thresholds['RB'] == 13.0
+    assert thresholds['WR'] == 10.0
+    assert thresholds['TE'] == 5.0
+
+
+def test_evaluate_trade(mock_cache):
+    trade = evaluate_trade(mock_cache, 1, 2, [101], [203])
+    assert (trade.gain_A, trade.gain_B) == (10.0, 4.0)
+
+
+def test_suggest_trades(mock_cache):
+    trades = suggest_trades(mock_cache)
+    assert trades
+    assert all(t.gain_A > 0 and t.gain_B > 0 for t in trades)
+    assert (1, 2, (101,), (203,), 10.0, 4.0) in trades
+    # RB 10 is below team 2's weakest RB starter (13), but starts once
+    # the RBs 15 and 13 are traded away.
+    assert (1, 2, (100, 102), (201, 203), 13.0, 1.0) in trades
+    # The 1-for-1 with an even swap of kickers.
+    assert (1, 2, (100,), (201,), 10.0, 4.0) in trades
+    assert not [
+        t for t in trades if (t.give, t.get) == ((100, 109), (201, 209))
+    ]
+    one_for_one = suggest_trades(mock_cache, max_players=1)
+    assert all(len(t.give) == 1 for t in one_for_one)
+
+
+def test_find_players(mock_cache):
+    roster = mock_cache.rosters[1]
+    assert find_players(roster, ['p101', 'Player P102']) == [101, 102]
+    with pytest.raises(SystemExit):
+        find_players(roster, ['Nobody'])